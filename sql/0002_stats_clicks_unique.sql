@@ -0,0 +1,26 @@
+-- Collapse duplicated counters before adding the unique key used by bulk upserts.
+WITH ranked AS (
+    SELECT id,
+           first_value(id) OVER w AS keep_id,
+           sum(clicks) OVER w AS total_clicks,
+           max(updated_at) OVER w AS last_updated_at
+    FROM stats_clicks
+    WINDOW w AS (PARTITION BY post_id, channel_id, button_key ORDER BY id
+                 ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING)
+)
+UPDATE stats_clicks AS sc
+SET clicks = ranked.total_clicks,
+    updated_at = ranked.last_updated_at
+FROM ranked
+WHERE sc.id = ranked.id AND ranked.id = ranked.keep_id;
+
+DELETE FROM stats_clicks AS sc
+USING stats_clicks AS dup
+WHERE sc.post_id = dup.post_id
+  AND sc.channel_id = dup.channel_id
+  AND sc.button_key = dup.button_key
+  AND sc.id > dup.id;
+
+ALTER TABLE stats_clicks
+    ADD CONSTRAINT stats_clicks_post_channel_button_key
+    UNIQUE (post_id, channel_id, button_key);
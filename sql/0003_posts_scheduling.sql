@@ -0,0 +1,10 @@
+-- 'publishing' marks posts claimed by a scheduler replica while they are being sent.
+ALTER TABLE posts DROP CONSTRAINT IF EXISTS posts_status_check;
+ALTER TABLE posts DROP CONSTRAINT IF EXISTS posts_status_chk;
+ALTER TABLE posts
+    ADD CONSTRAINT posts_status_chk
+    CHECK (status IN ('draft','scheduled','queued','publishing','published','deleted'));
+
+CREATE INDEX IF NOT EXISTS posts_due_idx
+    ON posts (scheduled_at)
+    WHERE status IN ('scheduled','queued');
@@ -0,0 +1,21 @@
+CREATE TABLE IF NOT EXISTS stats_hourly (
+    channel_id BIGINT NOT NULL REFERENCES channels(id) ON DELETE CASCADE,
+    bucket_start TIMESTAMPTZ NOT NULL,
+    post_id BIGINT NOT NULL REFERENCES posts(id) ON DELETE CASCADE,
+    clicks BIGINT NOT NULL DEFAULT 0,
+    reactions BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (channel_id, bucket_start, post_id)
+);
+
+CREATE TABLE IF NOT EXISTS stats_daily (
+    channel_id BIGINT NOT NULL REFERENCES channels(id) ON DELETE CASCADE,
+    bucket_start TIMESTAMPTZ NOT NULL,
+    post_id BIGINT NOT NULL REFERENCES posts(id) ON DELETE CASCADE,
+    clicks BIGINT NOT NULL DEFAULT 0,
+    reactions BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (channel_id, bucket_start, post_id)
+);
+
+CREATE INDEX IF NOT EXISTS stats_hourly_post_idx ON stats_hourly (post_id, bucket_start);
+CREATE INDEX IF NOT EXISTS stats_daily_post_idx ON stats_daily (post_id, bucket_start);
+CREATE INDEX IF NOT EXISTS stats_hourly_bucket_idx ON stats_hourly (bucket_start);
@@ -0,0 +1,55 @@
+-- Move audit to a table range-partitioned by month on ts.
+ALTER TABLE audit RENAME TO audit_legacy;
+
+CREATE TABLE audit (
+    id BIGSERIAL,
+    user_id BIGINT,
+    action TEXT NOT NULL,
+    target_type TEXT,
+    target_id BIGINT,
+    ts TIMESTAMPTZ NOT NULL DEFAULT now(),
+    extra_json JSONB,
+    PRIMARY KEY (id, ts)
+) PARTITION BY RANGE (ts);
+
+CREATE INDEX IF NOT EXISTS audit_ts_idx ON audit (ts);
+CREATE INDEX IF NOT EXISTS audit_target_idx ON audit (target_type, target_id, ts);
+
+CREATE TABLE IF NOT EXISTS audit_default PARTITION OF audit DEFAULT;
+
+CREATE OR REPLACE FUNCTION audit_ensure_partition(month_start DATE) RETURNS VOID AS $$
+DECLARE
+    start_date DATE := date_trunc('month', month_start)::date;
+    partition_name TEXT := 'audit_' || to_char(start_date, 'YYYYMM');
+BEGIN
+    EXECUTE format(
+        'CREATE TABLE IF NOT EXISTS %I PARTITION OF audit FOR VALUES FROM (%L) TO (%L)',
+        partition_name,
+        start_date,
+        (start_date + INTERVAL '1 month')::date
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+DECLARE
+    month_start DATE;
+BEGIN
+    FOR month_start IN
+        SELECT DISTINCT date_trunc('month', coalesce(ts, now()))::date FROM audit_legacy
+        UNION
+        SELECT date_trunc('month', now())::date
+        UNION
+        SELECT (date_trunc('month', now()) + INTERVAL '1 month')::date
+    LOOP
+        PERFORM audit_ensure_partition(month_start);
+    END LOOP;
+END;
+$$;
+
+INSERT INTO audit (user_id, action, target_type, target_id, ts, extra_json)
+SELECT user_id, action, target_type, target_id, coalesce(ts, now()), extra_json
+FROM audit_legacy
+ORDER BY id;
+
+DROP TABLE audit_legacy;
@@ -0,0 +1,12 @@
+-- Content-addressed cache of Telegram file_ids for uploaded media.
+CREATE TABLE IF NOT EXISTS media_files (
+    sha256 CHAR(64) NOT NULL,
+    kind TEXT NOT NULL,
+    file_id TEXT NOT NULL,
+    size_bytes BIGINT NOT NULL DEFAULT 0,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    last_used_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (sha256, kind)
+);
+
+CREATE INDEX IF NOT EXISTS media_files_last_used_idx ON media_files (last_used_at);
@@ -0,0 +1,6 @@
+-- Keyset pagination of "my posts" by status, and "posts for channel X" lookups.
+CREATE INDEX IF NOT EXISTS posts_author_status_created_idx
+    ON posts (author_user_id, status, created_at DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS posts_channels_gin_idx
+    ON posts USING GIN (channels);
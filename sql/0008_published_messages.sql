@@ -0,0 +1,25 @@
+-- Maps Telegram messages back to the post and channel they were published for.
+CREATE TABLE IF NOT EXISTS published_messages (
+    chat_id BIGINT NOT NULL,
+    message_id BIGINT NOT NULL,
+    post_id BIGINT NOT NULL REFERENCES posts(id) ON DELETE CASCADE,
+    channel_id BIGINT NOT NULL REFERENCES channels(id) ON DELETE CASCADE,
+    published_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (chat_id, message_id)
+);
+
+CREATE INDEX IF NOT EXISTS published_messages_post_idx
+    ON published_messages (post_id, channel_id);
+
+-- Reaction counts are stored as absolute snapshots; keep one row per emoji.
+DELETE FROM stats_reactions AS sr
+USING stats_reactions AS newer
+WHERE sr.post_id = newer.post_id
+  AND sr.channel_id = newer.channel_id
+  AND sr.emoji = newer.emoji
+  AND (coalesce(sr.updated_at, '-infinity'), sr.id)
+      < (coalesce(newer.updated_at, '-infinity'), newer.id);
+
+ALTER TABLE stats_reactions
+    ADD CONSTRAINT stats_reactions_post_channel_emoji_key
+    UNIQUE (post_id, channel_id, emoji);
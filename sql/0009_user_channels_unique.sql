@@ -0,0 +1,10 @@
+-- One role per user and channel; keep the most recently inserted row of any duplicates.
+DELETE FROM user_channels AS uc
+USING user_channels AS newer
+WHERE uc.user_id = newer.user_id
+  AND uc.channel_id = newer.channel_id
+  AND uc.id < newer.id;
+
+ALTER TABLE user_channels
+    ADD CONSTRAINT user_channels_user_channel_key
+    UNIQUE (user_id, channel_id);
@@ -0,0 +1,4 @@
+-- Hash of the post content each published message currently shows, so edit propagation
+-- can skip messages that are already up to date. NULL for messages sent before this
+-- migration; those are edited once and then tracked.
+ALTER TABLE published_messages ADD COLUMN IF NOT EXISTS content_hash CHAR(64);
@@ -0,0 +1,14 @@
+-- Publication retries: failed posts are re-queued with backoff until publish_attempts runs
+-- out and they end up 'failed'. A claim holds a post in 'publishing' until claimed_until;
+-- posts left there by a crashed replica are claimed again once that lease runs out.
+ALTER TABLE posts ADD COLUMN IF NOT EXISTS publish_attempts INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE posts ADD COLUMN IF NOT EXISTS claimed_until TIMESTAMPTZ;
+
+ALTER TABLE posts DROP CONSTRAINT IF EXISTS posts_status_chk;
+ALTER TABLE posts
+    ADD CONSTRAINT posts_status_chk
+    CHECK (status IN ('draft','scheduled','queued','publishing','published','failed','deleted'));
+
+CREATE INDEX IF NOT EXISTS posts_publishing_idx
+    ON posts (claimed_until)
+    WHERE status = 'publishing';
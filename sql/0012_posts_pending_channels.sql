@@ -0,0 +1,3 @@
+-- Channels a failed publication attempt did not reach; retries send only to these.
+-- NULL means all of posts.channels.
+ALTER TABLE posts ADD COLUMN IF NOT EXISTS pending_channels INTEGER[];
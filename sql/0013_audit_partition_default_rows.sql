@@ -0,0 +1,44 @@
+-- Creating a monthly partition fails while audit_default holds rows of that month
+-- (written before the partition existed). Move such rows into a standalone table and
+-- attach it as the partition instead.
+CREATE OR REPLACE FUNCTION audit_ensure_partition(month_start DATE) RETURNS VOID AS $$
+DECLARE
+    start_date DATE := date_trunc('month', month_start)::date;
+    end_date DATE := (date_trunc('month', month_start) + INTERVAL '1 month')::date;
+    partition_name TEXT := 'audit_' || to_char(start_date, 'YYYYMM');
+BEGIN
+    IF to_regclass(quote_ident(partition_name)) IS NOT NULL THEN
+        RETURN;
+    END IF;
+
+    -- Blocks inserts that would land in the default partition meanwhile.
+    LOCK TABLE audit_default IN SHARE ROW EXCLUSIVE MODE;
+    IF NOT EXISTS (SELECT 1 FROM audit_default WHERE ts >= start_date AND ts < end_date) THEN
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF audit FOR VALUES FROM (%L) TO (%L)',
+            partition_name,
+            start_date,
+            end_date
+        );
+        RETURN;
+    END IF;
+
+    EXECUTE format(
+        'CREATE TABLE %I (LIKE audit INCLUDING DEFAULTS INCLUDING CONSTRAINTS)',
+        partition_name
+    );
+    EXECUTE format(
+        'WITH moved AS (DELETE FROM audit_default WHERE ts >= %L AND ts < %L RETURNING *) '
+        'INSERT INTO %I SELECT * FROM moved',
+        start_date,
+        end_date,
+        partition_name
+    );
+    EXECUTE format(
+        'ALTER TABLE audit ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+        partition_name,
+        start_date,
+        end_date
+    );
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,46 @@
+-- Keyset pagination of "posts for channel X". The GIN index on posts.channels finds a
+-- channel's posts but cannot return them in (created_at, id) order, so every page sorted
+-- all of them; post_channels is a B-tree walk per page instead. A trigger keeps it in step
+-- with posts.channels, status and created_at.
+UPDATE posts SET created_at = now() WHERE created_at IS NULL;
+ALTER TABLE posts
+    ALTER COLUMN created_at SET DEFAULT now(),
+    ALTER COLUMN created_at SET NOT NULL;
+
+CREATE TABLE IF NOT EXISTS post_channels (
+    channel_id BIGINT NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL,
+    post_id BIGINT NOT NULL REFERENCES posts(id) ON DELETE CASCADE,
+    status TEXT NOT NULL,
+    PRIMARY KEY (channel_id, created_at, post_id)
+);
+
+CREATE INDEX IF NOT EXISTS post_channels_post_idx ON post_channels (post_id);
+
+CREATE OR REPLACE FUNCTION posts_sync_channels() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' THEN
+        IF NEW.channels = OLD.channels AND NEW.created_at = OLD.created_at THEN
+            IF NEW.status IS DISTINCT FROM OLD.status THEN
+                UPDATE post_channels SET status = NEW.status WHERE post_id = NEW.id;
+            END IF;
+            RETURN NULL;
+        END IF;
+        DELETE FROM post_channels WHERE post_id = OLD.id;
+    END IF;
+    INSERT INTO post_channels (channel_id, created_at, post_id, status)
+    SELECT DISTINCT channel_id, NEW.created_at, NEW.id, NEW.status
+    FROM unnest(NEW.channels) AS channel_id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS posts_sync_channels ON posts;
+CREATE TRIGGER posts_sync_channels
+    AFTER INSERT OR UPDATE OF channels, status, created_at ON posts
+    FOR EACH ROW EXECUTE FUNCTION posts_sync_channels();
+
+INSERT INTO post_channels (channel_id, created_at, post_id, status)
+SELECT DISTINCT channel_id, posts.created_at, posts.id, posts.status
+FROM posts, unnest(posts.channels) AS channel_id
+ON CONFLICT DO NOTHING;
@@ -0,0 +1,81 @@
+"""Command line entry point: ``python -m alt_controller_bot <command>``."""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from importlib import import_module
+from typing import Any, Callable
+
+
+def _create_dispatcher() -> Any:
+    from alt_controller_bot.bot.main import create_dispatcher
+
+    return asyncio.run(create_dispatcher())
+
+
+def _startup_steps() -> list[tuple[str, Callable[[], Any]]]:
+    from alt_controller_bot.app import get_app
+
+    app = get_app()
+    return [
+        ("import config", lambda: import_module("alt_controller_bot.core.config")),
+        ("load settings", lambda: app.settings),
+        ("import sqlalchemy + db", lambda: import_module("alt_controller_bot.db.database")),
+        ("create engine", lambda: app.engine),
+        ("create redis client", lambda: app.redis),
+        ("import aiogram", lambda: import_module("aiogram")),
+        ("import routers", lambda: app.routers),
+        ("create dispatcher", _create_dispatcher),
+        ("import api app", lambda: import_module("alt_controller_bot.api.main")),
+    ]
+
+
+def startup_profile(as_json: bool = False) -> int:
+    """Time each startup component once, in dependency order, in this fresh process."""
+    timings: list[dict[str, Any]] = []
+    status = 0
+    for name, step in _startup_steps():
+        started = time.perf_counter()
+        try:
+            step()
+        except Exception as exc:  # noqa: BLE001 - report and stop, later steps depend on it
+            timings.append({"step": name, "ms": None, "error": f"{type(exc).__name__}: {exc}"})
+            status = 1
+            break
+        timings.append({"step": name, "ms": (time.perf_counter() - started) * 1000})
+
+    if as_json:
+        print(json.dumps(timings, indent=2))
+        return status
+
+    total = sum(item["ms"] or 0 for item in timings)
+    for item in timings:
+        value = f"{item['ms']:9.1f} ms" if item["ms"] is not None else f"  failed: {item['error']}"
+        print(f"{item['step']:<26}{value}")
+    print(f"{'total':<26}{total:9.1f} ms")
+    return status
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m alt_controller_bot")
+    commands = parser.add_subparsers(dest="command", required=True)
+    profile = commands.add_parser("startup-profile", help="report import and startup time")
+    profile.add_argument("--json", action="store_true", help="print timings as JSON")
+    commands.add_parser("bench", help="run the load benchmark (see --help of the command)")
+
+    args, rest = parser.parse_known_args(argv)
+    if args.command == "startup-profile":
+        return startup_profile(args.json)
+    if args.command == "bench":
+        from alt_controller_bot.bench.__main__ import main as bench_main
+
+        bench_main(rest)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,3 +1,14 @@
-from alt_controller_bot.api.main import app
+from typing import TYPE_CHECKING
 
-__all__ = ["app"]
+__all__ = ["app", "create_app"]
+
+if TYPE_CHECKING:  # pragma: no cover - for type checkers only
+    from alt_controller_bot.api.main import app as app, create_app as create_app
+
+
+def __getattr__(name: str):
+    if name in __all__:
+        from alt_controller_bot.api import main
+
+        return getattr(main, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from fastapi import APIRouter, FastAPI, Request, Response, status
+
+from alt_controller_bot.app import get_app
+from alt_controller_bot.core.config import get_settings
+from alt_controller_bot.db.database import get_session_factory
+from alt_controller_bot.services.clicks import ClickAggregator
+from alt_controller_bot.services.links import LinkResolver
+
+router = APIRouter(tags=["links"])
+
+
+@asynccontextmanager
+async def link_tracking(app: FastAPI) -> AsyncIterator[None]:
+    """Preload the link map and run the click write-behind buffer for this worker.
+
+    Posts edited by the bot or by another worker are dropped from the map through the
+    invalidation bus.
+    """
+    settings = get_settings()
+    session_factory = get_session_factory()
+    links = LinkResolver(session_factory, maxsize=settings.link_cache_size)
+    bus = get_app().invalidation_bus
+    links.bind(bus)
+    # Subscribed before the preload, so no change committed meanwhile is missed.
+    await bus.start()
+    await links.preload(settings.link_preload_posts)
+    clicks = ClickAggregator(
+        session_factory,
+        flush_interval=settings.click_flush_interval,
+        max_pending_keys=settings.click_flush_max_keys,
+    )
+    await clicks.start()
+    app.state.links = links
+    app.state.clicks = clicks
+    try:
+        yield
+    finally:
+        await clicks.stop()
+        links.unbind(bus)
+
+
+async def redirect(request: Request) -> Response:
+    token = request.path_params["token"]
+    links: LinkResolver = request.app.state.links
+    link = links.get(token) or await links.resolve(token)
+    if link is None:
+        return Response(status_code=status.HTTP_404_NOT_FOUND)
+    # Only bumps an in-memory counter; the database write happens on the next flush.
+    request.app.state.clicks.add(link.post_id, link.channel_id, link.button_key)
+    return Response(
+        status_code=status.HTTP_302_FOUND,
+        headers={"location": link.target_url, "cache-control": "no-store"},
+    )
+
+
+# A plain Starlette route: FastAPI's parameter validation would take about two thirds of
+# the time of a redirect.
+router.add_route("/r/{token}", redirect, methods=["GET"], include_in_schema=False)
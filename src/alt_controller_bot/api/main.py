@@ -1,8 +1,113 @@
-from fastapi import FastAPI
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import AsyncIterator
 
-app = FastAPI(title="ALT Controller Bot API")
+from fastapi import FastAPI, Request, Response
+
+from alt_controller_bot.api import stats
+from alt_controller_bot.app import get_app
+from alt_controller_bot.core import metrics
+from alt_controller_bot.core.config import get_settings
+from alt_controller_bot.db.database import pool_status
+
+
+@asynccontextmanager
+async def webhook_feeder(app: FastAPI) -> AsyncIterator[None]:
+    from alt_controller_bot.api.webhook import StreamFeeder, UpdateClaims, UpdateFeeder
+    from alt_controller_bot.bot.main import create_bot, create_dispatcher, create_update_stream
+
+    settings = get_settings()
+    redis = get_app().redis
+    claims = UpdateClaims(
+        redis, ttl=settings.webhook_dedup_ttl, lease=settings.webhook_claim_lease
+    )
+    if settings.update_stream_shards:
+        stream = create_update_stream(redis)
+        await stream.ensure_groups()
+        app.state.update_feeder = StreamFeeder(stream, claims)
+        yield
+        return
+
+    bot = await create_bot()
+    dp = await create_dispatcher(redis)
+    app.state.update_feeder = UpdateFeeder(
+        bot, dp, claims, max_tasks=settings.webhook_max_tasks
+    )
+    workflow_data = {"dispatcher": dp, "bots": [bot], **dp.workflow_data}
+    await dp.emit_startup(bot=bot, **workflow_data)
+    try:
+        yield
+    finally:
+        await app.state.update_feeder.close()
+        await dp.emit_shutdown(bot=bot, **workflow_data)
+        await bot.session.close()
+
+
+@asynccontextmanager
+async def metrics_snapshots(app: FastAPI) -> AsyncIterator[None]:
+    settings = get_settings()
+    store = metrics.SnapshotStore(
+        metrics.registry,
+        settings.metrics_multiproc_dir,
+        interval=settings.metrics_snapshot_interval,
+    )
+    await store.start()
+    app.state.metrics_store = store
+    try:
+        yield
+    finally:
+        await store.stop()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    settings = get_settings()
+    try:
+        async with AsyncExitStack() as stack:
+            if settings.metrics_multiproc_dir:
+                await stack.enter_async_context(metrics_snapshots(app))
+            if settings.link_base_url:
+                from alt_controller_bot.api.links import link_tracking
+
+                await stack.enter_async_context(link_tracking(app))
+            if settings.webhook_url:
+                await stack.enter_async_context(webhook_feeder(app))
+            yield
+    finally:
+        await get_app().aclose()
 
 
-@app.get("/health")
 def healthcheck() -> dict[str, bool]:
     return {"ok": True}
+
+
+def db_pool_health() -> dict[str, float]:
+    return pool_status()
+
+
+async def metrics_endpoint(request: Request) -> Response:
+    store = getattr(request.app.state, "metrics_store", None)
+    content = metrics.registry.render() if store is None else store.render()
+    return Response(content=content, media_type=metrics.CONTENT_TYPE)
+
+
+def create_app() -> FastAPI:
+    settings = get_settings()
+    app = FastAPI(title="ALT Controller Bot API", lifespan=lifespan)
+    app.include_router(stats.router)
+    if settings.link_base_url:
+        from alt_controller_bot.api import links
+
+        app.include_router(links.router)
+    if settings.webhook_url:
+        from alt_controller_bot.api import webhook
+
+        app.include_router(
+            webhook.build_router(settings.webhook_path, settings.webhook_secret_token)
+        )
+    app.add_api_route("/health", healthcheck, methods=["GET"])
+    app.add_api_route("/health/db-pool", db_pool_health, methods=["GET"])
+    app.add_api_route("/metrics", metrics_endpoint, methods=["GET"], include_in_schema=False)
+    return app
+
+
+app = create_app()
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import secrets
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from fastapi.responses import StreamingResponse
+
+from alt_controller_bot.core.config import get_settings
+from alt_controller_bot.db.database import get_session_factory
+from alt_controller_bot.services.export import StatsExportFilter, stream_stats_csv
+
+router = APIRouter(prefix="/stats", tags=["stats"])
+
+
+def require_api_token(authorization: str | None = Header(default=None)) -> None:
+    settings = get_settings()
+    if not settings.api_token:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+    expected = f"Bearer {settings.api_token}"
+    if authorization is None or not secrets.compare_digest(authorization, expected):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+
+
+@router.get("/export.csv", dependencies=[Depends(require_api_token)])
+async def export_stats_csv(
+    channel_id: int | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+) -> StreamingResponse:
+    filters = StatsExportFilter(channel_id=channel_id, since=since, until=until)
+    batch_size = get_settings().export_batch_size
+    return StreamingResponse(
+        stream_stats_csv(get_session_factory(), filters, batch_size=batch_size),
+        media_type="text/csv",
+        headers={"Content-Disposition": 'attachment; filename="stats.csv"'},
+    )
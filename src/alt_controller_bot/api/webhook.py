@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import secrets
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+from fastapi import APIRouter, Header, HTTPException, Request, Response, status
+from redis.asyncio import Redis
+
+from alt_controller_bot.bot.streams import RELEASE_LEASE, UpdateStream
+
+logger = logging.getLogger(__name__)
+
+
+class UpdateClaims:
+    """Per-``update_id`` markers in Redis that let one delivery of an update through.
+
+    A delivery first takes a short processing lease (``SET NX PX``). Once the update was
+    handled, or handed to the update stream, the marker becomes ``done`` and is kept for
+    ``ttl`` seconds so Telegram's redeliveries are dropped on any uvicorn worker. A
+    delivery that fails releases its lease, so a redelivery is processed instead of being
+    dropped, and the lease of a worker that died mid-way runs out after ``lease`` seconds.
+    """
+
+    def __init__(self, redis: Redis, *, ttl: int = 3600, lease: float = 60.0):
+        self.redis = redis
+        self.ttl = ttl
+        self.lease = lease
+        self._release = redis.register_script(RELEASE_LEASE)
+
+    @staticmethod
+    def key(update_id: int) -> str:
+        return f"webhook:update:{update_id}"
+
+    async def claim(self, update_id: int) -> str | None:
+        """A token for releasing the claim, or ``None`` if the update is taken or done."""
+        token = secrets.token_hex(8)
+        claimed = await self.redis.set(
+            self.key(update_id), token, nx=True, px=int(self.lease * 1000)
+        )
+        return token if claimed else None
+
+    async def complete(self, update_id: int) -> None:
+        await self.redis.set(self.key(update_id), "done", ex=self.ttl)
+
+    async def release(self, update_id: int, token: str) -> None:
+        await self._release(keys=[self.key(update_id)], args=[token])
+
+
+class UpdateFeeder:
+    """Feeds webhook updates into the dispatcher on a bounded set of background tasks.
+
+    An update is marked done in ``claims`` only after the dispatcher handled it.
+    """
+
+    def __init__(
+        self,
+        bot: Bot,
+        dispatcher: Dispatcher,
+        claims: UpdateClaims,
+        *,
+        max_tasks: int = 256,
+    ):
+        self.bot = bot
+        self.dispatcher = dispatcher
+        self.claims = claims
+        self.max_tasks = max_tasks
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    @property
+    def has_capacity(self) -> bool:
+        return len(self._tasks) < self.max_tasks
+
+    async def accept(self, payload: dict) -> None:
+        update_id = payload["update_id"]
+        token = await self.claims.claim(update_id)
+        if token is None:
+            return
+        try:
+            update = Update.model_validate(payload, context={"bot": self.bot})
+        except BaseException:
+            await self.claims.release(update_id, token)
+            raise
+        self.submit(update, token)
+
+    def submit(self, update: Update, token: str) -> None:
+        task = asyncio.create_task(self._process(update, token))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def close(self, timeout: float = 10.0) -> None:
+        if self._tasks:
+            await asyncio.wait(self._tasks, timeout=timeout)
+
+    async def _process(self, update: Update, token: str) -> None:
+        try:
+            await self.dispatcher.feed_update(self.bot, update)
+        except Exception:
+            logger.exception("Failed to process update %s", update.update_id)
+            settle = self.claims.release(update.update_id, token)
+        else:
+            settle = self.claims.complete(update.update_id)
+        try:
+            await settle
+        except Exception:
+            logger.exception("Failed to settle the claim on update %s", update.update_id)
+
+
+class StreamFeeder:
+    """Appends webhook updates to the sharded update stream for the worker pool.
+
+    An update is marked done in ``claims`` once it is in the stream; the stream takes it
+    from there.
+    """
+
+    has_capacity = True
+
+    def __init__(self, stream: UpdateStream, claims: UpdateClaims):
+        self.stream = stream
+        self.claims = claims
+
+    async def accept(self, payload: dict) -> None:
+        update_id = payload["update_id"]
+        token = await self.claims.claim(update_id)
+        if token is None:
+            return
+        try:
+            await self.stream.append(payload)
+        except BaseException:
+            await self.claims.release(update_id, token)
+            raise
+        await self.claims.complete(update_id)
+
+
+def build_router(path: str, secret_token: str) -> APIRouter:
+    router = APIRouter()
+
+    @router.post(path, include_in_schema=False)
+    async def telegram_webhook(
+        request: Request,
+        x_telegram_bot_api_secret_token: str | None = Header(default=None),
+    ) -> Response:
+        if x_telegram_bot_api_secret_token is None or not secrets.compare_digest(
+            x_telegram_bot_api_secret_token, secret_token
+        ):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
+
+        feeder: UpdateFeeder | StreamFeeder | None = getattr(
+            request.app.state, "update_feeder", None
+        )
+        if feeder is None:
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE)
+        if not feeder.has_capacity:
+            # Telegram redelivers on non-2xx responses, which gives us backpressure for free.
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+        # A failure here answers 500 with the claim released, so Telegram's redelivery
+        # gets processed.
+        await feeder.accept(await request.json())
+        return Response(status_code=status.HTTP_200_OK)
+
+    return router
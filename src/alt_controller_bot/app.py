@@ -0,0 +1,123 @@
+"""Process-wide application factory.
+
+Settings, the database engine, the Redis client and the bot routers are created on first
+access instead of at import time, so tools that only need part of the stack don't pay
+for the rest.
+"""
+
+from __future__ import annotations
+
+from functools import cached_property
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:  # pragma: no cover - for type checkers only
+    from aiogram import Router
+    from redis.asyncio import Redis
+    from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+    from alt_controller_bot.core.config import Settings
+    from alt_controller_bot.services.invalidation import InvalidationBus
+
+
+class AppFactory:
+    def __init__(self, settings: Settings | None = None):
+        self._settings = settings
+
+    @cached_property
+    def settings(self) -> Settings:
+        if self._settings is not None:
+            return self._settings
+        from alt_controller_bot.core.config import load_settings
+
+        return load_settings()
+
+    @cached_property
+    def engine(self) -> AsyncEngine:
+        from alt_controller_bot.db.database import build_engine
+        from alt_controller_bot.db.instrumentation import (
+            install_pool_metrics,
+            install_statement_metrics,
+        )
+
+        engine = build_engine(settings=self.settings)
+        install_statement_metrics(engine)
+        install_pool_metrics(engine)
+        return engine
+
+    @cached_property
+    def session_factory(self) -> async_sessionmaker[AsyncSession]:
+        from alt_controller_bot.db.database import build_session_factory
+
+        return build_session_factory(self.engine)
+
+    @cached_property
+    def redis(self) -> Redis:
+        from redis.asyncio import Redis
+
+        return Redis.from_url(str(self.settings.redis_url))
+
+    @cached_property
+    def invalidation_bus(self) -> InvalidationBus:
+        """Process-wide bus announcing committed post, role and channel changes.
+
+        Started by its first user.
+        """
+        from alt_controller_bot.services.invalidation import InvalidationBus
+        from alt_controller_bot.services.repositories import (
+            CHANGED_CHANNELS_KEY,
+            CHANGED_POSTS_KEY,
+            CHANGED_USER_ROLES_KEY,
+        )
+
+        bus = InvalidationBus(
+            self.redis, (CHANGED_POSTS_KEY, CHANGED_USER_ROLES_KEY, CHANGED_CHANNELS_KEY)
+        )
+        bus.bind_session_events()
+        return bus
+
+    @cached_property
+    def routers(self) -> list[Router]:
+        from alt_controller_bot.bot.handlers import (
+            channels,
+            common,
+            drafts,
+            queue,
+            reactions,
+            stats,
+        )
+
+        return [
+            common.router,
+            channels.router,
+            drafts.router,
+            queue.router,
+            stats.router,
+            reactions.router,
+        ]
+
+    async def aclose(self) -> None:
+        if "invalidation_bus" in self.__dict__:
+            self.invalidation_bus.unbind_session_events()
+            await self.invalidation_bus.stop()
+            del self.__dict__["invalidation_bus"]
+        if "redis" in self.__dict__:
+            await self.redis.aclose()
+            del self.__dict__["redis"]
+        if "engine" in self.__dict__:
+            await self.engine.dispose()
+
+
+_app: AppFactory | None = None
+
+
+def get_app() -> AppFactory:
+    global _app
+    if _app is None:
+        _app = AppFactory()
+    return _app
+
+
+def set_app(app: AppFactory | None) -> None:
+    """Install a custom factory, e.g. with explicit settings for tests or tools."""
+    global _app
+    _app = app
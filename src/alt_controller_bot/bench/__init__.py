@@ -0,0 +1 @@
+"""Synthetic load and benchmark harness (``python -m alt_controller_bot.bench``)."""
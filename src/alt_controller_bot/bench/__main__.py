@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+from pathlib import Path
+
+from alt_controller_bot.bench.harness import (
+    format_results,
+    load_results,
+    run_analytics,
+    run_bot_api_cache,
+    run_dispatcher,
+    run_export,
+    run_callback_routing,
+    run_fsm_storage,
+    run_publisher,
+    run_redirects,
+    run_render,
+    run_repositories,
+    run_scheduler,
+    run_streams,
+    save_results,
+)
+
+DEFAULT_BASELINE_DIR = Path(".benchmarks")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m alt_controller_bot.bench",
+        description="Synthetic load benchmark for the dispatcher and repositories.",
+    )
+    parser.add_argument("--updates", type=int, default=5000, help="synthetic updates to feed")
+    parser.add_argument("--rate", type=float, default=0.0, help="updates/s, 0 = closed loop")
+    parser.add_argument("--concurrency", type=int, default=16, help="closed-loop workers")
+    parser.add_argument("--users", type=int, default=1000, help="distinct synthetic users")
+    parser.add_argument("--api-latency", type=float, default=0.0, help="stub Bot API delay, s")
+    parser.add_argument(
+        "--db",
+        action="store_true",
+        help="include DB-backed scenarios; requires a migrated DATABASE_URL",
+    )
+    parser.add_argument("--repo-ops", type=int, default=1000, help="operations per repo scenario")
+    parser.add_argument(
+        "--export-rows",
+        type=int,
+        default=0,
+        help="click rows for the /export scenario; requires a migrated DATABASE_URL, 0 = skip",
+    )
+    parser.add_argument(
+        "--scheduler-pending",
+        type=int,
+        default=0,
+        help="future posts for the scheduler scenario; requires a migrated DATABASE_URL, 0 = skip",
+    )
+    parser.add_argument("--posts", type=int, default=200, help="posts for the render scenario")
+    parser.add_argument("--fanout", type=int, default=50, help="channels per rendered post")
+    parser.add_argument(
+        "--callback-types", type=int, default=300, help="callback kinds for the routing scenario"
+    )
+    parser.add_argument(
+        "--publish-channels",
+        type=lambda value: [int(item) for item in value.split(",")],
+        help="fan-out sizes for the publisher scenario, e.g. 1,100,1000",
+    )
+    parser.add_argument(
+        "--publish-rate", type=float, default=30.0, help="global send rate for the publisher"
+    )
+    parser.add_argument(
+        "--fsm-wizards",
+        type=int,
+        default=0,
+        help="draft wizards for the FSM storage scenario (fakeredis), 0 = skip",
+    )
+    parser.add_argument(
+        "--redirects", type=int, default=0, help="requests for the /r/{token} scenario, 0 = skip"
+    )
+    parser.add_argument(
+        "--redirect-url", help="tracked link of a running API; default: in-process ASGI"
+    )
+    parser.add_argument(
+        "--bot-api-calls",
+        type=int,
+        default=0,
+        help="getChatMember/getChatAdministrators calls to a local fake Bot API, 0 = skip",
+    )
+    parser.add_argument(
+        "--analytics-channels",
+        type=int,
+        default=0,
+        help="channels for the analytics scenario (a year of data), 0 = skip",
+    )
+    parser.add_argument(
+        "--analytics-posts", type=int, default=10, help="posts per channel per day"
+    )
+    parser.add_argument(
+        "--streams",
+        type=lambda value: [int(item) for item in value.split(",")],
+        help="worker counts for the Redis stream scenario, e.g. 1,2,4,8",
+    )
+    parser.add_argument(
+        "--stream-redis",
+        default="redis://127.0.0.1:6379/15",
+        help="Redis for the stream scenario (workers are separate processes)",
+    )
+    parser.add_argument("--trace-alloc", action="store_true", help="measure allocations")
+    parser.add_argument(
+        "--save", metavar="NAME", help=f"save results to {DEFAULT_BASELINE_DIR}/NAME.json"
+    )
+    parser.add_argument(
+        "--compare", metavar="PATH", type=Path, help="baseline JSON to compare with"
+    )
+    return parser
+
+
+async def run(args: argparse.Namespace) -> None:
+    results = [
+        await run_dispatcher(
+            args.updates,
+            rate=args.rate,
+            concurrency=args.concurrency,
+            users=args.users,
+            with_db=args.db,
+            trace_alloc=args.trace_alloc,
+            api_latency=args.api_latency,
+        )
+    ]
+    results.extend(run_render(args.posts, args.fanout))
+    results.extend(await run_callback_routing(args.callback_types, args.updates))
+    if args.publish_channels:
+        results.extend(
+            await run_publisher(
+                args.publish_channels,
+                global_rate=args.publish_rate,
+                api_latency=args.api_latency,
+            )
+        )
+    if args.fsm_wizards:
+        results.extend(await run_fsm_storage(args.fsm_wizards))
+    if args.redirects:
+        results.append(
+            await run_redirects(
+                args.redirects, concurrency=args.concurrency, url=args.redirect_url
+            )
+        )
+    if args.bot_api_calls:
+        results.extend(
+            await run_bot_api_cache(args.bot_api_calls, concurrency=args.concurrency)
+        )
+    if args.analytics_channels:
+        results.extend(run_analytics(args.analytics_channels, 365, args.analytics_posts))
+    if args.streams:
+        results.extend(
+            await run_streams(
+                args.updates,
+                args.streams,
+                redis_url=args.stream_redis,
+                users=args.users,
+                api_latency=args.api_latency,
+            )
+        )
+    if args.db:
+        results.extend(await run_repositories(args.repo_ops))
+    if args.export_rows:
+        results.append(await run_export(args.export_rows))
+    if args.scheduler_pending:
+        results.append(await run_scheduler(args.scheduler_pending))
+
+    baseline = load_results(args.compare) if args.compare else None
+    print(format_results(results, baseline))
+    if args.save:
+        path = DEFAULT_BASELINE_DIR / f"{args.save}.json"
+        save_results(results, path)
+        print(f"Saved results to {path}")
+
+
+def main(argv: list[str] | None = None) -> None:
+    asyncio.run(run(build_parser().parse_args(argv)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1061 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import platform
+import subprocess
+import time
+import tracemalloc
+from contextlib import suppress
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from alt_controller_bot.bench.session import StubSession
+from alt_controller_bot.bench.updates import generate
+
+BENCH_TOKEN = "42:BENCHMARK"
+
+
+@dataclass(slots=True)
+class BenchResult:
+    name: str
+    operations: int
+    duration: float
+    ops_per_sec: float
+    p50_ms: float | None = None
+    p99_ms: float | None = None
+    errors: int = 0
+    extra: dict[str, Any] = field(default_factory=dict)
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(
+    name: str,
+    latencies: list[float],
+    duration: float,
+    errors: int,
+    **extra: Any,
+) -> BenchResult:
+    return BenchResult(
+        name=name,
+        operations=len(latencies),
+        duration=duration,
+        ops_per_sec=len(latencies) / duration if duration else 0.0,
+        p50_ms=percentile(latencies, 50) * 1000,
+        p99_ms=percentile(latencies, 99) * 1000,
+        errors=errors,
+        extra=extra,
+    )
+
+
+async def run_dispatcher(
+    count: int,
+    *,
+    rate: float = 0.0,
+    concurrency: int = 16,
+    users: int = 1000,
+    with_db: bool = False,
+    trace_alloc: bool = False,
+    api_latency: float = 0.0,
+) -> BenchResult:
+    """Feed synthetic updates through the real dispatcher with in-memory FSM storage.
+
+    With ``rate`` > 0 updates are offered on a fixed schedule (open loop); otherwise
+    ``concurrency`` workers feed them back to back (closed loop).
+    """
+    from alt_controller_bot.bot.main import create_dispatcher
+    from alt_controller_bot.services.permissions import UserPermissions
+
+    storage = MemoryStorage()
+    dp = await create_dispatcher(storage=storage)
+    session = StubSession(latency=api_latency)
+    bot = Bot(token=BENCH_TOKEN, session=session)
+
+    if not with_db:
+        # Warm the permission cache so RBAC resolution never reaches the database.
+        service = dp["permission_service"]
+        for user_id in range(10_000, 10_000 + users):
+            service.prime(UserPermissions(user_id=user_id))
+
+    updates = list(generate(count, users=users, with_db=with_db))
+    latencies: list[float] = []
+    errors = 0
+
+    async def feed(update, state: str | None) -> None:
+        nonlocal errors
+        if state is not None:
+            user_id = update.message.from_user.id
+            key = StorageKey(bot_id=bot.id, chat_id=user_id, user_id=user_id)
+            await storage.set_state(key, state)
+        started = time.perf_counter()
+        try:
+            await dp.feed_update(bot, update)
+        except Exception:
+            errors += 1
+        latencies.append(time.perf_counter() - started)
+
+    if trace_alloc:
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+
+    started = time.perf_counter()
+    if rate > 0:
+        tasks = []
+        for index, (_, update, state) in enumerate(updates):
+            delay = started + index / rate - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(feed(update, state)))
+        await asyncio.gather(*tasks)
+    else:
+        queue: asyncio.Queue = asyncio.Queue()
+        for item in updates:
+            queue.put_nowait(item)
+
+        async def worker() -> None:
+            while not queue.empty():
+                _, update, state = queue.get_nowait()
+                await feed(update, state)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    duration = time.perf_counter() - started
+
+    extra: dict[str, Any] = {"api_calls": dict(session.requests)}
+    if trace_alloc:
+        after = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        diff = after.compare_to(before, "filename")
+        extra["retained_blocks_per_update"] = sum(stat.count_diff for stat in diff) / count
+        extra["peak_alloc_kib"] = peak / 1024
+
+    await storage.close()
+    return summarize("dispatcher", latencies, duration, errors, **extra)
+
+
+async def run_repositories(count: int) -> list[BenchResult]:
+    """Time repository write paths against the configured (migrated) Postgres database."""
+    from sqlalchemy import delete
+
+    from alt_controller_bot.db import models
+    from alt_controller_bot.db.database import get_session_factory, session_scope
+    from alt_controller_bot.services.clicks import ClickAggregator
+    from alt_controller_bot.services.repositories import (
+        ChannelRepository,
+        PostRepository,
+        StatsRepository,
+    )
+
+    async with session_scope() as session:
+        channel = await ChannelRepository(session).upsert_channel(
+            tg_chat_id=-1_000_000_000_042, title="Benchmark", username=None
+        )
+        post = await PostRepository(session).create_post(
+            author_user_id=42, channels=[channel.id], text="benchmark"
+        )
+
+    results: list[BenchResult] = []
+    try:
+        latencies = []
+        started = time.perf_counter()
+        for index in range(count):
+            op_started = time.perf_counter()
+            async with session_scope() as session:
+                await StatsRepository(session).increment_click(post.id, channel.id, f"b{index % 4}")
+            latencies.append(time.perf_counter() - op_started)
+        results.append(
+            summarize("clicks_per_click", latencies, time.perf_counter() - started, 0)
+        )
+
+        aggregator = ClickAggregator(get_session_factory(), max_pending_keys=count + 1)
+        started = time.perf_counter()
+        for index in range(count):
+            aggregator.add(post.id, channel.id, f"b{index % 4}")
+        flush_started = time.perf_counter()
+        await aggregator.flush()
+        finished = time.perf_counter()
+        results.append(
+            BenchResult(
+                name="clicks_batched",
+                operations=count,
+                duration=finished - started,
+                ops_per_sec=count / (finished - started),
+                extra={"flush_ms": (finished - flush_started) * 1000},
+            )
+        )
+
+        latencies = []
+        started = time.perf_counter()
+        for _ in range(count):
+            op_started = time.perf_counter()
+            async with session_scope() as session:
+                await PostRepository(session).list_user_posts(42)
+            latencies.append(time.perf_counter() - op_started)
+        results.append(
+            summarize("list_user_posts", latencies, time.perf_counter() - started, 0)
+        )
+
+        latencies = []
+        started = time.perf_counter()
+        for _ in range(count):
+            op_started = time.perf_counter()
+            async with session_scope() as session:
+                await PostRepository(session).page_user_posts(42, ("draft",), limit=20)
+            latencies.append(time.perf_counter() - op_started)
+        results.append(
+            summarize("page_user_posts", latencies, time.perf_counter() - started, 0)
+        )
+    finally:
+        async with session_scope() as session:
+            await session.execute(delete(models.Post).where(models.Post.author_user_id == 42))
+            await session.execute(delete(models.Channel).where(models.Channel.id == channel.id))
+    return results
+
+
+async def run_export(rows: int, *, batch_size: int = 5000) -> BenchResult:
+    """Stream ``rows`` click rows from the configured Postgres as gzip-compressed CSV.
+
+    ``peak_alloc_kib`` is the peak of Python allocations while exporting; it should stay
+    flat as ``rows`` grows, since rows come through a server-side cursor.
+    """
+    import gzip
+    import tempfile
+
+    from sqlalchemy import delete, insert
+
+    from alt_controller_bot.db import models
+    from alt_controller_bot.db.database import get_session_factory, session_scope
+    from alt_controller_bot.services.export import StatsExportFilter, stream_stats_csv
+    from alt_controller_bot.services.repositories import ChannelRepository, PostRepository
+
+    async with session_scope() as session:
+        channel = await ChannelRepository(session).upsert_channel(
+            tg_chat_id=-1_000_000_000_043, title="Export benchmark", username=None
+        )
+        post = await PostRepository(session).create_post(
+            author_user_id=43, channels=[channel.id], text="benchmark"
+        )
+    try:
+        for start in range(0, rows, 10_000):
+            async with session_scope() as session:
+                await session.execute(
+                    insert(models.StatsClick),
+                    [
+                        {
+                            "post_id": post.id,
+                            "channel_id": channel.id,
+                            "button_key": f"b{index}",
+                            "clicks": index,
+                            "updated_at": datetime.now(timezone.utc),
+                        }
+                        for index in range(start, min(start + 10_000, rows))
+                    ],
+                )
+
+        csv_bytes = 0
+        with tempfile.TemporaryFile() as raw:
+            tracemalloc.start()
+            started = time.perf_counter()
+            with gzip.GzipFile(fileobj=raw, mode="wb") as fh:
+                async for chunk in stream_stats_csv(
+                    get_session_factory(),
+                    StatsExportFilter(channel_id=channel.id),
+                    batch_size=batch_size,
+                ):
+                    csv_bytes += len(chunk)
+                    fh.write(chunk)
+            duration = time.perf_counter() - started
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            gzip_bytes = raw.tell()
+    finally:
+        async with session_scope() as session:
+            await session.execute(
+                delete(models.StatsClick).where(models.StatsClick.post_id == post.id)
+            )
+            await session.execute(delete(models.Post).where(models.Post.id == post.id))
+            await session.execute(delete(models.Channel).where(models.Channel.id == channel.id))
+    return BenchResult(
+        name="export_csv_gzip",
+        operations=rows,
+        duration=duration,
+        ops_per_sec=rows / duration if duration else 0.0,
+        extra={
+            "peak_alloc_kib": peak / 1024,
+            "csv_mib": csv_bytes / 2**20,
+            "gzip_mib": gzip_bytes / 2**20,
+        },
+    )
+
+
+async def run_scheduler(pending: int, *, due: int = 200) -> BenchResult:
+    """Due-to-publish lateness with ``pending`` future posts in the configured Postgres.
+
+    ``due`` posts are scheduled one to three seconds ahead while the scheduler runs, each
+    in its own commit and without calling ``PublicationScheduler.schedule``, the way a
+    post scheduled by another process reaches it. ``refresh_ms`` is the time to reload the
+    heap with all ``pending`` posts in the table.
+    """
+    import random
+    from datetime import timedelta
+
+    from sqlalchemy import delete, insert
+
+    from alt_controller_bot.app import get_app
+    from alt_controller_bot.db import models
+    from alt_controller_bot.db.database import get_session_factory, session_scope
+    from alt_controller_bot.services.repositories import PostRepository
+    from alt_controller_bot.services.scheduler import PublicationScheduler, utcnow
+
+    author = 44
+    now = utcnow()
+    for start in range(0, pending, 10_000):
+        async with session_scope() as session:
+            await session.execute(
+                insert(models.Post),
+                [
+                    {
+                        "author_user_id": author,
+                        "channels": [],
+                        "status": "scheduled",
+                        "scheduled_at": now + timedelta(hours=1, seconds=index * 25),
+                    }
+                    for index in range(start, min(start + 10_000, pending))
+                ],
+            )
+
+    lateness: list[float] = []
+    done = asyncio.Event()
+
+    async def publish(post: models.Post) -> None:
+        if post.author_user_id != author:
+            return
+        lateness.append((utcnow() - post.scheduled_at).total_seconds())
+        if len(lateness) == due:
+            done.set()
+
+    # The process-wide bus: it is the one reading the changes committed below.
+    bus = get_app().invalidation_bus
+    scheduler = PublicationScheduler(get_session_factory(), publish)
+    scheduler.bind(bus)
+    try:
+        refresh_started = time.perf_counter()
+        await scheduler.refresh()
+        refresh_ms = (time.perf_counter() - refresh_started) * 1000
+        await scheduler.start()
+        started = time.perf_counter()
+        for _ in range(due):
+            async with session_scope() as session:
+                await PostRepository(session).create_post(
+                    author_user_id=author,
+                    channels=[],
+                    status="scheduled",
+                    scheduled_at=utcnow() + timedelta(seconds=random.uniform(1, 3)),
+                )
+        with suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(done.wait(), timeout=30)
+        duration = time.perf_counter() - started
+    finally:
+        await scheduler.stop()
+        scheduler.unbind(bus)
+        async with session_scope() as session:
+            await session.execute(delete(models.Post).where(models.Post.author_user_id == author))
+    return summarize(
+        "scheduler_due_lateness",
+        lateness,
+        duration,
+        due - len(lateness),
+        pending=pending,
+        refresh_ms=refresh_ms,
+    )
+
+
+def run_render(posts: int, fanout: int) -> list[BenchResult]:
+    """CPU per fan-out: compiling the post for every channel vs reusing the compiled version."""
+    from alt_controller_bot.db import models
+    from alt_controller_bot.services.render import PostRenderer, compile_post
+
+    samples = [
+        models.Post(
+            id=index + 1,
+            channels=list(range(1, fanout + 1)),
+            text=f"<b>Post {index}</b> " + "lorem ipsum " * 40,
+            parse_mode="HTML",
+            buttons_json={
+                "buttons": [
+                    {"text": f"Link {n}", "url": f"https://example.com/{index}/{n}"}
+                    for n in range(4)
+                ]
+            },
+            reactions_json=["👍", "👎", "🔥", "🎯", "😂"],
+        )
+        for index in range(posts)
+    ]
+
+    def measure(name: str, fan_out) -> BenchResult:
+        latencies = []
+        started = time.perf_counter()
+        cpu_started = time.process_time()
+        for post in samples:
+            op_started = time.perf_counter()
+            fan_out(post)
+            latencies.append(time.perf_counter() - op_started)
+        cpu = time.process_time() - cpu_started
+        return summarize(
+            name,
+            latencies,
+            time.perf_counter() - started,
+            0,
+            fanout=fanout,
+            cpu_us_per_fanout=cpu / len(samples) * 1e6,
+        )
+
+    def uncached(post: models.Post) -> None:
+        for channel_id in post.channels:
+            compile_post(post).keyboard(channel_id)
+
+    renderer = PostRenderer(maxsize=posts)
+    tracking = PostRenderer(maxsize=posts, link_prefix="https://example.com/r/")
+
+    def cached(post: models.Post) -> None:
+        rendered = renderer.render(post)
+        for channel_id in post.channels:
+            rendered.keyboard(channel_id)
+
+    def cached_tracked(post: models.Post) -> None:
+        rendered = tracking.render(post)
+        for channel_id in post.channels:
+            rendered.keyboard(channel_id)
+
+    return [
+        measure("render_per_channel", uncached),
+        measure("render_cached", cached),
+        measure("render_cached_tracked", cached_tracked),
+    ]
+
+
+async def run_publisher(
+    channel_counts: list[int],
+    *,
+    global_rate: float = 30.0,
+    api_latency: float = 0.0,
+) -> list[BenchResult]:
+    """One post fanned out through ``PostPublisher`` and the stub Bot API session.
+
+    ``publish_unthrottled_*`` lifts the rate limits to show the publisher's own overhead;
+    ``publish_*`` runs with ``global_rate`` and should approach it for large fan-outs.
+    """
+    from alt_controller_bot.db import models
+    from alt_controller_bot.services.channels import ChannelRegistry
+    from alt_controller_bot.services.publisher import PostPublisher
+
+    results = []
+    for count in channel_counts:
+        registry = ChannelRegistry(None)
+        registry.apply(
+            models.Channel(id=channel_id, tg_chat_id=-channel_id, title=f"Channel {channel_id}")
+            for channel_id in range(1, count + 1)
+        )
+        variants = ((f"publish_unthrottled_{count}", 1e9), (f"publish_{count}", global_rate))
+        for name, rate in variants:
+            session = StubSession(latency=api_latency)
+            publisher = PostPublisher(
+                Bot(token=BENCH_TOKEN, session=session),
+                None,
+                global_rate=rate,
+                channels=registry,
+            )
+            post = models.Post(
+                id=1,
+                channels=list(range(1, count + 1)),
+                text="<b>Post</b> " + "lorem ipsum " * 40,
+                parse_mode="HTML",
+                buttons_json={"buttons": [{"text": "Site", "url": "https://example.com"}]},
+            )
+            started = time.perf_counter()
+            sent = await publisher.publish(post)
+            duration = time.perf_counter() - started
+            results.append(
+                BenchResult(
+                    name=name,
+                    operations=len(sent),
+                    duration=duration,
+                    ops_per_sec=len(sent) / duration,
+                    errors=sum(not result.ok for result in sent),
+                    extra={"api_calls": sum(session.requests.values())},
+                )
+            )
+    return results
+
+
+async def run_callback_routing(types: int, count: int) -> list[BenchResult]:
+    """Route callback queries over ``types`` callback kinds: filter chain vs CallbackRouter."""
+    from aiogram import Dispatcher, F, Router
+    from aiogram.dispatcher.event.bases import UNHANDLED
+
+    from alt_controller_bot.bench.updates import callback
+    from alt_controller_bot.bot.callbacks import CallbackRouter
+    from alt_controller_bot.core.callbacks import CallbackType
+
+    async def handler(query) -> None:
+        return None
+
+    chain = Router(name="bench_chain")
+    keyed = CallbackRouter(name="bench_keyed")
+    callback_types = [CallbackType(f"b{index}", "id") for index in range(types)]
+    for index, callback_type in enumerate(callback_types):
+        chain.callback_query.register(handler, F.data.startswith(f"b{index}:"))
+        keyed.callback(callback_type)(handler)
+
+    bot = Bot(token=BENCH_TOKEN, session=StubSession())
+    results = []
+    for name, router in (("callbacks_filter_chain", chain), ("callbacks_keyed", keyed)):
+        dp = Dispatcher()
+        dp.include_router(router)
+        updates = [
+            callback(callback_types[index % types].pack(index))(index + 1, 10_000)
+            for index in range(count)
+        ]
+        latencies = []
+        errors = 0
+        started = time.perf_counter()
+        for update in updates:
+            op_started = time.perf_counter()
+            if await dp.feed_update(bot, update) is UNHANDLED:
+                errors += 1
+            latencies.append(time.perf_counter() - op_started)
+        results.append(
+            summarize(name, latencies, time.perf_counter() - started, errors, types=types)
+        )
+    return results
+
+
+async def run_fsm_storage(wizards: int) -> list[BenchResult]:
+    """Redis ops and bytes per draft-wizard step: aiogram's RedisStorage vs CompactRedisStorage.
+
+    Runs against fakeredis; every command sent by the storage is counted and sized.
+    """
+    import fakeredis
+    from aiogram.fsm.storage.redis import RedisStorage
+
+    from alt_controller_bot.bot.handlers.drafts import DraftContext, DraftStates
+    from alt_controller_bot.bot.storage import CompactRedisStorage
+
+    class CountingRedis(fakeredis.FakeAsyncRedis):
+        commands = 0
+        sent = 0
+
+        async def execute_command(self, *args: Any, **options: Any) -> Any:
+            self.commands += 1
+            self.sent += sum(
+                len(arg) if isinstance(arg, bytes) else len(str(arg).encode()) for arg in args
+            )
+            return await super().execute_command(*args, **options)
+
+    async def stored_bytes(redis: CountingRedis) -> int:
+        total = 0
+        async for name in redis.scan_iter():
+            if await redis.type(name) == b"hash":
+                total += sum(
+                    len(field_name) + len(value)
+                    for field_name, value in (await redis.hgetall(name)).items()
+                )
+            else:
+                total += len(await redis.get(name))
+        return total
+
+    async def wizard(storage: Any, user_id: int) -> int:
+        key = StorageKey(bot_id=1, chat_id=user_id, user_id=user_id)
+        context = DraftContext(channel_ids=[1, 2, 3])
+        await storage.set_state(key, DraftStates.pick_channels)
+        await storage.update_data(key, asdict(context))
+        steps = [
+            (DraftStates.content, "text", "<b>Draft</b> " + "lorem ipsum " * 40),
+            (DraftStates.buttons, "buttons_json", [{"text": "Site", "url": "https://e.com"}]),
+            (DraftStates.reactions, "reactions", ["👍", "🔥"]),
+            (DraftStates.preview, "post_id", user_id),
+        ]
+        # Every update reads the state, the handler reads the data and saves the context.
+        for next_state, name, value in steps:
+            await storage.get_state(key)
+            data = await storage.get_data(key)
+            data[name] = value
+            await storage.update_data(key, data)
+            await storage.set_state(key, next_state)
+        return len(steps) + 1
+
+    results = []
+    for name, factory in (
+        ("fsm_redis_storage", lambda redis: RedisStorage(redis)),
+        ("fsm_compact_storage", lambda redis: CompactRedisStorage(redis)),
+    ):
+        redis = CountingRedis()
+        storage = factory(redis)
+        latencies = []
+        steps = 0
+        started = time.perf_counter()
+        for user_id in range(1, wizards + 1):
+            op_started = time.perf_counter()
+            steps += await wizard(storage, user_id)
+            latencies.append(time.perf_counter() - op_started)
+        duration = time.perf_counter() - started
+        results.append(
+            summarize(
+                name,
+                latencies,
+                duration,
+                0,
+                redis_ops_per_step=redis.commands / steps,
+                bytes_sent_per_step=redis.sent / steps,
+                bytes_stored_per_wizard=await stored_bytes(redis) / wizards,
+            )
+        )
+        await redis.aclose()
+    return results
+
+
+async def run_redirects(
+    count: int,
+    *,
+    concurrency: int = 64,
+    url: str | None = None,
+    posts: int = 1000,
+) -> BenchResult:
+    """Load-test ``/r/{token}``.
+
+    With ``url`` (a full ``.../r/<token>`` link) requests go over HTTP to a running API;
+    otherwise the redirect router is called in-process through ASGI with a synthetic
+    link map, which measures the per-request cost of the app itself.
+    """
+    if url is not None:
+        import aiohttp
+
+        async with aiohttp.ClientSession() as http:
+
+            async def hit(_: int) -> int:
+                async with http.get(url, allow_redirects=False) as response:
+                    return response.status
+
+            started = time.perf_counter()
+            latencies, errors = await _drive(hit, count, concurrency)
+        return summarize("redirects_http", latencies, time.perf_counter() - started, errors)
+
+    from fastapi import FastAPI
+
+    from alt_controller_bot.api import links
+    from alt_controller_bot.db import models
+    from alt_controller_bot.services.clicks import ClickAggregator
+    from alt_controller_bot.services.links import LinkResolver, post_links
+
+    resolver = LinkResolver(None, maxsize=posts * 8)
+    tokens: list[str] = []
+    for post_id in range(1, posts + 1):
+        post = models.Post(
+            id=post_id,
+            channels=[1, 2],
+            buttons_json={
+                "buttons": [
+                    {"text": f"Link {n}", "url": f"https://example.com/{post_id}/{n}"}
+                    for n in range(4)
+                ]
+            },
+        )
+        tokens.extend(post_links(post))
+        resolver.add_post(post)
+    app = FastAPI()
+    app.include_router(links.router)
+    app.state.links = resolver
+    app.state.clicks = ClickAggregator(None, max_pending_keys=count + 1)
+
+    async def receive() -> dict[str, Any]:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def hit(index: int) -> int:
+        path = f"/r/{tokens[index % len(tokens)]}"
+        response_status = 0
+
+        async def send(message: dict[str, Any]) -> None:
+            nonlocal response_status
+            if message["type"] == "http.response.start":
+                response_status = message["status"]
+
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "root_path": "",
+            "query_string": b"",
+            "headers": [],
+            "client": ("127.0.0.1", 1),
+            "server": ("bench", 80),
+        }
+        await app(scope, receive, send)
+        return response_status
+
+    started = time.perf_counter()
+    latencies, errors = await _drive(hit, count, concurrency)
+    return summarize(
+        "redirects_asgi",
+        latencies,
+        time.perf_counter() - started,
+        errors,
+        clicks_pending=app.state.clicks.pending,
+    )
+
+
+async def run_bot_api_cache(
+    count: int,
+    *,
+    chats: int = 50,
+    concurrency: int = 64,
+    api_latency: float = 0.02,
+) -> list[BenchResult]:
+    """``getChatMember``/``getChatAdministrators`` bursts against a local fake Bot API, with
+    and without ``BotApiCacheMiddleware``; the fake server counts the requests it gets."""
+    from collections import Counter
+
+    from aiogram.client.telegram import TelegramAPIServer
+    from aiohttp import web
+
+    from alt_controller_bot.bot.session import BotApiCacheMiddleware, KeepAliveSession
+
+    received: Counter[str] = Counter()
+
+    async def handle(request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        received[method] += 1
+        chat_id = int((await request.post())["chat_id"])
+        await asyncio.sleep(api_latency)
+        if chat_id % 10 == 0:
+            return web.json_response(
+                {"ok": False, "error_code": 400, "description": "Bad Request: chat not found"},
+                status=400,
+            )
+        # ChatMemberOwner has kept the same required fields across Bot API versions.
+        result = {
+            "status": "creator",
+            "user": {"id": 42, "is_bot": True, "first_name": "bench"},
+            "is_anonymous": False,
+        }
+        if method == "getChatAdministrators":
+            result = [result]
+        return web.json_response({"ok": True, "result": result})
+
+    app = web.Application()
+    app.router.add_post("/bot{token}/{method}", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    api = TelegramAPIServer.from_base(f"http://127.0.0.1:{port}")
+
+    results = []
+    try:
+        for name, cached in (("bot_api_uncached", False), ("bot_api_cached", True)):
+            session = KeepAliveSession(api=api)
+            if cached:
+                session.middleware(BotApiCacheMiddleware())
+            bot = Bot(token=BENCH_TOKEN, session=session)
+            received.clear()
+
+            async def hit(index: int) -> int:
+                chat_id = -1_000_000 - index % chats
+                try:
+                    if index % 2:
+                        await bot.get_chat_administrators(chat_id)
+                    else:
+                        await bot.get_chat_member(chat_id, bot.id)
+                except TelegramBadRequest:
+                    pass
+                return True
+
+            started = time.perf_counter()
+            latencies, errors = await _drive(hit, count, concurrency, expected=True)
+            results.append(
+                summarize(
+                    name,
+                    latencies,
+                    time.perf_counter() - started,
+                    errors,
+                    api_requests=sum(received.values()),
+                )
+            )
+            await session.close()
+    finally:
+        await runner.cleanup()
+    return results
+
+
+def run_analytics(
+    channels: int, days: int, posts_per_day: int, *, batch_size: int = 50_000
+) -> list[BenchResult]:
+    """Build an engagement frame and a full report for synthetic publication data.
+
+    Mirrors a pool worker: rows arrive in ``batch_size`` batches and are converted as they
+    come. ``analytics_report`` also reports the pickled size of what crosses back to the
+    bot process, next to the frame's, and how ``/report`` chunks the text.
+    """
+    import pickle
+
+    import numpy as np
+
+    from alt_controller_bot.bot.handlers.stats import format_report
+    from alt_controller_bot.services.analytics import EngagementFrame, build_report, int_matrix
+
+    rng = np.random.default_rng(0)
+    count = channels * days * posts_per_day
+    channel_id = np.repeat(np.arange(1, channels + 1), days * posts_per_day)
+    post_id = np.arange(1, count + 1)
+    published_at = int(time.time()) - days * 86400 + rng.integers(0, days * 86400, count)
+    # Rows arrive from the database as Python tuples, so start from lists like they do.
+    publications = list(zip(channel_id.tolist(), post_id.tolist(), published_at.tolist()))
+    totals = list(
+        zip(
+            channel_id.tolist(),
+            post_id.tolist(),
+            rng.poisson(5, count).tolist(),
+            rng.poisson(20, count).tolist(),
+        )
+    )
+    offsets = {channel: 5 * 3600 for channel in range(1, channels + 1)}
+
+    def batches(rows: list, width: int) -> np.ndarray:
+        return np.concatenate(
+            [int_matrix(rows[i : i + batch_size], width) for i in range(0, len(rows), batch_size)]
+        )
+
+    started = time.perf_counter()
+    frame = EngagementFrame.from_arrays(batches(publications, 3), batches(totals, 4))
+    loaded = time.perf_counter()
+    report = build_report(frame, offsets)
+    finished = time.perf_counter()
+    chunks = format_report(report, days)
+    extra = {"rows": count, "channels": len(report.summaries)}
+    return [
+        BenchResult("analytics_load", 1, loaded - started, 1 / (loaded - started), extra=extra),
+        BenchResult(
+            "analytics_report",
+            1,
+            finished - loaded,
+            1 / (finished - loaded),
+            extra={
+                **extra,
+                "report_pickle_bytes": len(pickle.dumps(report)),
+                "frame_pickle_bytes": len(pickle.dumps(frame)),
+                "messages": len(chunks),
+                "longest_message": max(map(len, chunks)),
+            },
+        ),
+    ]
+
+
+async def run_streams(
+    count: int,
+    workers: list[int],
+    *,
+    redis_url: str,
+    users: int = 1000,
+    shards: int = 16,
+    api_latency: float = 0.0,
+) -> list[BenchResult]:
+    """Drain ``count`` updates from the sharded stream with 1..N worker processes.
+
+    The stream is filled up front under a throw-away key prefix; the clock runs from the
+    moment all workers are registered until every entry is acknowledged. Needs a real
+    Redis at ``redis_url`` since the workers are separate processes.
+    """
+    import multiprocessing
+    import uuid
+
+    from redis.asyncio import Redis
+
+    from alt_controller_bot.bot.streams import UpdateStream
+
+    payloads = [
+        update.model_dump(mode="json", exclude_none=True, by_alias=True)
+        for _, update, state in generate(count, users=users, with_db=False)
+        if state is None
+    ]
+    context = multiprocessing.get_context("spawn")
+    redis = Redis.from_url(redis_url)
+    results = []
+    try:
+        for pool_size in workers:
+            prefix = f"bench:{uuid.uuid4().hex[:8]}"
+            stream = UpdateStream(redis, prefix=prefix, shards=shards, maxlen=len(payloads) * 2)
+            await stream.ensure_groups()
+            for payload in payloads:
+                await stream.append(payload)
+
+            processes = [
+                context.Process(
+                    target=_stream_worker,
+                    args=(redis_url, prefix, shards, users, api_latency),
+                )
+                for _ in range(pool_size)
+            ]
+            for process in processes:
+                process.start()
+            while int(await redis.get(f"{prefix}:ready") or 0) < pool_size:
+                await asyncio.sleep(0.05)
+
+            started = time.perf_counter()
+            await redis.set(f"{prefix}:go", 1)
+            while int(await redis.get(f"{prefix}:done") or 0) < len(payloads):
+                await asyncio.sleep(0.01)
+            duration = time.perf_counter() - started
+
+            for process in processes:
+                process.terminate()
+            for process in processes:
+                process.join()
+            async for key in redis.scan_iter(f"{prefix}:*"):
+                await redis.delete(key)
+            results.append(
+                BenchResult(
+                    name=f"streams_{pool_size}_workers",
+                    operations=len(payloads),
+                    duration=duration,
+                    ops_per_sec=len(payloads) / duration if duration else 0.0,
+                    extra={"workers": pool_size, "shards": shards},
+                )
+            )
+    finally:
+        await redis.aclose()
+    return results
+
+
+def _stream_worker(
+    redis_url: str, prefix: str, shards: int, users: int, api_latency: float
+) -> None:
+    asyncio.run(_run_stream_worker(redis_url, prefix, shards, users, api_latency))
+
+
+async def _run_stream_worker(
+    redis_url: str, prefix: str, shards: int, users: int, api_latency: float
+) -> None:
+    import signal
+
+    from redis.asyncio import Redis
+
+    from alt_controller_bot.bot.main import create_dispatcher
+    from alt_controller_bot.bot.streams import StreamWorker, UpdateStream
+    from alt_controller_bot.services.permissions import UserPermissions
+
+    class CountingWorker(StreamWorker):
+        async def _process(self, stream: str, entries: list) -> None:
+            await super()._process(stream, entries)
+            if entries:
+                await self.redis.incrby(f"{prefix}:done", len(entries))
+
+    redis = Redis.from_url(redis_url)
+    dp = await create_dispatcher(storage=MemoryStorage())
+    service = dp["permission_service"]
+    for user_id in range(10_000, 10_000 + users):
+        service.prime(UserPermissions(user_id=user_id))
+    bot = Bot(token=BENCH_TOKEN, session=StubSession(latency=api_latency))
+    worker = CountingWorker(UpdateStream(redis, prefix=prefix, shards=shards), bot, dp)
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, worker.stop)
+
+    # Register before the start signal so the first heartbeat already splits shards evenly.
+    await redis.zadd(worker.stream.workers_key, {worker.worker_id: time.time()})
+    await redis.incr(f"{prefix}:ready")
+    while not await redis.exists(f"{prefix}:go"):
+        await asyncio.sleep(0.01)
+    try:
+        await worker.run()
+    finally:
+        await redis.aclose()
+
+
+async def _drive(
+    hit, count: int, concurrency: int, expected: Any = 302
+) -> tuple[list[float], int]:
+    """Run ``hit(index)`` ``count`` times on ``concurrency`` workers; any other result than
+    ``expected`` (an HTTP status by default) is an error."""
+    latencies: list[float] = []
+    errors = 0
+    indexes = iter(range(count))
+
+    async def worker() -> None:
+        nonlocal errors
+        for index in indexes:
+            started = time.perf_counter()
+            try:
+                if await hit(index) != expected:
+                    errors += 1
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors
+
+
+def current_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save_results(results: list[BenchResult], path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = {
+        "commit": current_commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "results": [asdict(result) for result in results],
+    }
+    path.write_text(json.dumps(payload, indent=2, ensure_ascii=False), encoding="utf-8")
+
+
+def load_results(path: Path) -> dict[str, dict[str, Any]]:
+    payload = json.loads(path.read_text(encoding="utf-8"))
+    return {result["name"]: result for result in payload["results"]}
+
+
+def format_results(
+    results: list[BenchResult],
+    baseline: dict[str, dict[str, Any]] | None = None,
+) -> str:
+    lines = [f"{'name':<20} {'ops':>8} {'ops/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}"]
+    for result in results:
+        p50 = f"{result.p50_ms:.2f}" if result.p50_ms is not None else "-"
+        p99 = f"{result.p99_ms:.2f}" if result.p99_ms is not None else "-"
+        line = (
+            f"{result.name:<20} {result.operations:>8} {result.ops_per_sec:>10.1f} "
+            f"{p50:>9} {p99:>9} {result.errors:>7}"
+        )
+        previous = (baseline or {}).get(result.name)
+        if previous and previous.get("ops_per_sec"):
+            change = (result.ops_per_sec / previous["ops_per_sec"] - 1) * 100
+            line += f"  ({change:+.1f}% ops/s vs baseline)"
+        lines.append(line)
+        for key, value in result.extra.items():
+            lines.append(f"    {key}: {value if not isinstance(value, float) else round(value, 3)}")
+    return "\n".join(lines)
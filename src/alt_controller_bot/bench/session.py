@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import asyncio
+from collections import Counter
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Any, AsyncGenerator, get_args
+
+from aiogram.client.session.base import BaseSession
+from aiogram.methods import TelegramMethod
+from aiogram.types import Chat, Message
+
+if TYPE_CHECKING:  # pragma: no cover - for type checkers only
+    from aiogram import Bot
+
+
+class StubSession(BaseSession):
+    """Bot session that answers every API call locally with a plausible result."""
+
+    def __init__(self, latency: float = 0.0):
+        super().__init__()
+        self.latency = latency
+        self.requests: Counter[str] = Counter()
+        self._message_id = 0
+
+    async def close(self) -> None:
+        pass
+
+    async def make_request(
+        self,
+        bot: "Bot",
+        method: TelegramMethod[Any],
+        timeout: int | None = None,
+    ) -> Any:
+        self.requests[type(method).__name__] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        returning = method.__returning__
+        if returning is Message or Message in get_args(returning):
+            self._message_id += 1
+            chat_id = getattr(method, "chat_id", 0)
+            return Message(
+                message_id=self._message_id,
+                date=datetime.now(timezone.utc),
+                chat=Chat(id=chat_id if isinstance(chat_id, int) else 0, type="private"),
+                text=getattr(method, "text", None),
+            )
+        return True
+
+    async def stream_content(
+        self,
+        url: str,
+        headers: dict[str, Any] | None = None,
+        timeout: int = 30,
+        chunk_size: int = 65536,
+        raise_for_status: bool = True,
+    ) -> AsyncGenerator[bytes, None]:
+        yield b""
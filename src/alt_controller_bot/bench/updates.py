@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import itertools
+import random
+from datetime import datetime, timezone
+from typing import Callable, Iterator
+
+from aiogram.types import CallbackQuery, Chat, Message, Update, User
+
+from alt_controller_bot.bot.handlers.channels import ADD_CHANNEL, CANCEL_ADD_CHANNEL
+from alt_controller_bot.bot.handlers.drafts import DRAFT_ACTION, DraftAction
+
+BOT_USER = User(id=1, is_bot=True, first_name="Bench Bot")
+
+UpdateFactory = Callable[[int, int], Update]
+
+
+def _user(user_id: int) -> User:
+    return User(id=user_id, is_bot=False, first_name="Bench")
+
+
+def _message(update_id: int, user_id: int, text: str, from_bot: bool = False) -> Message:
+    return Message(
+        message_id=update_id,
+        date=datetime.now(timezone.utc),
+        chat=Chat(id=user_id, type="private"),
+        from_user=BOT_USER if from_bot else _user(user_id),
+        text=text,
+    )
+
+
+def command(text: str) -> UpdateFactory:
+    def build(update_id: int, user_id: int) -> Update:
+        return Update(update_id=update_id, message=_message(update_id, user_id, text))
+
+    return build
+
+
+def callback(data: str) -> UpdateFactory:
+    def build(update_id: int, user_id: int) -> Update:
+        return Update(
+            update_id=update_id,
+            callback_query=CallbackQuery(
+                id=str(update_id),
+                from_user=_user(user_id),
+                chat_instance="bench",
+                data=data,
+                message=_message(update_id, user_id, "menu", from_bot=True),
+            ),
+        )
+
+    return build
+
+
+# (name, factory, weight, needs_db, fsm_state)
+SCENARIOS: list[tuple[str, UpdateFactory, int, bool, str | None]] = [
+    ("start", command("/start"), 5, False, None),
+    ("help", command("/help"), 5, False, None),
+    ("new", command("/new"), 15, False, None),
+    ("draft_content", command("<b>Пост</b> для бенчмарка"), 30, False, "DraftStates:content"),
+    ("channels", command("/channels"), 15, True, None),
+    ("ch_add", callback(ADD_CHANNEL.pack()), 10, False, None),
+    ("ch_cancel", callback(CANCEL_ADD_CHANNEL.pack()), 5, False, None),
+    ("draft_publish", callback(DRAFT_ACTION.pack(1, DraftAction.PUBLISH)), 15, False, None),
+]
+
+
+def generate(
+    count: int,
+    *,
+    users: int = 1000,
+    with_db: bool = True,
+    seed: int = 0,
+) -> Iterator[tuple[str, Update, str | None]]:
+    """Yield ``(scenario, update, fsm_state)`` triples in a reproducible weighted mix."""
+    rng = random.Random(seed)
+    scenarios = [scenario for scenario in SCENARIOS if with_db or not scenario[3]]
+    weights = [scenario[2] for scenario in scenarios]
+    update_ids = itertools.count(1)
+    for _ in range(count):
+        name, factory, _, _, state = rng.choices(scenarios, weights)[0]
+        user_id = 10_000 + rng.randrange(users)
+        yield name, factory(next(update_ids), user_id), state
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+from typing import Any, Callable
+
+from aiogram import Router
+from aiogram.dispatcher.event.handler import CallableObject
+from aiogram.types import CallbackQuery
+
+from alt_controller_bot.core.callbacks import CallbackType, callback_key
+
+
+class CallbackRouter(Router):
+    """Router that dispatches callback queries by key with a single dict lookup.
+
+    Handlers registered with :meth:`callback` receive the decoded payload as
+    ``callback_data`` plus the usual aiogram kwargs (``state``, ``db``, ...). Plain
+    ``callback_query`` handlers still work and are tried after the keyed ones.
+    """
+
+    def __init__(self, *, name: str | None = None):
+        super().__init__(name=name)
+        self._callbacks: dict[str, tuple[CallbackType, CallableObject]] = {}
+        self.callback_query.register(self._dispatch, self._match)
+
+    def callback(self, callback_type: CallbackType) -> Callable:
+        def decorator(handler: Callable) -> Callable:
+            if callback_type.key in self._callbacks:
+                raise ValueError(f"Callback {callback_type.key!r} is already registered")
+            self._callbacks[callback_type.key] = (callback_type, CallableObject(handler))
+            return handler
+
+        return decorator
+
+    def _match(self, query: CallbackQuery) -> bool | dict[str, Any]:
+        entry = self._callbacks.get(callback_key(query.data))
+        if entry is None:
+            return False
+        callback_type, handler = entry
+        try:
+            payload = callback_type.unpack(query.data)
+        except ValueError:
+            return False
+        return {"callback_handler": handler, "callback_data": payload}
+
+    @staticmethod
+    async def _dispatch(
+        query: CallbackQuery, callback_handler: CallableObject, **kwargs: Any
+    ) -> Any:
+        return await callback_handler.call(query, **kwargs)
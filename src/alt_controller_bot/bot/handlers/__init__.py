@@ -1,3 +1,22 @@
-from alt_controller_bot.bot.handlers import channels, common, drafts, stats
+"""Bot handler routers, imported on first access."""
 
-__all__ = ["channels", "common", "drafts", "stats"]
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+__all__ = ["channels", "common", "drafts", "queue", "reactions", "stats"]
+
+if TYPE_CHECKING:  # pragma: no cover - for type checkers only
+    from alt_controller_bot.bot.handlers import (
+        channels,
+        common,
+        drafts,
+        queue,
+        reactions,
+        stats,
+    )
+
+
+def __getattr__(name: str):
+    if name in __all__:
+        return import_module(f"{__name__}.{name}")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
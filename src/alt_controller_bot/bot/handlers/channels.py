@@ -1,17 +1,40 @@
 from __future__ import annotations
 
 from dataclasses import asdict, dataclass
+from html import escape
 
-from aiogram import F, Router
-from aiogram.filters import Command
+from aiogram import Bot
+from aiogram.filters import Command, CommandObject
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.fsm.context import FSMContext
-from aiogram.types import CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup, Message
-
-from alt_controller_bot.db.database import session_scope
+from aiogram.types import (
+    CallbackQuery,
+    ChatMemberUpdated,
+    InlineKeyboardButton,
+    InlineKeyboardMarkup,
+    Message,
+)
+
+from alt_controller_bot.bot.callbacks import CallbackRouter
+from alt_controller_bot.bot.handlers.common import chunk_lines
+from alt_controller_bot.bot.session import invalidate_chat
+from alt_controller_bot.core.callbacks import CallbackType
+from alt_controller_bot.db.database import LazySession
+from alt_controller_bot.services.onboarding import (
+    ChannelOnboarding,
+    OnboardingResult,
+    parse_channel_refs,
+)
 from alt_controller_bot.services.repositories import ChannelRepository
 
-router = Router()
+router = CallbackRouter(name="channels")
+
+ADD_CHANNEL = CallbackType("ch.add")
+OPEN_CHANNEL = CallbackType("ch.open", "channel_id")
+VERIFY_CHANNEL = CallbackType("ch.verify")
+CANCEL_ADD_CHANNEL = CallbackType("ch.cancel")
+ADD_CHANNELS_USAGE = "Использование: /addchannels @канал1 @канал2 -100123…"
+MAX_ONBOARDING_CHANNELS = 500
 
 
 @dataclass(slots=True)
@@ -26,26 +49,25 @@ class ChannelStates(StatesGroup):
 
 def channels_keyboard(channels: list[tuple[int, str]]) -> InlineKeyboardMarkup:
     rows: list[list[InlineKeyboardButton]] = [
-        [InlineKeyboardButton(text="➕ Добавить канал", callback_data="ch:add")]
+        [InlineKeyboardButton(text="➕ Добавить канал", callback_data=ADD_CHANNEL.pack())]
     ]
     for channel_id, title in channels:
         rows.append(
-            [InlineKeyboardButton(text=title, callback_data=f"ch:open:{channel_id}")]
+            [InlineKeyboardButton(text=title, callback_data=OPEN_CHANNEL.pack(channel_id))]
         )
     return InlineKeyboardMarkup(inline_keyboard=rows)
 
 
 @router.message(Command("channels"))
-async def cmd_channels(message: Message, state: FSMContext) -> None:
-    async with session_scope() as session:
-        repo = ChannelRepository(session)
-        channels = await repo.get_user_channels(message.from_user.id)
+async def cmd_channels(message: Message, state: FSMContext, db: LazySession) -> None:
+    repo = ChannelRepository(await db.get())
+    channels = await repo.get_user_channels(message.from_user.id)
     kb = channels_keyboard([(ch.id, ch.title) for ch in channels])
     await message.answer("Мои каналы:", reply_markup=kb)
     await state.clear()
 
 
-@router.callback_query(F.data == "ch:add")
+@router.callback(ADD_CHANNEL)
 async def on_add_channel(query: CallbackQuery, state: FSMContext) -> None:
     instructions = (
         "1) Сделайте меня админом канала с правом публикации.\n"
@@ -57,8 +79,12 @@ async def on_add_channel(query: CallbackQuery, state: FSMContext) -> None:
         instructions,
         reply_markup=InlineKeyboardMarkup(
             inline_keyboard=[
-                [InlineKeyboardButton(text="Проверить доступ", callback_data="ch:verify")],
-                [InlineKeyboardButton(text="Отмена", callback_data="ch:cancel")],
+                [
+                    InlineKeyboardButton(
+                        text="Проверить доступ", callback_data=VERIFY_CHANNEL.pack()
+                    )
+                ],
+                [InlineKeyboardButton(text="Отмена", callback_data=CANCEL_ADD_CHANNEL.pack())],
             ]
         ),
     )
@@ -79,13 +105,63 @@ async def on_channel_identifier(message: Message, state: FSMContext) -> None:
     await message.answer("Отлично! Нажмите «Проверить доступ», когда будете готовы.")
 
 
-@router.callback_query(F.data == "ch:cancel")
+@router.callback(CANCEL_ADD_CHANNEL)
 async def on_cancel(query: CallbackQuery, state: FSMContext) -> None:
     await state.clear()
     await query.message.edit_text("Добавление канала отменено.")
     await query.answer()
 
 
-@router.callback_query(F.data == "ch:verify")
-async def on_verify(query: CallbackQuery, state: FSMContext) -> None:
-    await query.answer("Пока реализован только каркас проверки.", show_alert=True)
+def format_onboarding(results: list[OnboardingResult]) -> list[str]:
+    """Report lines split into chunks that fit in one Telegram message."""
+    added = [result for result in results if result.ok]
+    lines = [f"Подключено каналов: {len(added)} из {len(results)}."]
+    lines.extend(f"✅ {escape(result.title)}" for result in added)
+    lines.extend(
+        f"❌ {escape(str(result.ref))}: {result.error}" for result in results if not result.ok
+    )
+    return chunk_lines(lines)
+
+
+@router.callback(VERIFY_CHANNEL)
+async def on_verify(
+    query: CallbackQuery, state: FSMContext, bot: Bot, onboarding: ChannelOnboarding
+) -> None:
+    data = await state.get_data()
+    context = AddChannelContext(**data) if data else AddChannelContext()
+    ref = context.forwarded_from_chat_id
+    if ref is None and context.username_or_id:
+        refs = parse_channel_refs(context.username_or_id)
+        ref = refs[0] if refs else None
+    if ref is None:
+        await query.answer("Сначала пришлите @username канала.", show_alert=True)
+        return
+
+    # "Verify" usually follows a change of rights the cache has not seen yet.
+    invalidate_chat(bot, ref)
+    [result] = await onboarding.onboard(bot, query.from_user.id, [ref])
+    if not result.ok:
+        await query.answer(result.error, show_alert=True)
+        return
+    await state.clear()
+    await query.message.edit_text(f"Канал «{escape(result.title)}» подключён.")
+    await query.answer()
+
+
+@router.my_chat_member()
+async def on_bot_membership(update: ChatMemberUpdated, bot: Bot) -> None:
+    # The bot was promoted, restricted or removed: cached answers about the chat are stale.
+    invalidate_chat(bot, update.chat.id)
+
+
+@router.message(Command("addchannels"))
+async def cmd_add_channels(
+    message: Message, command: CommandObject, bot: Bot, onboarding: ChannelOnboarding
+) -> None:
+    refs = parse_channel_refs(command.args)
+    if not refs or len(refs) > MAX_ONBOARDING_CHANNELS:
+        await message.answer(ADD_CHANNELS_USAGE)
+        return
+    results = await onboarding.onboard(bot, message.from_user.id, refs)
+    for chunk in format_onboarding(results):
+        await message.answer(chunk)
@@ -1,9 +1,13 @@
+from typing import Iterable
+
 from aiogram import Router
 from aiogram.filters import Command
 from aiogram.types import Message, ReplyKeyboardMarkup, KeyboardButton
 
 
-router = Router()
+router = Router(name="common")
+
+MAX_MESSAGE_LENGTH = 4096
 
 
 MAIN_MENU = ReplyKeyboardMarkup(
@@ -16,6 +20,16 @@ MAIN_MENU = ReplyKeyboardMarkup(
 )
 
 
+def chunk_lines(lines: Iterable[str], limit: int = MAX_MESSAGE_LENGTH) -> list[str]:
+    """Join ``lines`` into chunks that each fit in one Telegram message."""
+    chunks = [""]
+    for line in lines:
+        if chunks[-1] and len(chunks[-1]) + len(line) + 1 > limit:
+            chunks.append("")
+        chunks[-1] += line + "\n"
+    return chunks
+
+
 @router.message(Command("start"))
 async def cmd_start(message: Message) -> None:
     greeting = (
@@ -30,9 +44,13 @@ async def cmd_help(message: Message) -> None:
     text = (
         "Доступные команды:\n"
         "/channels — управление каналами\n"
+        "/addchannels — подключить несколько каналов сразу\n"
         "/new — мастер нового поста\n"
         "/queue — очередь публикаций\n"
+        "/drafts — черновики\n"
         "/stats — статистика каналов\n"
+        "/report — сводный отчёт по каналам\n"
+        "/export — экспорт статистики в CSV\n"
         "/settings — настройки профиля"
     )
     await message.answer(text)
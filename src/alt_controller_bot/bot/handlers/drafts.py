@@ -1,18 +1,31 @@
 from __future__ import annotations
 
 from dataclasses import asdict, dataclass, field
+from enum import IntEnum
+from functools import lru_cache
 from typing import List
 
-from aiogram import F, Router
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.types import CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup, Message
 
-from alt_controller_bot.db.database import session_scope
+from alt_controller_bot.bot.callbacks import CallbackRouter
+from alt_controller_bot.core.callbacks import CallbackType
+from alt_controller_bot.db.database import LazySession
 from alt_controller_bot.services.repositories import PostRepository
 
-router = Router()
+router = CallbackRouter(name="drafts")
+
+
+class DraftAction(IntEnum):
+    PUBLISH = 1
+    SCHEDULE = 2
+    QUEUE = 3
+    BACK = 4
+
+
+DRAFT_ACTION = CallbackType("draft", "post_id", "action")
 
 
 class DraftStates(StatesGroup):
@@ -33,16 +46,21 @@ class DraftContext:
     post_id: int | None = None
 
 
+@lru_cache(maxsize=1024)
 def draft_controls(post_id: int) -> InlineKeyboardMarkup:
+    """Wizard controls under the preview; markups are immutable, so one per post is shared."""
+    def button(text: str, action: DraftAction) -> InlineKeyboardButton:
+        return InlineKeyboardButton(text=text, callback_data=DRAFT_ACTION.pack(post_id, action))
+
     return InlineKeyboardMarkup(
         inline_keyboard=[
             [
-                InlineKeyboardButton(text="Опубликовать", callback_data=f"draft:{post_id}:publish"),
-                InlineKeyboardButton(text="Запланировать", callback_data=f"draft:{post_id}:schedule"),
+                button("Опубликовать", DraftAction.PUBLISH),
+                button("Запланировать", DraftAction.SCHEDULE),
             ],
             [
-                InlineKeyboardButton(text="В очередь", callback_data=f"draft:{post_id}:queue"),
-                InlineKeyboardButton(text="Редактировать", callback_data=f"draft:{post_id}:back"),
+                button("В очередь", DraftAction.QUEUE),
+                button("Редактировать", DraftAction.BACK),
             ],
         ]
     )
@@ -66,25 +84,24 @@ async def on_content(message: Message, state: FSMContext) -> None:
     await message.answer("Добавьте кнопки (пока заглушка).")
 
 
-@router.callback_query(F.data.startswith("draft:"))
+@router.callback(DRAFT_ACTION)
 async def on_draft_action(query: CallbackQuery, state: FSMContext) -> None:
     await query.answer("Функционал мастера постов ещё не завершён.", show_alert=True)
 
 
-async def persist_draft(message: Message, state: FSMContext) -> None:
+async def persist_draft(message: Message, state: FSMContext, db: LazySession) -> None:
     data = await state.get_data()
     context = DraftContext(**data)
     if context.post_id:
         return
-    async with session_scope() as session:
-        repo = PostRepository(session)
-        post = await repo.create_post(
-            author_user_id=message.from_user.id,
-            channels=context.channel_ids,
-            text=context.text,
-            media_json=context.media_json,
-            buttons_json={"buttons": context.buttons_json},
-            reactions_json=context.reactions,
-        )
+    repo = PostRepository(await db.get())
+    post = await repo.create_post(
+        author_user_id=message.from_user.id,
+        channels=context.channel_ids,
+        text=context.text,
+        media_json=context.media_json,
+        buttons_json={"buttons": context.buttons_json},
+        reactions_json=context.reactions,
+    )
     context.post_id = post.id
     await state.update_data(**asdict(context))
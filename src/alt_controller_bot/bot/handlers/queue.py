@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from enum import IntEnum
+from html import escape
+
+from aiogram.filters import Command
+from aiogram.types import CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup, Message
+
+from alt_controller_bot.bot.callbacks import CallbackRouter
+from alt_controller_bot.core.callbacks import CallbackType
+from alt_controller_bot.db.database import LazySession
+from alt_controller_bot.services.repositories import (
+    DUE_STATUSES,
+    PostCursor,
+    PostPage,
+    PostRepository,
+)
+
+router = CallbackRouter(name="queue")
+
+PAGE_SIZE = 10
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+class Listing(IntEnum):
+    QUEUE = 1
+    DRAFTS = 2
+
+
+LISTINGS = {
+    Listing.QUEUE: ("Очередь публикаций", DUE_STATUSES, "Очередь пуста."),
+    Listing.DRAFTS: ("Черновики", ("draft",), "Черновиков нет."),
+}
+# The cursor travels in callback_data as microseconds since the epoch plus the post id.
+NEXT_PAGE = CallbackType("posts.next", "listing", "created_us", "post_id")
+
+
+def pack_cursor(listing: Listing, cursor: PostCursor) -> str:
+    created_at, post_id = cursor
+    created_us = (created_at - EPOCH) // datetime.resolution
+    return NEXT_PAGE.pack(listing, created_us, post_id)
+
+
+def render_page(listing: Listing, page: PostPage) -> tuple[str, InlineKeyboardMarkup | None]:
+    title, _, empty = LISTINGS[listing]
+    if not page.items:
+        return empty, None
+    lines = [f"<b>{title}</b>"]
+    for item in page.items:
+        when = item.scheduled_at or item.created_at
+        preview = escape(item.preview or "без текста")
+        lines.append(f"#{item.id} · {when:%d.%m %H:%M} · {preview}")
+    markup = None
+    if page.next_cursor is not None:
+        markup = InlineKeyboardMarkup(
+            inline_keyboard=[
+                [
+                    InlineKeyboardButton(
+                        text="Дальше →", callback_data=pack_cursor(listing, page.next_cursor)
+                    )
+                ]
+            ]
+        )
+    return "\n".join(lines), markup
+
+
+async def load_page(
+    db: LazySession, user_id: int, listing: Listing, after: PostCursor | None = None
+) -> PostPage:
+    _, statuses, _ = LISTINGS[listing]
+    repo = PostRepository(await db.get())
+    return await repo.page_user_posts(user_id, statuses, after=after, limit=PAGE_SIZE)
+
+
+@router.message(Command("queue"))
+async def cmd_queue(message: Message, db: LazySession) -> None:
+    page = await load_page(db, message.from_user.id, Listing.QUEUE)
+    text, markup = render_page(Listing.QUEUE, page)
+    await message.answer(text, reply_markup=markup)
+
+
+@router.message(Command("drafts"))
+async def cmd_drafts(message: Message, db: LazySession) -> None:
+    page = await load_page(db, message.from_user.id, Listing.DRAFTS)
+    text, markup = render_page(Listing.DRAFTS, page)
+    await message.answer(text, reply_markup=markup)
+
+
+@router.callback(NEXT_PAGE)
+async def on_next_page(query: CallbackQuery, callback_data: tuple, db: LazySession) -> None:
+    try:
+        listing = Listing(callback_data.listing)
+    except ValueError:
+        await query.answer()
+        return
+    after = (EPOCH + callback_data.created_us * datetime.resolution, callback_data.post_id)
+    page = await load_page(db, query.from_user.id, listing, after)
+    text, markup = render_page(listing, page)
+    await query.message.edit_text(text, reply_markup=markup)
+    await query.answer()
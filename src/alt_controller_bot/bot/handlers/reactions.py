@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from aiogram import Router
+from aiogram.types import (
+    MessageReactionCountUpdated,
+    ReactionTypeCustomEmoji,
+    ReactionTypeEmoji,
+)
+
+from alt_controller_bot.services.reactions import ReactionCountIngestor
+
+router = Router(name="reactions")
+
+
+def reaction_key(reaction: object) -> str:
+    """Value stored in ``stats_reactions.emoji`` for a Bot API reaction type."""
+    if isinstance(reaction, ReactionTypeEmoji):
+        return reaction.emoji
+    if isinstance(reaction, ReactionTypeCustomEmoji):
+        return f"custom:{reaction.custom_emoji_id}"
+    return getattr(reaction, "type", "unknown")
+
+
+@router.message_reaction_count()
+async def on_reaction_count(
+    update: MessageReactionCountUpdated,
+    reaction_counts: ReactionCountIngestor,
+) -> None:
+    reaction_counts.add(
+        update.chat.id,
+        update.message_id,
+        {reaction_key(reaction.type): reaction.total_count for reaction in update.reactions},
+    )
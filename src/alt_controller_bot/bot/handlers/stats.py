@@ -1,10 +1,196 @@
+import gzip
+import tempfile
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from urllib.parse import urlencode
+
 from aiogram import Router
-from aiogram.filters import Command
-from aiogram.types import Message
+from aiogram.filters import Command, CommandObject
+from aiogram.types import FSInputFile, Message
+from dateutil.parser import isoparse
+
+from alt_controller_bot.bot.handlers.common import chunk_lines
+from alt_controller_bot.core.config import get_settings
+from alt_controller_bot.db.database import LazySession, get_session_factory
+from alt_controller_bot.services.analytics import (
+    AnalyticsReport,
+    AnalyticsService,
+    engagement_trend,
+)
+from alt_controller_bot.services.channels import ChannelRegistry
+from alt_controller_bot.services.export import StatsExportFilter, stream_stats_csv
+from alt_controller_bot.services.permissions import UserPermissions
+from alt_controller_bot.services.rbac import Role
+from alt_controller_bot.services.repositories import RollupRepository
+
+router = Router(name="stats")
 
-router = Router()
+STATS_USAGE = "Использование: /stats <id канала>"
+STATS_DAYS = 7
+REPORT_USAGE = "Использование: /report [дней, по умолчанию 30]"
+REPORT_DAYS = 30
+REPORT_MAX_DAYS = 366
+EXPORT_USAGE = "Использование: /export <id канала> [с YYYY-MM-DD] [по YYYY-MM-DD]"
 
 
 @router.message(Command("stats"))
-async def cmd_stats(message: Message) -> None:
-    await message.answer("Статистика скоро появится. Используйте /queue для просмотра очереди.")
+async def cmd_stats(
+    message: Message,
+    command: CommandObject,
+    permissions: UserPermissions,
+    db: LazySession,
+) -> None:
+    try:
+        channel_id = int((command.args or "").strip())
+    except ValueError:
+        await message.answer(STATS_USAGE)
+        return
+    if not permissions.can(channel_id, Role.ANALYST):
+        await message.answer("Нет доступа к статистике этого канала.")
+        return
+
+    until = datetime.now(timezone.utc)
+    since = (until - timedelta(days=STATS_DAYS - 1)).replace(
+        hour=0, minute=0, second=0, microsecond=0
+    )
+    series = await RollupRepository(await db.get()).channel_series(channel_id, since, until, "day")
+
+    if not series:
+        await message.answer(f"За последние {STATS_DAYS} дн. данных нет.")
+        return
+    lines = [f"Статистика за {STATS_DAYS} дн. (клики / реакции):"]
+    lines.extend(
+        f"{bucket:%d.%m}: {clicks} / {reactions}" for bucket, clicks, reactions in series
+    )
+    await message.answer("\n".join(lines))
+
+
+def format_report(report: AnalyticsReport, days: int) -> list[str]:
+    """Report lines split into chunks that fit in one Telegram message."""
+    monthly = report.monthly
+    trends = engagement_trend(monthly)
+    lines = [
+        f"Отчёт за {days} дн. (посты · клики/пост · реакции/пост · лучшие часы · "
+        "вовлечённость к прошлому месяцу):"
+    ]
+    for summary in sorted(report.summaries, key=lambda item: item.ctr, reverse=True):
+        hours = ", ".join(f"{stat.hour:02d}:00" for stat in report.best_hours[summary.channel_id])
+        trend = trends.get(summary.channel_id)
+        lines.append(
+            f"{summary.channel_id}: {summary.posts} · {summary.ctr:.2f} · "
+            f"{summary.reactions_per_post:.2f} · {hours or '—'} · "
+            f"{'—' if trend is None else format(trend, '+.0%')}"
+        )
+    if len(monthly.months) > 1:
+        lines.append("")
+        lines.append("По месяцам, все каналы (посты · клики/пост · реакции/пост):")
+        for month, posts, clicks, reactions in zip(
+            monthly.months,
+            monthly.posts.sum(axis=0).tolist(),
+            monthly.clicks.sum(axis=0).tolist(),
+            monthly.reactions.sum(axis=0).tolist(),
+        ):
+            if posts:
+                lines.append(f"{month}: {posts} · {clicks / posts:.2f} · {reactions / posts:.2f}")
+    return chunk_lines(lines)
+
+
+@router.message(Command("report"))
+async def cmd_report(
+    message: Message,
+    command: CommandObject,
+    permissions: UserPermissions,
+    analytics: AnalyticsService,
+    channel_registry: ChannelRegistry,
+) -> None:
+    try:
+        days = int((command.args or "").strip() or REPORT_DAYS)
+    except ValueError:
+        await message.answer(REPORT_USAGE)
+        return
+    if not 1 <= days <= REPORT_MAX_DAYS:
+        await message.answer(REPORT_USAGE)
+        return
+    channel_ids = permissions.channels(Role.ANALYST, channel_registry.ids())
+    if not channel_ids:
+        await message.answer("Нет каналов с доступом к статистике.")
+        return
+
+    until = datetime.now(timezone.utc)
+    report = await analytics.report(channel_ids, until - timedelta(days=days), until)
+    if not report.summaries:
+        await message.answer(f"За последние {days} дн. публикаций нет.")
+        return
+    for chunk in format_report(report, days):
+        await message.answer(chunk)
+
+
+def parse_export_args(args: str | None) -> StatsExportFilter | None:
+    parts = (args or "").split()
+    if not 1 <= len(parts) <= 3:
+        return None
+    try:
+        channel_id = int(parts[0])
+        since = isoparse(parts[1]) if len(parts) > 1 else None
+        until = isoparse(parts[2]) if len(parts) > 2 else None
+    except ValueError:
+        return None
+    return StatsExportFilter(channel_id=channel_id, since=since, until=until)
+
+
+async def spool_export(path: Path, filters: StatsExportFilter, limit: int) -> bool:
+    """Write the export gzip-compressed to ``path``; False as soon as it exceeds ``limit`` bytes."""
+    chunks = stream_stats_csv(
+        get_session_factory(), filters, batch_size=get_settings().export_batch_size
+    )
+    with path.open("wb") as raw, gzip.GzipFile(filename=path.stem, fileobj=raw, mode="wb") as fh:
+        async for chunk in chunks:
+            fh.write(chunk)
+            if raw.tell() > limit:
+                await chunks.aclose()
+                return False
+    return path.stat().st_size <= limit
+
+
+def export_url(filters: StatsExportFilter) -> str | None:
+    """Link to the streamed ``/stats/export.csv`` API route, if the API is reachable."""
+    settings = get_settings()
+    if settings.link_base_url is None or not settings.api_token:
+        return None
+    query = {"channel_id": filters.channel_id}
+    if filters.since is not None:
+        query["since"] = filters.since.isoformat()
+    if filters.until is not None:
+        query["until"] = filters.until.isoformat()
+    return f"{str(settings.link_base_url).rstrip('/')}/stats/export.csv?{urlencode(query)}"
+
+
+@router.message(Command("export"))
+async def cmd_export(
+    message: Message,
+    command: CommandObject,
+    permissions: UserPermissions,
+) -> None:
+    filters = parse_export_args(command.args)
+    if filters is None:
+        await message.answer(EXPORT_USAGE)
+        return
+    if not permissions.can(filters.channel_id, Role.ANALYST):
+        await message.answer("Нет доступа к статистике этого канала.")
+        return
+
+    # Spool to disk so the upload is streamed from a file instead of held in memory.
+    limit = get_settings().export_max_upload_bytes
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / f"stats_{filters.channel_id}.csv.gz"
+        if await spool_export(path, filters, limit):
+            await message.answer_document(FSInputFile(path), caption="Экспорт статистики")
+            return
+
+    text = f"Экспорт больше {limit // (1024 * 1024)} МБ даже в сжатом виде и не пройдёт в Telegram."
+    url = export_url(filters)
+    if url is None:
+        text += " Сократите период выгрузки."
+    else:
+        text += f" Скачайте его из API с заголовком Authorization: Bearer <API_TOKEN>:\n{url}"
+    await message.answer(text)
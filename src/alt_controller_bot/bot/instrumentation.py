@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import time
+from typing import TYPE_CHECKING, Any
+
+from aiohttp import web
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.methods import Response, TelegramMethod
+
+from alt_controller_bot.core.metrics import BOT_API_ERRORS, BOT_API_LATENCY, registry
+
+if TYPE_CHECKING:  # pragma: no cover - for type checkers only
+    from aiogram import Bot
+
+
+class BotApiMetricsMiddleware(BaseRequestMiddleware):
+    """Bot session middleware recording latency and failures of outgoing API calls."""
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[Any],
+        bot: "Bot",
+        method: TelegramMethod[Any],
+    ) -> Response[Any]:
+        api_method = getattr(method, "__api_method__", type(method).__name__)
+        started = time.perf_counter()
+        try:
+            return await make_request(bot, method)
+        except Exception as exc:
+            BOT_API_ERRORS.inc(api_method, type(exc).__name__)
+            raise
+        finally:
+            BOT_API_LATENCY.observe(time.perf_counter() - started, api_method)
+
+
+async def start_metrics_server(host: str, port: int) -> web.AppRunner:
+    """Serve ``/metrics`` from the bot process, which has no FastAPI app of its own."""
+
+    async def metrics(_: web.Request) -> web.Response:
+        return web.Response(
+            text=registry.render(),
+            content_type="text/plain",
+            charset="utf-8",
+            headers={"X-Content-Type-Options": "nosniff"},
+        )
+
+    app = web.Application()
+    app.router.add_get("/metrics", metrics)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
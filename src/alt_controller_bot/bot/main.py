@@ -1,45 +1,270 @@
 import asyncio
 from contextlib import suppress
+from datetime import timedelta
 
 from aiogram import Bot, Dispatcher
 from aiogram.enums import ParseMode
-from aiogram.fsm.storage.redis import RedisStorage
+from aiogram.fsm.storage.base import BaseStorage
 from aiogram.client.default import DefaultBotProperties
 from redis.asyncio import Redis
 
+from alt_controller_bot.app import get_app
+from alt_controller_bot.bot.instrumentation import BotApiMetricsMiddleware, start_metrics_server
+from alt_controller_bot.bot.middlewares import DbSessionMiddleware, PermissionsMiddleware
 from alt_controller_bot.bot.routers import register_routers
-from alt_controller_bot.core.config import settings
+from alt_controller_bot.bot.session import BotApiCacheMiddleware, KeepAliveSession
+from alt_controller_bot.bot.storage import CompactRedisStorage
+from alt_controller_bot.bot.streams import UpdateStream, ingest_updates
+from alt_controller_bot.core.config import get_settings
+from alt_controller_bot.services.analytics import AnalyticsService
+from alt_controller_bot.services.audit import AuditPartitionMaintainer, AuditSink
+from alt_controller_bot.services.channels import ChannelRegistry
+from alt_controller_bot.services.edits import EditPropagator
+from alt_controller_bot.services.media import MediaCache
+from alt_controller_bot.services.onboarding import ChannelOnboarding
+from alt_controller_bot.services.permissions import PermissionService
+from alt_controller_bot.services.publisher import PostPublisher
+from alt_controller_bot.services.reactions import MessageIndex, ReactionCountIngestor
+from alt_controller_bot.services.render import PostRenderer
+from alt_controller_bot.services.rollups import RollupCompactor
+from alt_controller_bot.services.scheduler import PublicationScheduler
 
 
 async def create_bot() -> Bot:
+    settings = get_settings()
+    session = KeepAliveSession(
+        limit=settings.bot_api_pool_size, keepalive_timeout=settings.bot_api_keepalive
+    )
+    # Registered first so cache hits are not recorded as API latency.
+    session.middleware(BotApiCacheMiddleware(maxsize=settings.bot_api_cache_size))
+    session.middleware(BotApiMetricsMiddleware())
     return Bot(
         token=settings.bot_token,
+        session=session,
         default=DefaultBotProperties(parse_mode=ParseMode.HTML),
     )
 
 
-async def create_dispatcher() -> Dispatcher:
-    redis = Redis.from_url(str(settings.redis_url))
-    storage = RedisStorage(redis=redis)
+async def create_dispatcher(
+    redis: Redis | None = None,
+    storage: BaseStorage | None = None,
+) -> Dispatcher:
+    settings = get_settings()
+    app = get_app()
+    session_factory = app.session_factory
+    if storage is None:
+        storage = CompactRedisStorage(
+            redis or app.redis,
+            ttl=settings.fsm_ttl,
+            l1_size=settings.fsm_l1_size,
+            l1_ttl=settings.fsm_l1_ttl,
+        )
     dp = Dispatcher(storage=storage)
     register_routers(dp)
+
+    # Announces posts, roles and channels changed here to the caches of every other process.
+    invalidation = app.invalidation_bus
+    dp["invalidation_bus"] = invalidation
+    dp.startup.register(invalidation.start)
+
+    dp.update.outer_middleware(DbSessionMiddleware(session_factory))
+
+    permissions = PermissionService(
+        session_factory,
+        owner_ids=settings.owner_ids,
+        maxsize=settings.rbac_cache_size,
+        ttl=settings.rbac_cache_ttl,
+    )
+    permissions.bind(invalidation)
+    dp["permission_service"] = permissions
+    dp.update.outer_middleware(PermissionsMiddleware(permissions))
+
+    channels = ChannelRegistry(session_factory, defaults=settings.channel_defaults)
+    # Bound before startup loads the channels, so changes committed meanwhile are reloaded.
+    channels.bind(invalidation)
+    dp["channel_registry"] = channels
+    dp.startup.register(channels.start)
+    dp.shutdown.register(channels.stop)
+
+    audit = AuditSink(
+        session_factory,
+        maxsize=settings.audit_queue_size,
+        batch_size=settings.audit_batch_size,
+        flush_interval=settings.audit_flush_interval,
+        spill_path=settings.audit_spill_path,
+    )
+    dp["audit"] = audit
+    dp.startup.register(audit.start)
+    dp.shutdown.register(audit.stop)
+
+    dp["onboarding"] = ChannelOnboarding(
+        session_factory, concurrency=settings.onboarding_concurrency, audit=audit
+    )
+
+    renderer = PostRenderer(maxsize=settings.render_cache_size, link_prefix=settings.link_prefix)
+    renderer.bind(invalidation)
+    dp["renderer"] = renderer
+
+    message_index = MessageIndex(session_factory, maxsize=settings.message_index_size)
+    reaction_counts = ReactionCountIngestor(
+        session_factory,
+        message_index,
+        flush_interval=settings.reaction_flush_interval,
+        max_pending=settings.reaction_flush_max_pending,
+    )
+    dp["message_index"] = message_index
+    dp["reaction_counts"] = reaction_counts
+    dp.startup.register(reaction_counts.start)
+    dp.shutdown.register(reaction_counts.stop)
+
+    analytics = AnalyticsService(
+        max_workers=settings.analytics_workers, batch_size=settings.analytics_batch_size
+    )
+    dp["analytics"] = analytics
+    dp.startup.register(analytics.start)
+    dp.shutdown.register(analytics.stop)
+
     return dp
 
 
+def create_update_stream(redis: Redis | None = None) -> UpdateStream:
+    settings = get_settings()
+    return UpdateStream(
+        redis or get_app().redis,
+        prefix=settings.update_stream_prefix,
+        shards=settings.update_stream_shards,
+        maxlen=settings.update_stream_maxlen,
+    )
+
+
+def setup_background_services(dp: Dispatcher, bot: Bot) -> None:
+    settings = get_settings()
+    session_factory = get_app().session_factory
+    media = MediaCache(
+        session_factory,
+        maxsize=settings.media_cache_size,
+        max_entries=settings.media_cache_max_entries,
+        prune_interval=settings.media_cache_prune_interval,
+    )
+    dp["media_cache"] = media
+    dp.startup.register(media.start)
+    dp.shutdown.register(media.stop)
+    publisher = PostPublisher(
+        bot,
+        session_factory,
+        global_rate=settings.publish_global_rate,
+        chat_rate=settings.publish_chat_rate,
+        media=media,
+        renderer=dp["renderer"],
+        messages=dp["message_index"],
+        channels=dp["channel_registry"],
+    )
+    scheduler = PublicationScheduler(
+        session_factory,
+        publisher.publish,
+        batch_size=settings.scheduler_batch_size,
+        refresh_interval=settings.scheduler_refresh_interval,
+        lookahead=settings.scheduler_lookahead,
+        lease=settings.scheduler_lease,
+        max_attempts=settings.scheduler_max_attempts,
+        retry_delay=settings.scheduler_retry_delay,
+        max_retry_delay=settings.scheduler_max_retry_delay,
+        audit=dp["audit"],
+    )
+    scheduler.bind(dp["invalidation_bus"])
+    dp["publisher"] = publisher
+    dp["scheduler"] = scheduler
+    dp.startup.register(scheduler.start)
+    dp.shutdown.register(scheduler.stop)
+
+    edits = EditPropagator(
+        bot,
+        session_factory,
+        publisher,
+        debounce=settings.edit_debounce,
+        max_delay=settings.edit_max_delay,
+        concurrency=settings.edit_concurrency,
+    )
+    edits.bind(dp["invalidation_bus"])
+    dp["edits"] = edits
+    dp.startup.register(edits.start)
+    dp.shutdown.register(edits.stop)
+
+    compactor = RollupCompactor(
+        session_factory,
+        retention=timedelta(days=settings.stats_hourly_retention_days),
+        interval=settings.stats_compaction_interval,
+    )
+    dp.startup.register(compactor.start)
+    dp.shutdown.register(compactor.stop)
+
+    audit_partitions = AuditPartitionMaintainer(
+        session_factory,
+        retention_months=settings.audit_retention_months,
+    )
+    dp.startup.register(audit_partitions.start)
+    dp.shutdown.register(audit_partitions.stop)
+
+
+async def run_webhook_mode(bot: Bot, dp: Dispatcher) -> None:
+    """Register the webhook and keep background services running.
+
+    Updates themselves are received by the API app (``alt_controller_bot.api.main``).
+    """
+    settings = get_settings()
+    await bot.set_webhook(
+        str(settings.webhook_url),
+        secret_token=settings.webhook_secret_token,
+        allowed_updates=dp.resolve_used_update_types(),
+    )
+    workflow_data = {"dispatcher": dp, "bots": [bot], **dp.workflow_data}
+    await dp.emit_startup(bot=bot, **workflow_data)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await dp.emit_shutdown(bot=bot, **workflow_data)
+
+
+async def run_stream_ingest(bot: Bot, dp: Dispatcher) -> None:
+    """Poll Telegram into the update stream; ``alt_controller_bot.bot.workers`` handles it."""
+    workflow_data = {"dispatcher": dp, "bots": [bot], **dp.workflow_data}
+    await dp.emit_startup(bot=bot, **workflow_data)
+    try:
+        await ingest_updates(
+            bot, create_update_stream(), allowed_updates=dp.resolve_used_update_types()
+        )
+    finally:
+        await dp.emit_shutdown(bot=bot, **workflow_data)
+
+
 async def main() -> None:
+    settings = get_settings()
     bot = await create_bot()
     dp = await create_dispatcher()
+    setup_background_services(dp, bot)
 
-    if settings.webhook_url:
-        await bot.set_webhook(settings.webhook_url)
-        await dp.start_polling(bot)
-        return
+    metrics_runner = None
+    if settings.metrics_port:
+        metrics_runner = await start_metrics_server(settings.metrics_host, settings.metrics_port)
 
     try:
+        if settings.webhook_url:
+            await run_webhook_mode(bot, dp)
+            return
+
+        if settings.update_stream_shards:
+            # Updates still queued at Telegram belong in the stream like any other; the
+            # workers may have been waiting for exactly these.
+            await bot.delete_webhook(drop_pending_updates=False)
+            await run_stream_ingest(bot, dp)
+            return
         await bot.delete_webhook(drop_pending_updates=True)
         await dp.start_polling(bot, allowed_updates=dp.resolve_used_update_types())
     finally:
         await bot.session.close()
+        if metrics_runner is not None:
+            await metrics_runner.cleanup()
+        await get_app().aclose()
 
 
 if __name__ == "__main__":
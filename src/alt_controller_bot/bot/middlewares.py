@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import time
+from typing import Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, User
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from alt_controller_bot.core.metrics import HANDLER_ERRORS, HANDLER_LATENCY, UPDATE_LATENCY
+from alt_controller_bot.db.database import LazySession
+from alt_controller_bot.services.permissions import PermissionService
+
+Handler = Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]]
+
+
+class DbSessionMiddleware(BaseMiddleware):
+    """Provides a ``LazySession`` as the ``db`` handler argument.
+
+    At most one session is opened per update and only if something asks for it; it is
+    committed when the handler succeeds and rolled back otherwise.
+    """
+
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession]):
+        self.session_factory = session_factory
+
+    async def __call__(self, handler: Handler, event: TelegramObject, data: dict[str, Any]) -> Any:
+        db = LazySession(self.session_factory)
+        data["db"] = db
+        try:
+            result = await handler(event, data)
+        except BaseException:
+            await db.close(commit=False)
+            raise
+        await db.close(commit=True)
+        return result
+
+
+class PermissionsMiddleware(BaseMiddleware):
+    """Injects the sender's resolved ``UserPermissions`` as the ``permissions`` handler argument."""
+
+    def __init__(self, service: PermissionService):
+        self.service = service
+
+    async def __call__(self, handler: Handler, event: TelegramObject, data: dict[str, Any]) -> Any:
+        user: User | None = data.get("event_from_user")
+        if user is not None:
+            data["permissions"] = await self.service.resolve(user.id, data.get("db"))
+        return await handler(event, data)
+
+
+class UpdateMetricsMiddleware(BaseMiddleware):
+    """Outer update middleware: total processing time per update type."""
+
+    async def __call__(self, handler: Handler, event: TelegramObject, data: dict[str, Any]) -> Any:
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            UPDATE_LATENCY.observe(
+                time.perf_counter() - started, getattr(event, "event_type", "unknown")
+            )
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """Inner middleware: latency and errors per router and matched handler."""
+
+    def __init__(self, router_name: str):
+        self.router_name = router_name
+
+    async def __call__(self, handler: Handler, event: TelegramObject, data: dict[str, Any]) -> Any:
+        # CallbackRouter resolves the real handler in its filter and passes it along.
+        handler_object = data.get("callback_handler") or data.get("handler")
+        callback = getattr(handler_object, "callback", None)
+        handler_name = getattr(callback, "__name__", "unknown")
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            HANDLER_ERRORS.inc(self.router_name, handler_name)
+            raise
+        finally:
+            HANDLER_LATENCY.observe(time.perf_counter() - started, self.router_name, handler_name)
@@ -1,10 +1,19 @@
-from aiogram import Dispatcher
+from aiogram import Dispatcher, Router
 
-from alt_controller_bot.bot.handlers import channels, common, drafts, stats
+from alt_controller_bot.bot.middlewares import HandlerMetricsMiddleware, UpdateMetricsMiddleware
+
+
+def instrument_router(router: Router) -> None:
+    middleware = HandlerMetricsMiddleware(router.name)
+    for name, observer in router.observers.items():
+        if name != "error":
+            observer.middleware(middleware)
 
 
 def register_routers(dp: Dispatcher) -> None:
-    dp.include_router(common.router)
-    dp.include_router(channels.router)
-    dp.include_router(drafts.router)
-    dp.include_router(stats.router)
+    from alt_controller_bot.app import get_app
+
+    dp.update.outer_middleware(UpdateMetricsMiddleware())
+    for router in get_app().routers:
+        instrument_router(router)
+        dp.include_router(router)
@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Mapping
+
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import (
+    TelegramAPIError,
+    TelegramBadRequest,
+    TelegramForbiddenError,
+    TelegramNotFound,
+)
+from aiogram.methods import Response, TelegramMethod
+
+from alt_controller_bot.core.metrics import BOT_API_CACHE
+
+if TYPE_CHECKING:  # pragma: no cover - for type checkers only
+    from aiogram import Bot
+
+# Read-only methods worth caching and how long their results stay fresh, in seconds.
+# Membership answers are kept short so "make the bot an admin, then verify" works quickly.
+CACHE_TTLS: Mapping[str, float] = {
+    "getMe": 3600.0,
+    "getChat": 60.0,
+    "getChatAdministrators": 30.0,
+    "getChatMemberCount": 60.0,
+    "getChatMember": 10.0,
+}
+# "chat not found" / "bot was kicked" style failures are cached for this long.
+NEGATIVE_TTL = 5.0
+NEGATIVE_ERRORS = (TelegramBadRequest, TelegramForbiddenError, TelegramNotFound)
+
+
+def replay_error(error: TelegramAPIError) -> TelegramAPIError:
+    """A fresh copy of a cached failure.
+
+    Raising the cached instance itself would chain every hit's frames onto its traceback.
+    """
+    return type(error)(method=error.method, message=error.message)
+
+
+class KeepAliveSession(AiohttpSession):
+    """``AiohttpSession`` whose connection pool keeps idle connections open longer.
+
+    aiohttp closes idle keep-alive connections after 15 s by default, so sparse traffic
+    pays a fresh TLS handshake to api.telegram.org on most calls.
+    """
+
+    def __init__(self, *, keepalive_timeout: float = 60.0, **kwargs: Any):
+        super().__init__(**kwargs)
+        self._connector_init["keepalive_timeout"] = keepalive_timeout
+
+
+class BotApiCacheMiddleware(BaseRequestMiddleware):
+    """Caches read-only Bot API calls and collapses concurrent identical ones.
+
+    A request for a method in ``ttls`` is keyed by bot, method and parameters. Callers
+    arriving while the same request is in flight await that one call (singleflight);
+    the call runs in its own task so a cancelled caller does not fail the others.
+    Results are kept for the method's TTL and ``NEGATIVE_ERRORS`` for ``negative_ttl``.
+    """
+
+    def __init__(
+        self,
+        ttls: Mapping[str, float] = CACHE_TTLS,
+        *,
+        negative_ttl: float = NEGATIVE_TTL,
+        maxsize: int = 10_000,
+    ):
+        self.ttls = dict(ttls)
+        self.negative_ttl = negative_ttl
+        self.maxsize = maxsize
+        self._cache: OrderedDict[tuple, tuple[float, Any, BaseException | None]] = OrderedDict()
+        self._inflight: dict[tuple, asyncio.Task[Any]] = {}
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[Any],
+        bot: "Bot",
+        method: TelegramMethod[Any],
+    ) -> Response[Any]:
+        api_method = getattr(method, "__api_method__", None)
+        ttl = self.ttls.get(api_method)
+        if ttl is None:
+            return await make_request(bot, method)
+
+        key = (bot.id, api_method, method.model_dump_json(exclude_none=True))
+        cached = self._cache.get(key)
+        if cached is not None:
+            expires, result, error = cached
+            if expires > time.monotonic():
+                self._cache.move_to_end(key)
+                BOT_API_CACHE.inc(api_method, "hit")
+                if error is not None:
+                    raise replay_error(error)
+                return result
+            del self._cache[key]
+
+        task = self._inflight.get(key)
+        if task is None:
+            BOT_API_CACHE.inc(api_method, "miss")
+            task = asyncio.ensure_future(make_request(bot, method))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._store(key, ttl, done))
+        else:
+            BOT_API_CACHE.inc(api_method, "shared")
+        return await asyncio.shield(task)
+
+    def _store(self, key: tuple, ttl: float, task: asyncio.Task[Any]) -> None:
+        self._inflight.pop(key, None)
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is None:
+            self._cache[key] = (time.monotonic() + ttl, task.result(), None)
+        elif isinstance(error, NEGATIVE_ERRORS):
+            self._cache[key] = (time.monotonic() + self.negative_ttl, None, error)
+        else:
+            return
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+
+    def invalidate_chat(self, chat_id: int | str) -> None:
+        """Drop cached answers about ``chat_id``, e.g. after the bot's rights changed.
+
+        A chat is matched by its id and by any ``@username`` it was looked up under, in
+        either direction: ``getChat`` answers tie the two together.
+        """
+        chats = {chat_id}
+        for key, (_, result, _) in self._cache.items():
+            if key[1] == "getChat" and result is not None:
+                if result.id == chat_id or _mentions_chat(key, chat_id):
+                    chats.update((result.id, _key_chat_id(key)))
+        stale = [key for key in self._cache if any(_mentions_chat(key, chat) for chat in chats)]
+        for key in stale:
+            del self._cache[key]
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+
+def _key_chat_id(key: tuple) -> int | str | None:
+    return json.loads(key[2]).get("chat_id")
+
+
+def _mentions_chat(key: tuple, chat_id: int | str | None) -> bool:
+    value = json.dumps(chat_id)
+    return f'"chat_id":{value},' in key[2] or f'"chat_id":{value}}}' in key[2]
+
+
+def invalidate_chat(bot: "Bot", chat_id: int | str) -> None:
+    """Drop what ``bot``'s API cache knows about ``chat_id``; a no-op without the cache."""
+    for middleware in bot.session.middleware:
+        if isinstance(middleware, BotApiCacheMiddleware):
+            middleware.invalidate_chat(chat_id)
@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from itertools import chain
+from typing import Any, Dict, Optional
+
+import msgpack
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+from aiogram.fsm.storage.redis import DefaultKeyBuilder, KeyBuilder
+from redis.asyncio import Redis
+
+# Field names are str; a NUL prefix can't collide with a data key written by handlers.
+STATE_FIELD = "\x00state"
+VERSION_FIELD = "\x00version"
+
+# Applies a diff only if the hash is still at the version the diff was computed against.
+# KEYS[1] hash; ARGV: version field, expected version ("" = any), ttl, number of fields to
+# set, that many field/value pairs, then the fields to delete. Returns the new version, or
+# -1 if the hash changed in the meantime. An empty diff only checks the version.
+WRITE_SCRIPT = """
+local current = redis.call('HGET', KEYS[1], ARGV[1]) or '0'
+if ARGV[2] ~= '' and current ~= ARGV[2] then
+    return -1
+end
+local last = 4 + 2 * tonumber(ARGV[4])
+if #ARGV == 4 then
+    return tonumber(current)
+end
+if last > 4 then
+    redis.call('HSET', KEYS[1], unpack(ARGV, 5, last))
+end
+if #ARGV > last then
+    redis.call('HDEL', KEYS[1], unpack(ARGV, last + 1, #ARGV))
+end
+local version = redis.call('HINCRBY', KEYS[1], ARGV[1], 1)
+if tonumber(ARGV[3]) > 0 then
+    redis.call('EXPIRE', KEYS[1], ARGV[3])
+end
+return version
+"""
+
+# Returns the whole hash, or just 1 if it is still at the version the caller has cached.
+# KEYS[1] hash; ARGV: version field, cached version ("" = none).
+READ_SCRIPT = """
+local current = redis.call('HGET', KEYS[1], ARGV[1]) or '0'
+if current == ARGV[2] then
+    return 1
+end
+return redis.call('HGETALL', KEYS[1])
+"""
+
+_UNSET: Any = object()
+
+
+def pack(value: Any) -> bytes:
+    return msgpack.packb(value, use_bin_type=True)
+
+
+def unpack(raw: bytes) -> Any:
+    return msgpack.unpackb(raw, raw=False)
+
+
+@dataclass(slots=True)
+class _Snapshot:
+    state: str | None = None
+    # Packed field values, so callers always get freshly decoded (deep) copies.
+    data: dict[str, bytes] = field(default_factory=dict)
+    version: int = 0
+    expires_at: float = 0.0
+
+    def decoded(self) -> dict[str, Any]:
+        return {name: unpack(raw) for name, raw in self.data.items()}
+
+
+class CompactRedisStorage(BaseStorage):
+    """FSM storage that keeps state and data in one Redis hash per key.
+
+    Every data field is a separate msgpack-encoded hash field, so ``set_data`` and
+    ``update_data`` only send the fields that actually changed. State and data are read
+    together and kept in a small per-process LRU for up to ``l1_ttl`` seconds. A read
+    still goes to Redis, but a Lua script compares the hash's version with the cached
+    one and sends the fields back only if they changed, so the ``get_state``/``get_data``
+    pair of an update transfers the data once and a write made by another process is
+    seen by the next read.
+
+    Writes are diffs against a cached snapshot, applied by a Lua script only if the hash
+    still carries the snapshot's version; when another process wrote in between, the
+    hash is re-read and the diff recomputed, so several webhook or stream workers sharing
+    one Redis never drop each other's writes.
+
+    The Redis client belongs to the caller: ``close`` leaves it open.
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        *,
+        key_builder: KeyBuilder | None = None,
+        ttl: int | None = 86400,
+        l1_size: int = 1024,
+        l1_ttl: float = 2.0,
+    ):
+        self.redis = redis
+        self.key_builder = key_builder or DefaultKeyBuilder()
+        self.ttl = ttl
+        self.l1_size = l1_size
+        self.l1_ttl = l1_ttl
+        self._l1: OrderedDict[str, _Snapshot] = OrderedDict()
+        self._read_script = redis.register_script(READ_SCRIPT)
+        self._write_script = redis.register_script(WRITE_SCRIPT)
+
+    def _name(self, key: StorageKey) -> str:
+        return self.key_builder.build(key, "data")
+
+    def _cached(self, name: str) -> _Snapshot | None:
+        snapshot = self._l1.get(name)
+        if snapshot is None:
+            return None
+        if snapshot.expires_at < time.monotonic():
+            del self._l1[name]
+            return None
+        self._l1.move_to_end(name)
+        return snapshot
+
+    def _remember(self, name: str, snapshot: _Snapshot) -> None:
+        if self.l1_size <= 0:
+            return
+        snapshot.expires_at = time.monotonic() + self.l1_ttl
+        self._l1[name] = snapshot
+        self._l1.move_to_end(name)
+        while len(self._l1) > self.l1_size:
+            self._l1.popitem(last=False)
+
+    async def _load(self, name: str, *, fresh: bool = False) -> _Snapshot:
+        cached = None if fresh else self._cached(name)
+        reply = await self._read_script(
+            keys=[name], args=[VERSION_FIELD, "" if cached is None else cached.version]
+        )
+        if cached is not None and not isinstance(reply, list):
+            self._remember(name, cached)
+            return cached
+        snapshot = _Snapshot()
+        for raw_field, raw_value in zip(reply[::2], reply[1::2]):
+            field_name = raw_field.decode() if isinstance(raw_field, bytes) else raw_field
+            if field_name == STATE_FIELD:
+                snapshot.state = raw_value.decode() if isinstance(raw_value, bytes) else raw_value
+            elif field_name == VERSION_FIELD:
+                snapshot.version = int(raw_value)
+            else:
+                snapshot.data[field_name] = raw_value
+        self._remember(name, snapshot)
+        return snapshot
+
+    async def _write(
+        self,
+        name: str,
+        *,
+        data: dict[str, Any] | None = None,
+        replace: bool = False,
+        state: str | None = _UNSET,
+    ) -> _Snapshot:
+        """Apply ``data``/``state`` to the hash; ``replace`` also drops fields not in ``data``."""
+        packed = {field_name: pack(value) for field_name, value in (data or {}).items()}
+        # The write script checks the version itself, so a cached snapshot needs no read.
+        snapshot = self._cached(name) or await self._load(name)
+        while True:
+            changed: dict[str, bytes | str] = {
+                field_name: raw
+                for field_name, raw in packed.items()
+                if snapshot.data.get(field_name) != raw
+            }
+            removed = [field_name for field_name in snapshot.data if field_name not in packed]
+            if not replace:
+                removed = []
+            if state is not _UNSET and state != snapshot.state:
+                if state is None:
+                    removed.append(STATE_FIELD)
+                else:
+                    changed[STATE_FIELD] = state
+            version = await self._write_script(
+                keys=[name],
+                args=[
+                    VERSION_FIELD,
+                    snapshot.version,
+                    self.ttl or 0,
+                    len(changed),
+                    *chain.from_iterable(changed.items()),
+                    *removed,
+                ],
+            )
+            if version >= 0:
+                break
+            snapshot = await self._load(name, fresh=True)
+
+        updated = _Snapshot(state=snapshot.state, data=dict(snapshot.data), version=version)
+        for field_name in removed:
+            if field_name == STATE_FIELD:
+                updated.state = None
+            else:
+                updated.data.pop(field_name, None)
+        for field_name, raw in changed.items():
+            if field_name == STATE_FIELD:
+                updated.state = raw
+            else:
+                updated.data[field_name] = raw
+        self._remember(name, updated)
+        return updated
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        value = state.state if isinstance(state, State) else state
+        await self._write(self._name(key), state=value)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        return (await self._load(self._name(key))).state
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        await self._write(self._name(key), data=data, replace=True)
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        return (await self._load(self._name(key))).decoded()
+
+    async def update_data(self, key: StorageKey, data: Dict[str, Any]) -> Dict[str, Any]:
+        return (await self._write(self._name(key), data=data)).decoded()
+
+    async def close(self) -> None:
+        self._l1.clear()
@@ -0,0 +1,285 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import math
+import os
+import socket
+import time
+import uuid
+from contextlib import suppress
+from typing import Any, Mapping
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+from redis.asyncio import Redis
+from redis.exceptions import ResponseError
+
+logger = logging.getLogger(__name__)
+
+STREAM_GROUP = "workers"
+PAYLOAD_FIELD = "u"
+# Compare-and-set helpers so a worker never touches a lease another worker took over.
+RENEW_LEASE = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+RELEASE_LEASE = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+def update_shard_key(update: Mapping[str, Any]) -> int:
+    """Chat id of a raw update (user id when there is no chat); 0 if neither is present."""
+    for name, event in update.items():
+        if name == "update_id" or not isinstance(event, Mapping):
+            continue
+        for container in (event, event.get("message")):
+            if isinstance(container, Mapping) and isinstance(container.get("chat"), Mapping):
+                return int(container["chat"]["id"])
+        for field in ("from", "user", "voter_chat"):
+            if isinstance(event.get(field), Mapping):
+                return int(event[field]["id"])
+    return 0
+
+
+class UpdateStream:
+    """Raw updates split over ``shards`` Redis Streams by chat id.
+
+    Every stream has one consumer group; ordering within a chat is kept because a shard is
+    only ever read by the worker holding its lease (see :class:`StreamWorker`).
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        *,
+        prefix: str = "updates",
+        shards: int = 16,
+        maxlen: int = 100_000,
+    ):
+        self.redis = redis
+        self.prefix = prefix
+        self.shards = shards
+        self.maxlen = maxlen
+
+    def stream(self, shard: int) -> str:
+        return f"{self.prefix}:{shard}"
+
+    def lease(self, shard: int) -> str:
+        return f"{self.prefix}:lease:{shard}"
+
+    @property
+    def workers_key(self) -> str:
+        return f"{self.prefix}:workers"
+
+    def shard_of(self, update: Mapping[str, Any]) -> int:
+        return update_shard_key(update) % self.shards
+
+    async def ensure_groups(self) -> None:
+        for shard in range(self.shards):
+            with suppress(ResponseError):  # BUSYGROUP: the group already exists
+                await self.redis.xgroup_create(
+                    self.stream(shard), STREAM_GROUP, id="0", mkstream=True
+                )
+
+    async def append(self, update: Mapping[str, Any]) -> bytes:
+        return await self.redis.xadd(
+            self.stream(self.shard_of(update)),
+            {PAYLOAD_FIELD: json.dumps(update, separators=(",", ":"))},
+            maxlen=self.maxlen,
+            approximate=True,
+        )
+
+
+async def ingest_updates(
+    bot: Bot,
+    stream: UpdateStream,
+    *,
+    allowed_updates: list[str] | None = None,
+    timeout: int = 30,
+) -> None:
+    """Long-poll Telegram and append every update to ``stream``.
+
+    The offset only moves past an update once it is in Redis; if appending fails, the
+    rest of the batch is fetched again on the next poll, so updates are re-fetched rather
+    than lost.
+    """
+    await stream.ensure_groups()
+    offset: int | None = None
+    while True:
+        try:
+            updates = await bot.get_updates(
+                offset=offset, timeout=timeout, allowed_updates=allowed_updates
+            )
+        except Exception:
+            logger.exception("Failed to fetch updates")
+            await asyncio.sleep(1)
+            continue
+        try:
+            for update in updates:
+                await stream.append(
+                    update.model_dump(mode="json", exclude_none=True, by_alias=True)
+                )
+                offset = update.update_id + 1
+        except Exception:
+            logger.exception("Failed to append updates to the stream, refetching from %s", offset)
+            await asyncio.sleep(1)
+
+
+class StreamWorker:
+    """Feeds updates from leased shards to a dispatcher.
+
+    A shard is leased by one worker at a time (``SET NX PX``, renewed on every heartbeat),
+    so entries of one chat are handled in order while different shards run in parallel.
+    Workers announce themselves in a sorted set and hold at most
+    ``ceil(shards / live workers)`` shards, releasing extras so a newly started worker
+    picks them up. Taking over a shard first re-processes entries the previous owner
+    read but never acknowledged (``XAUTOCLAIM``); delivery is at-least-once.
+    """
+
+    def __init__(
+        self,
+        stream: UpdateStream,
+        bot: Bot,
+        dispatcher: Dispatcher,
+        *,
+        worker_id: str | None = None,
+        lease_ttl: float = 10.0,
+        batch_size: int = 100,
+        block_ms: int = 1000,
+    ):
+        self.stream = stream
+        self.redis = stream.redis
+        self.bot = bot
+        self.dispatcher = dispatcher
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.lease_ttl = lease_ttl
+        self.batch_size = batch_size
+        self.block_ms = block_ms
+        self.processed = 0
+        self._shards: dict[int, asyncio.Task[None]] = {}
+        self._releasing: set[int] = set()
+        self._renew = self.redis.register_script(RENEW_LEASE)
+        self._release = self.redis.register_script(RELEASE_LEASE)
+        self._stopped = asyncio.Event()
+
+    @property
+    def shards(self) -> list[int]:
+        return sorted(self._shards)
+
+    async def run(self) -> None:
+        await self.stream.ensure_groups()
+        try:
+            while not self._stopped.is_set():
+                try:
+                    await self._heartbeat()
+                except Exception:
+                    logger.exception("Stream worker %s heartbeat failed", self.worker_id)
+                with suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(self._stopped.wait(), timeout=self.lease_ttl / 3)
+        finally:
+            await self._shutdown()
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+    async def _heartbeat(self) -> None:
+        now = time.time()
+        await self.redis.zadd(self.stream.workers_key, {self.worker_id: now})
+        await self.redis.zremrangebyscore(self.stream.workers_key, 0, now - self.lease_ttl)
+        live = max(1, await self.redis.zcard(self.stream.workers_key))
+        fair_share = math.ceil(self.stream.shards / live)
+        ttl_ms = int(self.lease_ttl * 1000)
+
+        for shard, task in list(self._shards.items()):
+            if task.done():
+                self._forget(shard)
+                continue
+            renewed = await self._renew(
+                keys=[self.stream.lease(shard)], args=[self.worker_id, ttl_ms]
+            )
+            if not renewed:
+                logger.warning("Lost lease on shard %s", shard)
+                task.cancel()
+                self._forget(shard)
+
+        active = [shard for shard in self._shards if shard not in self._releasing]
+        for shard in active[fair_share:]:
+            self._releasing.add(shard)
+
+        for shard in range(self.stream.shards):
+            if len(self._shards) >= fair_share:
+                break
+            if shard in self._shards:
+                continue
+            if await self.redis.set(self.stream.lease(shard), self.worker_id, nx=True, px=ttl_ms):
+                self._shards[shard] = asyncio.create_task(
+                    self._consume(shard), name=f"stream-shard-{shard}"
+                )
+
+    def _forget(self, shard: int) -> None:
+        self._shards.pop(shard, None)
+        self._releasing.discard(shard)
+
+    async def _consume(self, shard: int) -> None:
+        stream = self.stream.stream(shard)
+        try:
+            # Entries the previous owner read but did not acknowledge come first.
+            cursor: bytes | str = "0-0"
+            while True:
+                cursor, entries, *_ = await self.redis.xautoclaim(
+                    stream, STREAM_GROUP, self.worker_id, min_idle_time=0, start_id=cursor,
+                    count=self.batch_size,
+                )
+                await self._process(stream, entries)
+                if cursor in (b"0-0", "0-0"):
+                    break
+
+            while shard not in self._releasing and not self._stopped.is_set():
+                response = await self.redis.xreadgroup(
+                    STREAM_GROUP,
+                    self.worker_id,
+                    {stream: ">"},
+                    count=self.batch_size,
+                    block=self.block_ms,
+                )
+                for _, entries in response or ():
+                    await self._process(stream, entries)
+        finally:
+            with suppress(Exception):
+                await self._release(keys=[self.stream.lease(shard)], args=[self.worker_id])
+            self._forget(shard)
+
+    async def _process(self, stream: str, entries: list) -> None:
+        if not entries:
+            return
+        ids = []
+        for entry_id, fields in entries:
+            ids.append(entry_id)
+            if not fields:  # trimmed away by MAXLEN before it was processed
+                continue
+            raw = fields.get(PAYLOAD_FIELD.encode()) or fields.get(PAYLOAD_FIELD)
+            try:
+                update = Update.model_validate(json.loads(raw), context={"bot": self.bot})
+                await self.dispatcher.feed_update(self.bot, update)
+            except Exception:
+                logger.exception("Failed to process stream entry %s", entry_id)
+        await self.redis.xack(stream, STREAM_GROUP, *ids)
+        self.processed += len(ids)
+
+    async def _shutdown(self) -> None:
+        for shard in list(self._shards):
+            self._releasing.add(shard)
+        tasks = list(self._shards.values())
+        if tasks:
+            await asyncio.wait(tasks, timeout=self.block_ms / 1000 + 5)
+        for task in tasks:
+            task.cancel()
+        await self.redis.zrem(self.stream.workers_key, self.worker_id)
@@ -0,0 +1,90 @@
+"""Worker pool for the sharded update stream.
+
+Run with ``UPDATE_STREAM_SHARDS`` > 0 next to a process that fills the stream (the bot
+in polling mode or the API in webhook mode)::
+
+    python -m alt_controller_bot.bot.workers --processes 4
+
+More workers can be started at any time, on this or another host; shards are
+rebalanced on the next heartbeat.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import signal
+from contextlib import suppress
+
+from alt_controller_bot.app import get_app
+from alt_controller_bot.bot.main import create_bot, create_dispatcher, create_update_stream
+from alt_controller_bot.bot.streams import StreamWorker
+from alt_controller_bot.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+async def run_worker() -> None:
+    settings = get_settings()
+    bot = await create_bot()
+    dp = await create_dispatcher()
+    worker = StreamWorker(
+        create_update_stream(),
+        bot,
+        dp,
+        lease_ttl=settings.stream_lease_ttl,
+        batch_size=settings.stream_batch_size,
+    )
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, worker.stop)
+
+    workflow_data = {"dispatcher": dp, "bots": [bot], **dp.workflow_data}
+    await dp.emit_startup(bot=bot, **workflow_data)
+    try:
+        await worker.run()
+    finally:
+        await dp.emit_shutdown(bot=bot, **workflow_data)
+        await bot.session.close()
+        await get_app().aclose()
+
+
+def worker_main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    with suppress(KeyboardInterrupt):
+        asyncio.run(run_worker())
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m alt_controller_bot.bot.workers",
+        description="Process updates from the sharded Redis stream.",
+    )
+    parser.add_argument("--processes", type=int, default=1, help="worker processes to start")
+    args = parser.parse_args(argv)
+    if not get_settings().update_stream_shards:
+        parser.error("UPDATE_STREAM_SHARDS is not set")
+
+    if args.processes == 1:
+        worker_main()
+        return
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(target=worker_main, name=f"stream-worker-{index}")
+        for index in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+            process.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,3 @@
-from alt_controller_bot.core.config import settings
+from alt_controller_bot.core.config import get_settings
 
-__all__ = ["settings"]
+__all__ = ["get_settings"]
@@ -0,0 +1,81 @@
+"""Compact ``callback_data`` codec.
+
+Callback data is ``<key>`` or ``<key>:<payload>``, where the payload is the base85 encoding of
+zigzag varints, one per field. Three ids (post, channel, button) usually fit in ~10 characters,
+well under Telegram's 64-byte limit.
+"""
+
+from __future__ import annotations
+
+import re
+from base64 import b85decode, b85encode
+from collections import namedtuple
+from typing import Any
+
+MAX_CALLBACK_DATA = 64
+SEPARATOR = ":"
+KEY_RE = re.compile(r"[a-z0-9_.]{1,16}")
+
+
+def encode_varints(values: tuple[int, ...]) -> bytes:
+    out = bytearray()
+    for value in values:
+        value = value * 2 if value >= 0 else -value * 2 - 1
+        while value > 0x7F:
+            out.append(value & 0x7F | 0x80)
+            value >>= 7
+        out.append(value)
+    return bytes(out)
+
+
+def decode_varints(data: bytes) -> list[int]:
+    values: list[int] = []
+    value = shift = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        values.append(value >> 1 if not value & 1 else -(value >> 1) - 1)
+        value = shift = 0
+    if shift:
+        raise ValueError("Truncated varint")
+    return values
+
+
+class CallbackType:
+    """A kind of callback button: a short key plus named integer fields."""
+
+    __slots__ = ("key", "fields", "payload")
+
+    def __init__(self, key: str, *fields: str):
+        if not KEY_RE.fullmatch(key):
+            raise ValueError(f"Invalid callback key {key!r}")
+        self.key = key
+        self.fields = fields
+        self.payload = namedtuple("CallbackPayload", fields)
+
+    def __repr__(self) -> str:
+        return f"CallbackType({self.key!r}, {', '.join(map(repr, self.fields))})"
+
+    def pack(self, *args: int, **kwargs: Any) -> str:
+        values = tuple(self.payload(*args, **kwargs))
+        if not values:
+            return self.key
+        data = f"{self.key}{SEPARATOR}{b85encode(encode_varints(values)).decode()}"
+        if len(data) > MAX_CALLBACK_DATA:
+            raise ValueError(f"callback_data for {self.key!r} exceeds {MAX_CALLBACK_DATA} bytes")
+        return data
+
+    def unpack(self, data: str) -> tuple:
+        key, _, encoded = data.partition(SEPARATOR)
+        if key != self.key:
+            raise ValueError(f"callback_data {data!r} is not {self.key!r}")
+        values = decode_varints(b85decode(encoded)) if encoded else []
+        if len(values) != len(self.fields):
+            raise ValueError(f"callback_data {data!r} does not match fields of {self.key!r}")
+        return self.payload(*values)
+
+
+def callback_key(data: str | None) -> str:
+    return (data or "").partition(SEPARATOR)[0]
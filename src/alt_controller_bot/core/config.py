@@ -1,6 +1,8 @@
+import hashlib
 from functools import lru_cache
 from pathlib import Path
 from typing import List
+from urllib.parse import urlparse
 
 from pydantic import AnyHttpUrl, BaseModel, Field, ValidationError, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -31,11 +33,121 @@ class Settings(BaseSettings):
     database_url: AnyHttpUrl | str = Field(validation_alias="DATABASE_URL")
     redis_url: AnyHttpUrl | str = Field(validation_alias="REDIS_URL")
     webhook_url: AnyHttpUrl | None = Field(default=None, validation_alias="WEBHOOK_URL")
+    webhook_secret: str | None = Field(default=None, validation_alias="WEBHOOK_SECRET")
+    webhook_max_tasks: int = Field(default=256, validation_alias="WEBHOOK_MAX_TASKS")
+    webhook_dedup_ttl: int = Field(default=3600, validation_alias="WEBHOOK_DEDUP_TTL")
+    webhook_claim_lease: float = Field(default=60.0, validation_alias="WEBHOOK_CLAIM_LEASE")
+    bot_api_pool_size: int = Field(default=100, validation_alias="BOT_API_POOL_SIZE")
+    bot_api_keepalive: float = Field(default=60.0, validation_alias="BOT_API_KEEPALIVE")
+    bot_api_cache_size: int = Field(default=10_000, validation_alias="BOT_API_CACHE_SIZE")
     owner_ids: List[int] = Field(default_factory=list, validation_alias="OWNER_IDS")
+    api_token: str | None = Field(default=None, validation_alias="API_TOKEN")
+    metrics_host: str = Field(default="0.0.0.0", validation_alias="METRICS_HOST")
+    metrics_port: int | None = Field(default=None, validation_alias="METRICS_PORT")
+    metrics_multiproc_dir: str | None = Field(
+        default=None, validation_alias="METRICS_MULTIPROC_DIR"
+    )
+    metrics_snapshot_interval: float = Field(
+        default=5.0, validation_alias="METRICS_SNAPSHOT_INTERVAL"
+    )
+    db_pool_size: int = Field(default=10, validation_alias="DB_POOL_SIZE")
+    db_max_overflow: int = Field(default=10, validation_alias="DB_MAX_OVERFLOW")
+    db_pool_timeout: float = Field(default=30.0, validation_alias="DB_POOL_TIMEOUT")
+    db_pool_recycle: int = Field(default=1800, validation_alias="DB_POOL_RECYCLE")
+    db_pool_pre_ping: bool = Field(default=True, validation_alias="DB_POOL_PRE_PING")
+    db_statement_cache_size: int = Field(default=100, validation_alias="DB_STATEMENT_CACHE_SIZE")
+    click_flush_interval: float = Field(default=5.0, validation_alias="CLICK_FLUSH_INTERVAL")
+    click_flush_max_keys: int = Field(default=1000, validation_alias="CLICK_FLUSH_MAX_KEYS")
+    scheduler_batch_size: int = Field(default=100, validation_alias="SCHEDULER_BATCH_SIZE")
+    scheduler_refresh_interval: float = Field(
+        default=30.0, validation_alias="SCHEDULER_REFRESH_INTERVAL"
+    )
+    scheduler_lookahead: int = Field(default=1000, validation_alias="SCHEDULER_LOOKAHEAD")
+    scheduler_lease: float = Field(default=600.0, validation_alias="SCHEDULER_LEASE")
+    scheduler_max_attempts: int = Field(default=5, validation_alias="SCHEDULER_MAX_ATTEMPTS")
+    scheduler_retry_delay: float = Field(default=30.0, validation_alias="SCHEDULER_RETRY_DELAY")
+    scheduler_max_retry_delay: float = Field(
+        default=3600.0, validation_alias="SCHEDULER_MAX_RETRY_DELAY"
+    )
+    publish_global_rate: float = Field(default=30.0, validation_alias="PUBLISH_GLOBAL_RATE")
+    publish_chat_rate: float = Field(default=1.0, validation_alias="PUBLISH_CHAT_RATE")
+    rbac_cache_size: int = Field(default=10_000, validation_alias="RBAC_CACHE_SIZE")
+    rbac_cache_ttl: float = Field(default=60.0, validation_alias="RBAC_CACHE_TTL")
+    export_batch_size: int = Field(default=5000, validation_alias="EXPORT_BATCH_SIZE")
+    # sendDocument limit of the public Bot API; a local Bot API server accepts up to 2000 MB.
+    export_max_upload_bytes: int = Field(
+        default=50 * 1024 * 1024, validation_alias="EXPORT_MAX_UPLOAD_BYTES"
+    )
+    stats_hourly_retention_days: int = Field(
+        default=30, validation_alias="STATS_HOURLY_RETENTION_DAYS"
+    )
+    stats_compaction_interval: float = Field(
+        default=3600.0, validation_alias="STATS_COMPACTION_INTERVAL"
+    )
+    audit_queue_size: int = Field(default=10_000, validation_alias="AUDIT_QUEUE_SIZE")
+    audit_batch_size: int = Field(default=500, validation_alias="AUDIT_BATCH_SIZE")
+    audit_flush_interval: float = Field(default=1.0, validation_alias="AUDIT_FLUSH_INTERVAL")
+    audit_spill_path: Path | None = Field(default=None, validation_alias="AUDIT_SPILL_PATH")
+    audit_retention_months: int = Field(default=12, validation_alias="AUDIT_RETENTION_MONTHS")
+    fsm_ttl: int | None = Field(default=86400, validation_alias="FSM_TTL")
+    fsm_l1_size: int = Field(default=1024, validation_alias="FSM_L1_SIZE")
+    fsm_l1_ttl: float = Field(default=2.0, validation_alias="FSM_L1_TTL")
+    link_base_url: AnyHttpUrl | None = Field(default=None, validation_alias="LINK_BASE_URL")
+    link_preload_posts: int = Field(default=5000, validation_alias="LINK_PRELOAD_POSTS")
+    link_cache_size: int = Field(default=100_000, validation_alias="LINK_CACHE_SIZE")
+    message_index_size: int = Field(default=100_000, validation_alias="MESSAGE_INDEX_SIZE")
+    reaction_flush_interval: float = Field(
+        default=5.0, validation_alias="REACTION_FLUSH_INTERVAL"
+    )
+    reaction_flush_max_pending: int = Field(
+        default=5000, validation_alias="REACTION_FLUSH_MAX_PENDING"
+    )
+    render_cache_size: int = Field(default=1024, validation_alias="RENDER_CACHE_SIZE")
+    media_cache_size: int = Field(default=1024, validation_alias="MEDIA_CACHE_SIZE")
+    media_cache_max_entries: int = Field(
+        default=100_000, validation_alias="MEDIA_CACHE_MAX_ENTRIES"
+    )
+    media_cache_prune_interval: float = Field(
+        default=3600.0, validation_alias="MEDIA_CACHE_PRUNE_INTERVAL"
+    )
+    onboarding_concurrency: int = Field(default=10, validation_alias="ONBOARDING_CONCURRENCY")
+    edit_debounce: float = Field(default=5.0, validation_alias="EDIT_DEBOUNCE")
+    edit_max_delay: float = Field(default=60.0, validation_alias="EDIT_MAX_DELAY")
+    edit_concurrency: int = Field(default=8, validation_alias="EDIT_CONCURRENCY")
+    analytics_workers: int = Field(default=2, validation_alias="ANALYTICS_WORKERS")
+    analytics_batch_size: int = Field(default=50_000, validation_alias="ANALYTICS_BATCH_SIZE")
+    # 0 keeps the single-process dispatcher; N > 0 routes updates through N stream shards.
+    update_stream_shards: int = Field(default=0, validation_alias="UPDATE_STREAM_SHARDS")
+    update_stream_prefix: str = Field(default="updates", validation_alias="UPDATE_STREAM_PREFIX")
+    update_stream_maxlen: int = Field(
+        default=100_000, validation_alias="UPDATE_STREAM_MAXLEN"
+    )
+    stream_lease_ttl: float = Field(default=10.0, validation_alias="STREAM_LEASE_TTL")
+    stream_batch_size: int = Field(default=100, validation_alias="STREAM_BATCH_SIZE")
 
     channel_defaults: ChannelDefaults = Field(default_factory=ChannelDefaults)
 
-    @field_validator("webhook_url", mode="before")
+    @property
+    def webhook_path(self) -> str:
+        if self.webhook_url is None:
+            return "/bot/webhook"
+        return urlparse(str(self.webhook_url)).path or "/"
+
+    @property
+    def webhook_secret_token(self) -> str:
+        # Telegram only accepts [A-Za-z0-9_-]; derive a stable token so all workers agree.
+        if self.webhook_secret:
+            return self.webhook_secret
+        return hashlib.sha256(self.bot_token.encode()).hexdigest()
+
+    @property
+    def link_prefix(self) -> str | None:
+        """Prefix of tracked redirect links, e.g. ``https://example.com/r/``."""
+        if self.link_base_url is None:
+            return None
+        return f"{str(self.link_base_url).rstrip('/')}/r/"
+
+    @field_validator("webhook_url", "link_base_url", mode="before")
     @classmethod
     def _empty_string_to_none(cls, value: str | AnyHttpUrl | None) -> AnyHttpUrl | None:
         if isinstance(value, str) and not value.strip():
@@ -86,4 +198,8 @@ def load_settings() -> Settings:
         ) from exc
 
 
-settings = load_settings()
+def get_settings() -> Settings:
+    """Settings of the current app (``alt_controller_bot.app.get_app()``), read on first use."""
+    from alt_controller_bot.app import get_app
+
+    return get_app().settings
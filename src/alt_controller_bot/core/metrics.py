@@ -0,0 +1,324 @@
+"""Minimal in-process Prometheus metrics (text exposition format 0.0.4).
+
+Every process keeps its own registry. When several processes serve one scrape target
+(``uvicorn --workers N``), each of them dumps its registry into a shared directory through
+``SnapshotStore`` and ``/metrics`` renders the merged snapshots of all workers.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import time
+from bisect import bisect_left
+from contextlib import suppress
+from pathlib import Path
+from typing import Any, Callable, Iterable
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = tuple[str, ...]
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Counter:
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def dump(self) -> list[Any]:
+        return [[labels, value] for labels, value in self._values.items()]
+
+    def merged(self, dumps: Iterable[list[Any]]) -> Counter:
+        merged = Counter(self.name, self.documentation, self.labelnames)
+        for samples in dumps:
+            for labels, value in samples:
+                merged.inc(*labels, amount=value)
+        return merged
+
+    def collect(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for labels, value in self._values.items():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+class Histogram:
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        # Per label set: [count per bucket..., +Inf count, sum]
+        self._values: dict[LabelValues, list[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        state = self._values.get(labels)
+        if state is None:
+            state = self._values[labels] = [0.0] * (len(self.buckets) + 2)
+        state[bisect_left(self.buckets, value)] += 1
+        state[-1] += value
+
+    def dump(self) -> list[Any]:
+        return [[labels, state] for labels, state in self._values.items()]
+
+    def merged(self, dumps: Iterable[list[Any]]) -> Histogram:
+        merged = Histogram(self.name, self.documentation, self.labelnames, self.buckets)
+        for samples in dumps:
+            for labels, state in samples:
+                total = merged._values.setdefault(tuple(labels), [0.0] * len(state))
+                for index, value in enumerate(state):
+                    total[index] += value
+        return merged
+
+    def collect(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for labels, state in self._values.items():
+            cumulative = 0.0
+            for bound, count in zip((*self.buckets, "+Inf"), state):
+                cumulative += count
+                le = _format_labels(self.labelnames, labels, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            label_str = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_count{label_str} {cumulative}")
+            lines.append(f"{self.name}_sum{label_str} {state[-1]}")
+        return lines
+
+
+class GaugeCallback:
+    """Gauge whose samples are read from ``callback`` at scrape time.
+
+    ``aggregate`` combines the values of several workers (``sum`` for sizes, ``max`` for
+    high-water marks).
+    """
+
+    type = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        callback: Callable[[], float],
+        *,
+        aggregate: Callable[[Iterable[float]], float] = sum,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.callback = callback
+        self.aggregate = aggregate
+
+    def collect(self) -> list[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type}",
+            f"{self.name} {self.callback()}",
+        ]
+
+    def dump(self) -> float:
+        return self.callback()
+
+    def merged(self, dumps: Iterable[float]) -> GaugeCallback:
+        value = self.aggregate(list(dumps))
+        return type(self)(self.name, self.documentation, lambda: value, aggregate=self.aggregate)
+
+
+class CounterCallback(GaugeCallback):
+    """Monotonic total kept elsewhere (e.g. by the connection pool), read at scrape time."""
+
+    type = "counter"
+
+
+Metric = Counter | Histogram | GaugeCallback
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: dict[str, Metric] = {}
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        return self._render(self._metrics.values())
+
+    def snapshot(self) -> dict[str, Any]:
+        return {name: metric.dump() for name, metric in self._metrics.items()}
+
+    def render_merged(self, snapshots: Iterable[dict[str, Any]]) -> str:
+        """Render the sum of ``snapshots`` (see ``snapshot``) for the metrics known here."""
+        dumps: dict[str, list[Any]] = {name: [] for name in self._metrics}
+        for snapshot in snapshots:
+            for name, dump in snapshot.items():
+                if name in dumps:
+                    dumps[name].append(dump)
+        return self._render(
+            metric.merged(dumps[name])
+            for name, metric in self._metrics.items()
+            if dumps[name] or metric.type != "gauge"
+        )
+
+    @staticmethod
+    def _render(metrics: Iterable[Metric]) -> str:
+        lines: list[str] = []
+        for metric in metrics:
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+class SnapshotStore:
+    """Shares the registries of all worker processes through ``directory``.
+
+    Every ``interval`` seconds (and on every scrape it serves) a worker writes its snapshot
+    to ``<pid>.json``. Counters and histograms of exited workers stay in the sum, so totals
+    do not drop when a worker is replaced; their gauges are left out once the file is
+    ``3 * interval`` seconds old. The directory must be emptied when the service is
+    (re)deployed, like ``PROMETHEUS_MULTIPROC_DIR`` of the official client.
+    """
+
+    def __init__(self, registry: Registry, directory: str | Path, *, interval: float = 5.0):
+        self.registry = registry
+        self.directory = Path(directory)
+        self.interval = interval
+        self.path = self.directory / f"{os.getpid()}.json"
+        self._task: asyncio.Task[None] | None = None
+
+    async def start(self) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.write()
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="metrics-snapshots")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        self.write()
+
+    def write(self) -> None:
+        temporary = self.path.with_suffix(".tmp")
+        temporary.write_text(json.dumps(self.registry.snapshot()))
+        temporary.replace(self.path)
+
+    def read(self) -> list[dict[str, Any]]:
+        stale_before = time.time() - 3 * self.interval
+        snapshots = []
+        for path in self.directory.glob("*.json"):
+            try:
+                modified = path.stat().st_mtime
+                snapshot = json.loads(path.read_text())
+            except (OSError, ValueError):
+                continue  # replaced or removed while reading
+            if path != self.path and modified < stale_before:
+                snapshot = {
+                    name: dump
+                    for name, dump in snapshot.items()
+                    if getattr(self.registry._metrics.get(name), "type", None) != "gauge"
+                }
+            snapshots.append(snapshot)
+        return snapshots
+
+    def render(self) -> str:
+        self.write()
+        return self.registry.render_merged(self.read())
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                self.write()
+            except OSError:
+                logger.exception("Writing the metrics snapshot failed")
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+registry = Registry()
+
+UPDATE_LATENCY = registry.register(
+    Histogram("bot_update_seconds", "Time spent processing an update.", ("event_type",))
+)
+HANDLER_LATENCY = registry.register(
+    Histogram(
+        "bot_handler_seconds",
+        "Time spent in an aiogram handler.",
+        ("router", "handler"),
+    )
+)
+HANDLER_ERRORS = registry.register(
+    Counter("bot_handler_errors_total", "Handler invocations that raised.", ("router", "handler"))
+)
+SQL_LATENCY = registry.register(
+    Histogram("db_statement_seconds", "SQL statement execution time.", ("statement",))
+)
+SQL_ERRORS = registry.register(
+    Counter("db_statement_errors_total", "SQL statements that raised.", ("statement",))
+)
+BOT_API_LATENCY = registry.register(
+    Histogram("bot_api_request_seconds", "Outgoing Bot API request latency.", ("method",))
+)
+BOT_API_ERRORS = registry.register(
+    Counter(
+        "bot_api_request_errors_total",
+        "Outgoing Bot API requests that failed.",
+        ("method", "error"),
+    )
+)
+BOT_API_CACHE = registry.register(
+    Counter(
+        "bot_api_cache_requests_total",
+        "Cacheable Bot API calls by outcome (hit, miss, shared in-flight call).",
+        ("method", "result"),
+    )
+)
+MEDIA_CACHE_REQUESTS = registry.register(
+    Counter("bot_media_cache_requests_total", "Media file_id cache lookups.", ("result",))
+)
+MEDIA_UPLOAD_BYTES = registry.register(
+    Counter("bot_media_upload_bytes_total", "Media bytes uploaded to Telegram.", ("kind",))
+)
+REACTION_SNAPSHOTS = registry.register(
+    Counter(
+        "bot_reaction_snapshots_total",
+        "message_reaction_count snapshots by stage (received, written, unknown).",
+        ("stage",),
+    )
+)
+POST_EDITS = registry.register(
+    Counter(
+        "bot_post_edits_total",
+        "Published message edits by outcome (sent, failed) and calls saved (coalesced, unchanged).",
+        ("result",),
+    )
+)
@@ -1,9 +1,34 @@
-from alt_controller_bot.db.database import async_session_factory, engine, session_scope
-from alt_controller_bot.db import models
+"""Database package public interface.
+
+Attributes are imported lazily so that importing the package does not build an engine.
+"""
+
+from importlib import import_module
+from typing import TYPE_CHECKING
 
 __all__ = [
-    "async_session_factory",
-    "engine",
+    "LazySession",
+    "get_engine",
+    "get_session_factory",
+    "pool_status",
     "session_scope",
     "models",
 ]
+
+if TYPE_CHECKING:  # pragma: no cover - for type checkers only
+    from alt_controller_bot.db import models as models
+    from alt_controller_bot.db.database import (
+        LazySession as LazySession,
+        get_engine as get_engine,
+        get_session_factory as get_session_factory,
+        pool_status as pool_status,
+        session_scope as session_scope,
+    )
+
+
+def __getattr__(name: str):
+    if name == "models":
+        return import_module("alt_controller_bot.db.models")
+    if name in __all__ or name in {"engine", "async_session_factory"}:
+        return getattr(import_module("alt_controller_bot.db.database"), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,12 +1,37 @@
+from __future__ import annotations
+
 from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING
 
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 
-from alt_controller_bot.core.config import settings
+from alt_controller_bot.db.pool import InstrumentedQueuePool
+
+if TYPE_CHECKING:  # pragma: no cover - for type checkers only
+    from alt_controller_bot.core.config import Settings
+
 
+def build_engine(echo: bool = False, settings: Settings | None = None) -> AsyncEngine:
+    if settings is None:
+        from alt_controller_bot.core.config import get_settings
 
-def build_engine(echo: bool = False) -> AsyncEngine:
-    return create_async_engine(str(settings.database_url), echo=echo, future=True)
+        settings = get_settings()
+    url = str(settings.database_url)
+    connect_args: dict = {}
+    if url.startswith("postgresql+asyncpg"):
+        connect_args["statement_cache_size"] = settings.db_statement_cache_size
+    return create_async_engine(
+        url,
+        echo=echo,
+        future=True,
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=settings.db_pool_pre_ping,
+        connect_args=connect_args,
+    )
 
 
 def build_session_factory(engine: AsyncEngine | None = None) -> async_sessionmaker[AsyncSession]:
@@ -14,13 +39,37 @@ def build_session_factory(engine: AsyncEngine | None = None) -> async_sessionmak
     return async_sessionmaker(engine, expire_on_commit=False, autoflush=False)
 
 
-engine = build_engine()
-async_session_factory = build_session_factory(engine)
+def get_engine() -> AsyncEngine:
+    from alt_controller_bot.app import get_app
+
+    return get_app().engine
+
+
+def get_session_factory() -> async_sessionmaker[AsyncSession]:
+    from alt_controller_bot.app import get_app
+
+    return get_app().session_factory
+
+
+def __getattr__(name: str):
+    # Backwards-compatible module attributes, resolved on first access.
+    if name == "engine":
+        return get_engine()
+    if name == "async_session_factory":
+        return get_session_factory()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def pool_status(target: AsyncEngine | None = None) -> dict[str, float]:
+    pool = (target or get_engine()).pool
+    if isinstance(pool, InstrumentedQueuePool):
+        return pool.status_dict()
+    return {}
 
 
 @asynccontextmanager
 async def session_scope():
-    session = async_session_factory()
+    session = get_session_factory()()
     try:
         yield session
         await session.commit()
@@ -29,3 +78,32 @@ async def session_scope():
         raise
     finally:
         await session.close()
+
+
+class LazySession:
+    """Session shared by everything that runs for one update, opened on first use."""
+
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession] | None = None):
+        self.session_factory = session_factory or get_session_factory()
+        self._session: AsyncSession | None = None
+
+    @property
+    def started(self) -> bool:
+        return self._session is not None
+
+    async def get(self) -> AsyncSession:
+        if self._session is None:
+            self._session = self.session_factory()
+        return self._session
+
+    async def close(self, *, commit: bool) -> None:
+        session, self._session = self._session, None
+        if session is None:
+            return
+        try:
+            if commit:
+                await session.commit()
+            else:
+                await session.rollback()
+        finally:
+            await session.close()
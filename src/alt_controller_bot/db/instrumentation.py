@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import time
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from alt_controller_bot.core.metrics import (
+    SQL_ERRORS,
+    SQL_LATENCY,
+    CounterCallback,
+    GaugeCallback,
+    registry,
+)
+from alt_controller_bot.db.pool import InstrumentedQueuePool
+
+_STARTED_KEY = "metrics_statement_started"
+
+
+def _statement_kind(statement: str) -> str:
+    head = statement.lstrip()[:16].split(None, 1)
+    return head[0].upper() if head else "OTHER"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault(_STARTED_KEY, []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    started = conn.info[_STARTED_KEY].pop()
+    SQL_LATENCY.observe(time.perf_counter() - started, _statement_kind(statement))
+
+
+def _handle_error(exception_context) -> None:
+    conn = exception_context.connection
+    if conn is not None and conn.info.get(_STARTED_KEY):
+        conn.info[_STARTED_KEY].pop()
+    SQL_ERRORS.inc(_statement_kind(exception_context.statement or ""))
+
+
+def install_statement_metrics(engine: AsyncEngine) -> None:
+    sync_engine = engine.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
+
+
+def install_pool_metrics(engine: AsyncEngine) -> None:
+    pool = engine.pool
+    if not isinstance(pool, InstrumentedQueuePool):
+        return
+
+    def current(name: str, metric: type[GaugeCallback] = GaugeCallback, **kwargs) -> GaugeCallback:
+        # Looked up on every scrape: pool.recreate() swaps the pool object on engine.dispose().
+        counter = metric is CounterCallback and not name.endswith("_total")
+        return metric(
+            f"db_pool_{name}_total" if counter else f"db_pool_{name}",
+            f"Connection pool {name.replace('_', ' ')}.",
+            lambda: engine.pool.status_dict()[name],
+            **kwargs,
+        )
+
+    for name in ("size", "checked_in", "checked_out", "overflow"):
+        registry.register(current(name))
+    registry.register(current("checkouts", CounterCallback))
+    registry.register(current("checkout_wait_seconds_total", CounterCallback))
+    registry.register(current("checkout_wait_seconds_max", aggregate=max))
@@ -2,7 +2,17 @@ from __future__ import annotations
 
 from datetime import datetime
 
-from sqlalchemy import BigInteger, CheckConstraint, DateTime, ForeignKey, Integer, String
+from sqlalchemy import (
+    BigInteger,
+    CheckConstraint,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    UniqueConstraint,
+)
+from sqlalchemy import text as sql_text
 from sqlalchemy.dialects.postgresql import ARRAY, JSONB
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
@@ -37,6 +47,7 @@ class UserChannel(Base):
 
     __table_args__ = (
         CheckConstraint("role IN ('owner','admin','editor','analyst')", name="user_channels_role_chk"),
+        UniqueConstraint("user_id", "channel_id", name="user_channels_user_channel_key"),
     )
 
 
@@ -46,7 +57,9 @@ class Post(Base):
     id: Mapped[int] = mapped_column(primary_key=True)
     author_user_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
     status: Mapped[str] = mapped_column(String(16), default="draft", nullable=False)
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=datetime.utcnow, nullable=False
+    )
     updated_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
     scheduled_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
     channels: Mapped[list[int]] = mapped_column(ARRAY(Integer), nullable=False)
@@ -56,17 +69,55 @@ class Post(Base):
     buttons_json: Mapped[dict | None] = mapped_column(JSONB)
     reactions_json: Mapped[dict | None] = mapped_column(JSONB)
     preview_message_id: Mapped[int | None] = mapped_column(BigInteger)
+    publish_attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    # Channels a failed attempt did not reach; NULL means all of ``channels``.
+    pending_channels: Mapped[list[int] | None] = mapped_column(ARRAY(Integer))
+    # Lease of the scheduler replica that set the post to 'publishing'.
+    claimed_until: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
 
     __table_args__ = (
         CheckConstraint(
-            "status IN ('draft','scheduled','queued','published','deleted')",
+            "status IN ('draft','scheduled','queued','publishing','published','failed','deleted')",
             name="posts_status_chk",
         ),
         CheckConstraint(
             "parse_mode IN ('HTML','Markdown','None')",
             name="posts_parse_mode_chk",
         ),
+        Index(
+            "posts_due_idx",
+            "scheduled_at",
+            postgresql_where=sql_text("status IN ('scheduled','queued')"),
+        ),
+        Index(
+            "posts_publishing_idx",
+            "claimed_until",
+            postgresql_where=sql_text("status = 'publishing'"),
+        ),
+        Index(
+            "posts_author_status_created_idx",
+            "author_user_id",
+            "status",
+            sql_text("created_at DESC"),
+            sql_text("id DESC"),
+        ),
+        Index("posts_channels_gin_idx", "channels", postgresql_using="gin"),
+    )
+
+
+class PostChannelEntry(Base):
+    """A post listed under one of its channels, kept in step by a trigger on ``posts``."""
+
+    __tablename__ = "post_channels"
+
+    channel_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    post_id: Mapped[int] = mapped_column(
+        ForeignKey("posts.id", ondelete="CASCADE"), primary_key=True
     )
+    status: Mapped[str] = mapped_column(String(16), nullable=False)
+
+    __table_args__ = (Index("post_channels_post_idx", "post_id"),)
 
 
 class StatsClick(Base):
@@ -79,6 +130,15 @@ class StatsClick(Base):
     clicks: Mapped[int] = mapped_column(Integer, default=0)
     updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
 
+    __table_args__ = (
+        UniqueConstraint(
+            "post_id",
+            "channel_id",
+            "button_key",
+            name="stats_clicks_post_channel_button_key",
+        ),
+    )
+
 
 class StatsReaction(Base):
     __tablename__ = "stats_reactions"
@@ -90,14 +150,89 @@ class StatsReaction(Base):
     count: Mapped[int] = mapped_column(Integer, default=0)
     updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
 
+    __table_args__ = (
+        UniqueConstraint(
+            "post_id",
+            "channel_id",
+            "emoji",
+            name="stats_reactions_post_channel_emoji_key",
+        ),
+    )
+
+
+class _StatsRollup:
+    channel_id: Mapped[int] = mapped_column(ForeignKey("channels.id"), primary_key=True)
+    bucket_start: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    post_id: Mapped[int] = mapped_column(ForeignKey("posts.id"), primary_key=True)
+    clicks: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+    reactions: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+
+
+class StatsHourly(_StatsRollup, Base):
+    __tablename__ = "stats_hourly"
+
+    __table_args__ = (
+        Index("stats_hourly_post_idx", "post_id", "bucket_start"),
+        Index("stats_hourly_bucket_idx", "bucket_start"),
+    )
+
+
+class StatsDaily(_StatsRollup, Base):
+    __tablename__ = "stats_daily"
+
+    __table_args__ = (Index("stats_daily_post_idx", "post_id", "bucket_start"),)
+
 
 class AuditEntry(Base):
     __tablename__ = "audit"
 
-    id: Mapped[int] = mapped_column(primary_key=True)
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
     user_id: Mapped[int | None] = mapped_column(BigInteger)
     action: Mapped[str] = mapped_column(String(64), nullable=False)
     target_type: Mapped[str | None] = mapped_column(String(32))
     target_id: Mapped[int | None] = mapped_column(BigInteger)
-    ts: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
+    ts: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), primary_key=True, default=datetime.utcnow
+    )
     extra_json: Mapped[dict | None] = mapped_column(JSONB)
+
+    __table_args__ = (
+        Index("audit_ts_idx", "ts"),
+        Index("audit_target_idx", "target_type", "target_id", "ts"),
+        {"postgresql_partition_by": "RANGE (ts)"},
+    )
+
+
+class MediaFile(Base):
+    """Telegram ``file_id`` of media we already uploaded, keyed by SHA-256 of its bytes."""
+
+    __tablename__ = "media_files"
+
+    sha256: Mapped[str] = mapped_column(String(64), primary_key=True)
+    kind: Mapped[str] = mapped_column(String(16), primary_key=True)
+    file_id: Mapped[str] = mapped_column(String(256), nullable=False)
+    size_bytes: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
+    last_used_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=datetime.utcnow
+    )
+
+    __table_args__ = (Index("media_files_last_used_idx", "last_used_at"),)
+
+
+class PublishedMessage(Base):
+    """Telegram message sent for a post in a channel."""
+
+    __tablename__ = "published_messages"
+
+    chat_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    message_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    post_id: Mapped[int] = mapped_column(ForeignKey("posts.id"), nullable=False)
+    channel_id: Mapped[int] = mapped_column(ForeignKey("channels.id"), nullable=False)
+    published_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=datetime.utcnow
+    )
+    # post_content_hash() of the version the message currently shows.
+    content_hash: Mapped[str | None] = mapped_column(String(64))
+
+    __table_args__ = (Index("published_messages_post_idx", "post_id", "channel_id"),)
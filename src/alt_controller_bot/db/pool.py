@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+
+from greenlet import getcurrent
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+@dataclass(slots=True)
+class CheckoutStats:
+    checkouts: int = 0
+    wait_seconds_total: float = 0.0
+    wait_seconds_max: float = 0.0
+
+    def record(self, waited: float) -> None:
+        self.checkouts += 1
+        self.wait_seconds_total += waited
+        if waited > self.wait_seconds_max:
+            self.wait_seconds_max = waited
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waited for a free connection.
+
+    Time spent opening a new connection is not waiting and is left out. Concurrent
+    checkouts run in separate greenlets, so connect time is tracked per greenlet.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkout_stats = CheckoutStats()
+        self._connecting: dict[object, float] = {}
+
+    def _do_get(self):
+        current = getcurrent()
+        if current in self._connecting:
+            # QueuePool retries by calling itself; the outer call does the timing.
+            return super()._do_get()
+        self._connecting[current] = 0.0
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            connecting = self._connecting.pop(current)
+            self.checkout_stats.record(time.perf_counter() - started - connecting)
+
+    def _create_connection(self):
+        started = time.perf_counter()
+        try:
+            return super()._create_connection()
+        finally:
+            current = getcurrent()
+            if current in self._connecting:
+                self._connecting[current] += time.perf_counter() - started
+
+    def recreate(self) -> InstrumentedQueuePool:
+        pool = super().recreate()
+        pool.checkout_stats = self.checkout_stats
+        return pool
+
+    def status_dict(self) -> dict[str, float]:
+        stats = self.checkout_stats
+        return {
+            "size": self.size(),
+            "checked_in": self.checkedin(),
+            "checked_out": self.checkedout(),
+            "overflow": self.overflow(),
+            "checkouts": stats.checkouts,
+            "checkout_wait_seconds_total": stats.wait_seconds_total,
+            "checkout_wait_seconds_max": stats.wait_seconds_max,
+        }
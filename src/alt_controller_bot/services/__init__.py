@@ -1,3 +1,49 @@
-from alt_controller_bot.services import repositories, rbac
+"""Domain services, imported on first access."""
 
-__all__ = ["repositories", "rbac"]
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+__all__ = [
+    "analytics",
+    "audit",
+    "channels",
+    "clicks",
+    "export",
+    "media",
+    "onboarding",
+    "permissions",
+    "publisher",
+    "repositories",
+    "rbac",
+    "reactions",
+    "render",
+    "rollups",
+    "scheduler",
+    "writebehind",
+]
+
+if TYPE_CHECKING:  # pragma: no cover - for type checkers only
+    from alt_controller_bot.services import (
+        analytics,
+        audit,
+        channels,
+        clicks,
+        export,
+        media,
+        onboarding,
+        permissions,
+        publisher,
+        rbac,
+        reactions,
+        render,
+        repositories,
+        rollups,
+        scheduler,
+        writebehind,
+    )
+
+
+def __getattr__(name: str):
+    if name in __all__:
+        return import_module(f"{__name__}.{name}")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
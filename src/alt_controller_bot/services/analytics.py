@@ -0,0 +1,342 @@
+"""Channel analytics over columnar NumPy arrays.
+
+Publications and their accumulated clicks/reactions are bulk-loaded into one row per
+``(channel, post)`` and every report is a handful of vectorised group-bys
+(``np.unique`` + ``np.bincount``). Reports are computed in a process pool so the event
+loop only awaits the database and the result.
+
+Telegram does not expose views to bots, so "CTR" here is clicks per published post.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from itertools import chain
+from datetime import datetime, timezone
+from typing import AsyncIterator, Iterable, Mapping, Sequence
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from alt_controller_bot.services.repositories import (
+    ChannelRepository,
+    PublishedMessageRepository,
+    RollupRepository,
+)
+
+logger = logging.getLogger(__name__)
+
+HOURS = 24
+
+
+@dataclass(slots=True)
+class EngagementFrame:
+    """One row per published ``(channel, post)``; all columns are ``int64`` arrays."""
+
+    channel_id: np.ndarray
+    post_id: np.ndarray
+    published_at: np.ndarray
+    clicks: np.ndarray
+    reactions: np.ndarray
+    _groups: tuple[np.ndarray, np.ndarray] | None = field(default=None, repr=False)
+
+    def __len__(self) -> int:
+        return len(self.channel_id)
+
+    def channel_groups(self) -> tuple[np.ndarray, np.ndarray]:
+        """Sorted distinct channel ids and each row's index into them (computed once)."""
+        if self._groups is None:
+            self._groups = np.unique(self.channel_id, return_inverse=True)
+        return self._groups
+
+    @classmethod
+    def from_rows(
+        cls,
+        publications: Sequence[tuple[int, int, int]],
+        totals: Sequence[tuple[int, int, int, int]],
+    ) -> EngagementFrame:
+        """Left-join ``totals`` onto ``publications`` by ``(channel_id, post_id)``."""
+        return cls.from_arrays(int_matrix(publications, 3), int_matrix(totals, 4))
+
+    @classmethod
+    def from_arrays(cls, published: np.ndarray, counted: np.ndarray) -> EngagementFrame:
+        """``from_rows`` over ``n x 3`` publication and ``n x 4`` total matrices."""
+        channel_id, post_id, published_at = published.T
+        clicks = np.zeros(len(published), dtype=np.int64)
+        reactions = np.zeros(len(published), dtype=np.int64)
+        if len(counted):
+            keys = pair_key(counted[:, 0], counted[:, 1])
+            order = np.argsort(keys)
+            keys = keys[order]
+            wanted = pair_key(channel_id, post_id)
+            position = np.minimum(np.searchsorted(keys, wanted), len(keys) - 1)
+            found = keys[position] == wanted
+            clicks[found] = counted[order[position[found]], 2]
+            reactions[found] = counted[order[position[found]], 3]
+        return cls(
+            channel_id=np.ascontiguousarray(channel_id),
+            post_id=np.ascontiguousarray(post_id),
+            published_at=np.ascontiguousarray(published_at),
+            clicks=clicks,
+            reactions=reactions,
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class ChannelSummary:
+    channel_id: int
+    posts: int
+    clicks: int
+    reactions: int
+    ctr: float
+    reactions_per_post: float
+
+
+@dataclass(frozen=True, slots=True)
+class HourStat:
+    hour: int
+    posts: int
+    engagement: float
+
+
+@dataclass(frozen=True, slots=True)
+class MonthlyComparison:
+    """``clicks``/``reactions``/``posts`` are ``channels x months`` matrices."""
+
+    channel_ids: list[int]
+    months: list[str]
+    posts: np.ndarray
+    clicks: np.ndarray
+    reactions: np.ndarray
+
+
+@dataclass(frozen=True, slots=True)
+class AnalyticsReport:
+    summaries: list[ChannelSummary]
+    best_hours: dict[int, list[HourStat]]
+    monthly: MonthlyComparison
+
+
+def int_matrix(rows: Sequence[Sequence[int]], width: int) -> np.ndarray:
+    # fromiter over the flattened rows is several times faster than np.array(rows).
+    flat = np.fromiter(chain.from_iterable(rows), dtype=np.int64, count=len(rows) * width)
+    return flat.reshape(-1, width)
+
+
+async def collect_matrix(
+    batches: AsyncIterator[Sequence[Sequence[int]]], width: int
+) -> np.ndarray:
+    """Concatenate streamed row batches into one ``int64`` matrix."""
+    parts = [int_matrix(rows, width) async for rows in batches]
+    return np.concatenate(parts) if parts else np.empty((0, width), dtype=np.int64)
+
+
+def pair_key(channel_id: np.ndarray, post_id: np.ndarray) -> np.ndarray:
+    return (channel_id.astype(np.int64) << 32) | post_id.astype(np.int64)
+
+
+def channel_summaries(frame: EngagementFrame) -> list[ChannelSummary]:
+    channels, index = frame.channel_groups()
+    posts = np.bincount(index, minlength=len(channels))
+    clicks = np.bincount(index, weights=frame.clicks, minlength=len(channels))
+    reactions = np.bincount(index, weights=frame.reactions, minlength=len(channels))
+    return [
+        ChannelSummary(
+            channel_id=int(channel_id),
+            posts=int(count),
+            clicks=int(click_sum),
+            reactions=int(reaction_sum),
+            ctr=click_sum / count,
+            reactions_per_post=reaction_sum / count,
+        )
+        for channel_id, count, click_sum, reaction_sum in zip(
+            channels.tolist(), posts.tolist(), clicks.tolist(), reactions.tolist()
+        )
+    ]
+
+
+def best_hours(
+    frame: EngagementFrame,
+    utc_offsets: Mapping[int, int] | None = None,
+    *,
+    top: int = 3,
+) -> dict[int, list[HourStat]]:
+    """Local posting hours with the highest mean clicks + reactions per post.
+
+    ``utc_offsets`` maps channel ids to their offset from UTC in seconds.
+    """
+    channels, index = frame.channel_groups()
+    offsets = np.array([(utc_offsets or {}).get(int(c), 0) for c in channels], dtype=np.int64)
+    hour = ((frame.published_at + offsets[index]) // 3600) % HOURS
+    cell = index * HOURS + hour
+    size = len(channels) * HOURS
+    posts = np.bincount(cell, minlength=size).reshape(-1, HOURS)
+    engagement = np.bincount(
+        cell, weights=frame.clicks + frame.reactions, minlength=size
+    ).reshape(-1, HOURS)
+    mean = np.divide(engagement, posts, out=np.full(engagement.shape, -1.0), where=posts > 0)
+    ranked = np.argsort(-mean, axis=1, kind="stable")[:, :top]
+
+    result: dict[int, list[HourStat]] = {}
+    for row, channel_id in enumerate(channels.tolist()):
+        result[channel_id] = [
+            HourStat(hour=int(h), posts=int(posts[row, h]), engagement=float(mean[row, h]))
+            for h in ranked[row]
+            if posts[row, h]
+        ]
+    return result
+
+
+def monthly_comparison(frame: EngagementFrame) -> MonthlyComparison:
+    months = frame.published_at.astype("datetime64[s]").astype("datetime64[M]").astype(np.int64)
+    channels, channel_index = frame.channel_groups()
+    # Months are small consecutive integers, so an offset replaces a sort-based unique.
+    first = int(months.min()) if len(months) else 0
+    month_index = months - first
+    month_values = np.arange(first, first + int(month_index.max(initial=-1)) + 1)
+    cell = channel_index * len(month_values) + month_index
+    shape = (len(channels), len(month_values))
+    size = shape[0] * shape[1]
+
+    def grid(weights: np.ndarray | None) -> np.ndarray:
+        counts = np.bincount(cell, weights=weights, minlength=size)
+        return counts.astype(np.int64).reshape(shape)
+
+    return MonthlyComparison(
+        channel_ids=channels.tolist(),
+        months=[str(month) for month in month_values.astype("datetime64[M]")],
+        posts=grid(None),
+        clicks=grid(frame.clicks),
+        reactions=grid(frame.reactions),
+    )
+
+
+def engagement_trend(monthly: MonthlyComparison) -> dict[int, float]:
+    """Relative change of clicks + reactions per post from the previous month to the last.
+
+    Only channels that posted, and were engaged with, in both months are included.
+    """
+    if len(monthly.months) < 2:
+        return {}
+    posts = monthly.posts[:, -2:]
+    engagement = (monthly.clicks + monthly.reactions)[:, -2:]
+    per_post = np.divide(engagement, posts, out=np.zeros(posts.shape), where=posts > 0)
+    valid = (posts > 0).all(axis=1) & (per_post[:, 0] > 0)
+    change = np.divide(per_post[:, 1], per_post[:, 0], out=np.ones(len(posts)), where=valid) - 1
+    return {
+        channel_id: value
+        for channel_id, value, ok in zip(monthly.channel_ids, change.tolist(), valid.tolist())
+        if ok
+    }
+
+
+def build_report(
+    frame: EngagementFrame, utc_offsets: Mapping[int, int] | None = None
+) -> AnalyticsReport:
+    return AnalyticsReport(
+        summaries=channel_summaries(frame),
+        best_hours=best_hours(frame, utc_offsets),
+        monthly=monthly_comparison(frame),
+    )
+
+
+def utc_offset(tz: str | None, at: datetime) -> int:
+    try:
+        offset = at.astimezone(ZoneInfo(tz or "UTC")).utcoffset()
+    except (ZoneInfoNotFoundError, ValueError):
+        return 0
+    return int(offset.total_seconds()) if offset else 0
+
+
+async def load_frame(
+    session_factory: async_sessionmaker[AsyncSession],
+    channel_ids: Sequence[int],
+    since: datetime,
+    until: datetime,
+    *,
+    batch_size: int = 50_000,
+) -> tuple[EngagementFrame, dict[int, int]]:
+    """Stream the publications and totals of ``channel_ids`` into a frame.
+
+    Rows are converted batch by batch, so at most ``batch_size`` of them exist as Python
+    tuples at a time.
+    """
+    async with session_factory() as session:
+        published = await collect_matrix(
+            PublishedMessageRepository(session).stream_publications(
+                since, until, channel_ids, batch_size=batch_size
+            ),
+            3,
+        )
+        counted = await collect_matrix(
+            RollupRepository(session).stream_post_totals(
+                since, until, channel_ids, batch_size=batch_size
+            ),
+            4,
+        )
+        channels = await ChannelRepository(session).get_channels(channel_ids)
+    now = datetime.now(timezone.utc)
+    offsets = {channel.id: utc_offset(channel.tz, now) for channel in channels}
+    return EngagementFrame.from_arrays(published, counted), offsets
+
+
+_worker_loop: asyncio.AbstractEventLoop | None = None
+
+
+def _init_worker() -> None:
+    global _worker_loop
+    _worker_loop = asyncio.new_event_loop()
+
+
+def compute_report(
+    channel_ids: list[int], since: datetime, until: datetime, batch_size: int
+) -> AnalyticsReport:
+    """Pool entry point: load the frame with the worker's own engine and report on it.
+
+    The worker keeps one event loop for its lifetime, so its connection pool is reused
+    between reports.
+    """
+    from alt_controller_bot.app import get_app
+
+    async def run() -> AnalyticsReport:
+        frame, offsets = await load_frame(
+            get_app().session_factory, channel_ids, since, until, batch_size=batch_size
+        )
+        return build_report(frame, offsets)
+
+    return _worker_loop.run_until_complete(run())
+
+
+class AnalyticsService:
+    """Builds reports in a process pool; each worker loads its data from the database."""
+
+    def __init__(self, *, max_workers: int = 2, batch_size: int = 50_000):
+        self.max_workers = max_workers
+        self.batch_size = batch_size
+        self._executor: ProcessPoolExecutor | None = None
+
+    async def start(self) -> None:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+            )
+
+    async def stop(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def report(
+        self, channel_ids: Iterable[int], since: datetime, until: datetime
+    ) -> AnalyticsReport:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, compute_report, list(channel_ids), since, until, self.batch_size
+        )
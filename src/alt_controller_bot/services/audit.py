@@ -0,0 +1,267 @@
+from __future__ import annotations
+
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import uuid
+from contextlib import suppress
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Any, TextIO
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from alt_controller_bot.services.repositories import AuditRepository
+
+logger = logging.getLogger(__name__)
+
+
+class AuditSink:
+    """Non-blocking audit log writer.
+
+    ``log()`` only enqueues; a background task writes entries in batches of up to
+    ``batch_size`` with one executemany. ``stop()`` lets it write everything still queued,
+    for up to ``shutdown_timeout`` seconds. Entries that can't be written (the queue is
+    full, a write failed, shutdown timed out) are appended to this process's spill file
+    (JSON lines), or dropped if no ``spill_path`` is configured.
+
+    Each process spills to its own file next to ``spill_path`` (``audit.<pid>-<id>.jsonl``
+    for ``audit.jsonl``) and holds an ``flock`` on it while running. On start, every spill
+    file whose lock can be taken, i.e. whose process is gone, is replayed in one
+    transaction and deleted.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        *,
+        maxsize: int = 10_000,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        spill_path: Path | None = None,
+        shutdown_timeout: float = 10.0,
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.spill_path = spill_path
+        self.shutdown_timeout = shutdown_timeout
+        self.dropped = 0
+        self._queue: asyncio.Queue[dict[str, Any]] = asyncio.Queue(maxsize=maxsize)
+        self._task: asyncio.Task[None] | None = None
+        self._wakeup = asyncio.Event()
+        self._closing = asyncio.Event()
+        self._spill_file: TextIO | None = None
+
+    def log(
+        self,
+        *,
+        user_id: int | None,
+        action: str,
+        target_type: str | None = None,
+        target_id: int | None = None,
+        extra_json: dict | None = None,
+    ) -> None:
+        entry = {
+            "user_id": user_id,
+            "action": action,
+            "target_type": target_type,
+            "target_id": target_id,
+            "extra_json": extra_json,
+            "ts": datetime.now(timezone.utc),
+        }
+        if self._task is None and self._closing.is_set():
+            # Logged by a service that shuts down after the sink; nothing would write it.
+            self._spill([entry])
+            return
+        try:
+            self._queue.put_nowait(entry)
+        except asyncio.QueueFull:
+            self._spill([entry])
+            return
+        self._wakeup.set()
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._closing.clear()
+            await self._replay_spills()
+            self._task = asyncio.create_task(self._run(), name="audit-sink")
+
+    async def stop(self) -> None:
+        """Write what is still queued; whatever misses ``shutdown_timeout`` is spilled."""
+        if self._task is not None:
+            self._closing.set()
+            self._wakeup.set()
+            try:
+                await asyncio.wait_for(asyncio.shield(self._task), timeout=self.shutdown_timeout)
+            except asyncio.TimeoutError:
+                logger.warning("Audit sink did not drain in %ss", self.shutdown_timeout)
+                self._task.cancel()
+                with suppress(asyncio.CancelledError):
+                    await self._task
+            self._task = None
+        if not self._queue.empty():
+            self._spill(self._drain(self._queue.qsize()))
+        if self._spill_file is not None:
+            self._spill_file.close()
+            self._spill_file = None
+
+    def _drain(self, limit: int) -> list[dict[str, Any]]:
+        batch = []
+        while len(batch) < limit and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _write(self, batch: list[dict[str, Any]]) -> None:
+        async with self.session_factory() as session, session.begin():
+            await AuditRepository(session).log_many(batch)
+
+    async def _run(self) -> None:
+        while True:
+            if self._queue.empty():
+                if self._closing.is_set():
+                    return
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            # Give a burst a moment to accumulate so it goes out as one batch. Entries
+            # stay queued meanwhile, so a cancelled sink still has them for ``stop()``.
+            if self._queue.qsize() < self.batch_size and not self._closing.is_set():
+                with suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(self._closing.wait(), timeout=self.flush_interval)
+            batch = self._drain(self.batch_size)
+            try:
+                await self._write(batch)
+            except asyncio.CancelledError:
+                self._spill(batch)
+                raise
+            except Exception:
+                logger.exception("Failed to write %d audit entries", len(batch))
+                self._spill(batch)
+
+    def _spill(self, entries: list[dict[str, Any]]) -> None:
+        if self.spill_path is None:
+            self.dropped += len(entries)
+            logger.warning("Audit entries could not be written, dropped %d", len(entries))
+            return
+        if self._spill_file is None:
+            path = self.spill_path.with_name(
+                f"{self.spill_path.stem}.{os.getpid()}-{uuid.uuid4().hex[:8]}"
+                f"{self.spill_path.suffix}"
+            )
+            self._spill_file = path.open("a", encoding="utf-8")
+            fcntl.flock(self._spill_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        for entry in entries:
+            self._spill_file.write(json.dumps({**entry, "ts": entry["ts"].isoformat()}) + "\n")
+        self._spill_file.flush()
+
+    def _spill_files(self) -> list[Path]:
+        path = self.spill_path
+        if path is None or not path.parent.is_dir():
+            return []
+        return sorted(
+            candidate
+            for candidate in path.parent.iterdir()
+            if candidate.name in (path.name, f"{path.name}.replay")
+            or (
+                candidate.name.startswith(f"{path.stem}.")
+                and candidate.name.endswith(path.suffix)
+            )
+        )
+
+    async def _replay_spills(self) -> None:
+        for path in self._spill_files():
+            await self._replay(path)
+
+    async def _replay(self, path: Path) -> None:
+        try:
+            fh = path.open(encoding="utf-8")
+        except FileNotFoundError:
+            return
+        with fh:
+            try:
+                fcntl.flock(fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return  # its process is still running, or another one is replaying it
+            try:
+                if os.stat(path).st_ino != os.fstat(fh.fileno()).st_ino:
+                    return  # replayed and deleted before we got the lock
+            except FileNotFoundError:
+                return
+            entries = []
+            for line in fh:
+                if not line.strip():
+                    continue
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A line cut short by a crash; the rest of the file is still good.
+                    logger.warning("Skipping a malformed audit line in %s", path)
+                    continue
+                entry["ts"] = datetime.fromisoformat(entry["ts"])
+                entries.append(entry)
+            try:
+                # One transaction, so a failed replay can be retried without duplicating rows.
+                async with self.session_factory() as session, session.begin():
+                    repo = AuditRepository(session)
+                    for offset in range(0, len(entries), self.batch_size):
+                        await repo.log_many(entries[offset : offset + self.batch_size])
+            except Exception:
+                logger.exception("Failed to replay spilled audit entries from %s", path)
+                return
+            path.unlink()
+            logger.info("Replayed %d spilled audit entries from %s", len(entries), path)
+
+
+def add_months(month_start: date, months: int) -> date:
+    index = month_start.year * 12 + month_start.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+class AuditPartitionMaintainer:
+    """Creates upcoming monthly ``audit`` partitions and drops those past retention."""
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        *,
+        retention_months: int = 12,
+        months_ahead: int = 2,
+        interval: float = 6 * 3600.0,
+    ):
+        self.session_factory = session_factory
+        self.retention_months = retention_months
+        self.months_ahead = months_ahead
+        self.interval = interval
+        self._task: asyncio.Task[None] | None = None
+
+    async def maintain(self) -> list[str]:
+        current = datetime.now(timezone.utc).date().replace(day=1)
+        async with self.session_factory() as session, session.begin():
+            repo = AuditRepository(session)
+            for offset in range(self.months_ahead + 1):
+                await repo.ensure_partition(add_months(current, offset))
+            return await repo.drop_partitions_before(add_months(current, -self.retention_months))
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="audit-partitions")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                dropped = await self.maintain()
+                if dropped:
+                    logger.info("Dropped audit partitions: %s", ", ".join(dropped))
+            except Exception:
+                logger.exception("Audit partition maintenance failed")
+            await asyncio.sleep(self.interval)
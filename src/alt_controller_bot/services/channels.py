@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import sys
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Iterable, Mapping
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from alt_controller_bot.core.config import ChannelDefaults
+from alt_controller_bot.db import models
+from alt_controller_bot.services.invalidation import InvalidationBus
+from alt_controller_bot.services.repositories import CHANGED_CHANNELS_KEY, ChannelRepository
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class ChannelSnapshot:
+    """Immutable copy of a channel row with ``ChannelDefaults`` applied."""
+
+    id: int
+    tg_chat_id: int
+    username: str | None
+    title: str
+    tz: str
+    post_interval_min: int
+    default_reactions: tuple[str, ...]
+    footer: str | None
+    settings: Mapping[str, Any]
+    version: int
+
+    @classmethod
+    def from_model(
+        cls, channel: models.Channel, defaults: ChannelDefaults, version: int
+    ) -> ChannelSnapshot:
+        settings = channel.settings_json or {}
+        return cls(
+            id=channel.id,
+            tg_chat_id=channel.tg_chat_id,
+            username=channel.username,
+            title=channel.title,
+            # A few distinct zones are shared by hundreds of channels.
+            tz=sys.intern(channel.tz or defaults.timezone),
+            post_interval_min=channel.post_interval_min or defaults.post_interval_minutes,
+            default_reactions=tuple(
+                settings.get("default_reactions") or defaults.default_reactions
+            ),
+            footer=settings.get("footer", defaults.footer),
+            settings=MappingProxyType(dict(settings)),
+            version=version,
+        )
+
+
+class ChannelRegistry:
+    """Per-process map of every channel, keyed by id and by Telegram chat id.
+
+    All channels are loaded on start. Bound to an ``InvalidationBus``, commits that went
+    through ``ChannelRepository.upsert_channel`` are applied right after the commit, and
+    other processes reload just the announced channels; after a pub/sub reconnect
+    everything is reloaded, since announcements may have been missed. Reloads run one at a
+    time, in the order the changes arrived. ``version`` grows with every applied change
+    and is stamped on the new snapshots.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        *,
+        defaults: ChannelDefaults | None = None,
+    ):
+        self.session_factory = session_factory
+        self.defaults = defaults or ChannelDefaults()
+        self.version = 0
+        self._by_id: dict[int, ChannelSnapshot] = {}
+        self._by_chat: dict[int, ChannelSnapshot] = {}
+        self._reload_lock = asyncio.Lock()
+        self._reloads: set[asyncio.Task[None]] = set()
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def ids(self) -> list[int]:
+        return list(self._by_id)
+
+    def get(self, channel_id: int) -> ChannelSnapshot | None:
+        return self._by_id.get(channel_id)
+
+    def by_chat_id(self, tg_chat_id: int) -> ChannelSnapshot | None:
+        return self._by_chat.get(tg_chat_id)
+
+    def get_many(self, channel_ids: Iterable[int]) -> dict[int, ChannelSnapshot]:
+        by_id = self._by_id
+        return {channel_id: by_id[channel_id] for channel_id in channel_ids if channel_id in by_id}
+
+    def apply(self, channels: Iterable[models.Channel]) -> None:
+        self.version += 1
+        for channel in channels:
+            snapshot = ChannelSnapshot.from_model(channel, self.defaults, self.version)
+            previous = self._by_id.get(snapshot.id)
+            if previous is not None and previous.tg_chat_id != snapshot.tg_chat_id:
+                self._by_chat.pop(previous.tg_chat_id, None)
+            self._by_id[snapshot.id] = snapshot
+            self._by_chat[snapshot.tg_chat_id] = snapshot
+
+    def remove(self, channel_id: int) -> None:
+        snapshot = self._by_id.pop(channel_id, None)
+        if snapshot is not None:
+            self._by_chat.pop(snapshot.tg_chat_id, None)
+            self.version += 1
+
+    async def reload(self, channel_ids: Iterable[int] | None = None) -> None:
+        """Reload ``channel_ids`` (every channel if ``None``) from the database."""
+        async with self._reload_lock:
+            await self._reload(channel_ids)
+
+    async def _reload(self, channel_ids: Iterable[int] | None) -> None:
+        async with self.session_factory() as session:
+            repo = ChannelRepository(session)
+            if channel_ids is None:
+                channels = await repo.get_all_channels()
+            else:
+                channel_ids = set(channel_ids)
+                channels = await repo.get_channels(channel_ids)
+        if channel_ids is None:
+            self._by_id.clear()
+            self._by_chat.clear()
+        else:
+            for channel_id in channel_ids - {channel.id for channel in channels}:
+                self.remove(channel_id)
+        self.apply(channels)
+
+    async def start(self) -> None:
+        # Bound to the bus before this, so changes committed while loading are reloaded
+        # after the load instead of being lost.
+        await self.reload()
+        logger.info("Loaded %s channels", len(self._by_id))
+
+    async def stop(self) -> None:
+        for task in self._reloads:
+            task.cancel()
+        if self._reloads:
+            await asyncio.wait(self._reloads)
+
+    def bind(self, bus: InvalidationBus) -> None:
+        bus.subscribe(CHANGED_CHANNELS_KEY, self.channels_changed)
+
+    def unbind(self, bus: InvalidationBus) -> None:
+        bus.unsubscribe(CHANGED_CHANNELS_KEY, self.channels_changed)
+
+    def channels_changed(self, changed: Iterable[int] | None) -> None:
+        if isinstance(changed, Mapping):
+            # A local commit hands over the committed rows, keyed by id.
+            self.apply(changed.values())
+            if not self._reload_lock.locked():
+                return
+            # A reload in flight may have read the rows before this commit.
+            changed = list(changed)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        task = loop.create_task(self._reload_logged(changed))
+        self._reloads.add(task)
+        task.add_done_callback(self._reloads.discard)
+
+    async def _reload_logged(self, channel_ids: Iterable[int] | None) -> None:
+        try:
+            await self.reload(channel_ids)
+        except Exception:
+            logger.exception("Failed to reload changed channels %s", channel_ids)
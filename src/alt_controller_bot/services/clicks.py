@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from alt_controller_bot.services.repositories import ClickKey, StatsRepository
+from alt_controller_bot.services.writebehind import WriteBehindBuffer
+
+
+class ClickAggregator(WriteBehindBuffer[ClickKey, int]):
+    """Write-behind buffer for button clicks.
+
+    Clicks are summed in memory per ``(post_id, channel_id, button_key)`` and written
+    with a single bulk upsert every ``flush_interval`` seconds, or earlier once
+    ``max_pending_keys`` distinct counters are waiting. The deltas of a failed flush are
+    added back.
+    """
+
+    task_name = "click-aggregator"
+    entries = "click counters"
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        *,
+        flush_interval: float = 5.0,
+        max_pending_keys: int = 1000,
+        shutdown_timeout: float = 10.0,
+    ):
+        super().__init__(
+            session_factory,
+            flush_interval=flush_interval,
+            max_pending=max_pending_keys,
+            shutdown_timeout=shutdown_timeout,
+        )
+
+    def add(self, post_id: int, channel_id: int, button_key: str, value: int = 1) -> None:
+        key = (post_id, channel_id, button_key)
+        self._pending[key] = self._pending.get(key, 0) + value
+        self._added()
+
+    async def _write(self, batch: dict[ClickKey, int]) -> int:
+        async with self.session_factory() as session, session.begin():
+            await StatsRepository(session).add_clicks(batch)
+        return len(batch)
+
+    def _restore(self, batch: dict[ClickKey, int]) -> None:
+        for key, value in batch.items():
+            self._pending[key] = self._pending.get(key, 0) + value
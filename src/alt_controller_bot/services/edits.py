@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections.abc import Iterable
+from contextlib import suppress
+from dataclasses import dataclass
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramAPIError, TelegramBadRequest, TelegramRetryAfter
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from alt_controller_bot.core import metrics
+from alt_controller_bot.services.invalidation import InvalidationBus
+from alt_controller_bot.services.media import parse_media
+from alt_controller_bot.services.publisher import PostPublisher
+from alt_controller_bot.services.render import PostRenderer, RenderedPost
+from alt_controller_bot.services.repositories import (
+    CHANGED_POSTS_KEY,
+    MessageKey,
+    PostRepository,
+    PublishedMessageRepository,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def is_not_modified(exc: TelegramBadRequest) -> bool:
+    return "message is not modified" in exc.message.lower()
+
+
+@dataclass(slots=True)
+class _PendingEdit:
+    first: float
+    last: float
+    changes: int = 1
+
+
+class EditPropagator:
+    """Carries post edits over to the messages already published for the post.
+
+    Commits in which ``PostRepository.update_post`` touched a post, in any process, reach
+    it through the ``InvalidationBus`` it is bound to and schedule the post; further
+    changes within ``debounce`` seconds push the edit back, up to ``max_delay`` seconds
+    after the first one, so a burst of edits costs one API call per published message.
+    Messages whose stored ``content_hash`` matches the current version are skipped.
+    Edits run ``concurrency`` at a time and take send slots from the publisher's token
+    buckets, so they share its global and per-chat flood limits.
+    """
+
+    def __init__(
+        self,
+        bot: Bot,
+        session_factory: async_sessionmaker[AsyncSession],
+        publisher: PostPublisher,
+        *,
+        renderer: PostRenderer | None = None,
+        debounce: float = 5.0,
+        max_delay: float = 60.0,
+        concurrency: int = 8,
+        max_attempts: int = 3,
+        shutdown_timeout: float = 10.0,
+    ):
+        self.bot = bot
+        self.session_factory = session_factory
+        self.publisher = publisher
+        self.renderer = renderer or publisher.renderer
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.max_attempts = max_attempts
+        self.shutdown_timeout = shutdown_timeout
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._pending: dict[int, _PendingEdit] = {}
+        self._tasks: dict[int, asyncio.Task[None]] = {}
+        self._closing = asyncio.Event()
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def schedule(self, post_id: int) -> None:
+        now = time.monotonic()
+        pending = self._pending.get(post_id)
+        if pending is None:
+            self._pending[post_id] = _PendingEdit(first=now, last=now)
+        else:
+            pending.last = now
+            pending.changes += 1
+        if post_id not in self._tasks:
+            self._tasks[post_id] = asyncio.get_running_loop().create_task(
+                self._run(post_id), name=f"post-edit-{post_id}"
+            )
+
+    async def start(self) -> None:
+        self._closing.clear()
+
+    async def stop(self) -> None:
+        """Propagate every pending edit right away and wait for them."""
+        self._closing.set()
+        if self._tasks:
+            await asyncio.wait(list(self._tasks.values()), timeout=self.shutdown_timeout)
+
+    def bind(self, bus: InvalidationBus) -> None:
+        bus.subscribe(CHANGED_POSTS_KEY, self.posts_changed)
+
+    def unbind(self, bus: InvalidationBus) -> None:
+        bus.unsubscribe(CHANGED_POSTS_KEY, self.posts_changed)
+
+    def posts_changed(self, post_ids: Iterable[int] | None) -> None:
+        # ``None`` follows a pub/sub reconnect; edits missed meanwhile are not replayed.
+        if not post_ids:
+            return
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        for post_id in post_ids:
+            self.schedule(post_id)
+
+    async def _run(self, post_id: int) -> None:
+        try:
+            # Changes made while an edit is in flight are picked up by the next round.
+            while (pending := self._pending.get(post_id)) is not None:
+                deadline = min(pending.last + self.debounce, pending.first + self.max_delay)
+                delay = deadline - time.monotonic()
+                if delay > 0 and not self._closing.is_set():
+                    with suppress(asyncio.TimeoutError):
+                        await asyncio.wait_for(self._closing.wait(), timeout=delay)
+                    continue
+                del self._pending[post_id]
+                try:
+                    await self.propagate(post_id, changes=pending.changes)
+                except Exception:
+                    logger.exception("Failed to propagate edits of post %s", post_id)
+        finally:
+            self._tasks.pop(post_id, None)
+
+    async def propagate(self, post_id: int, *, changes: int = 1) -> int:
+        """Edit the published messages of ``post_id`` that are behind; returns edits made."""
+        async with self.session_factory() as session:
+            post = await PostRepository(session).get_post(post_id)
+            messages = await PublishedMessageRepository(session).for_post(post_id) if post else []
+        if not messages:
+            return 0
+
+        rendered = self.renderer.render(post)
+        media_count = len(parse_media(post.media_json))
+        stale = [message for message in messages if message[3] != rendered.content_hash]
+        # Each coalesced change would otherwise have edited every message once.
+        metrics.POST_EDITS.inc("coalesced", amount=(changes - 1) * len(messages))
+        metrics.POST_EDITS.inc("unchanged", amount=len(messages) - len(stale))
+        if not stale:
+            return 0
+
+        results = await asyncio.gather(
+            *(
+                self._edit(rendered, media_count, chat_id, message_id, channel_id)
+                for chat_id, message_id, channel_id, _ in stale
+            )
+        )
+        edited: list[MessageKey] = [
+            (chat_id, message_id)
+            for (chat_id, message_id, _, _), ok in zip(stale, results)
+            if ok
+        ]
+        metrics.POST_EDITS.inc("failed", amount=len(stale) - len(edited))
+        if edited:
+            async with self.session_factory() as session, session.begin():
+                await PublishedMessageRepository(session).set_content_hash(
+                    edited, rendered.content_hash
+                )
+        return len(edited)
+
+    async def _edit(
+        self,
+        rendered: RenderedPost,
+        media_count: int,
+        chat_id: int,
+        message_id: int,
+        channel_id: int,
+    ) -> bool:
+        async with self._semaphore:
+            for _ in range(self.max_attempts):
+                bucket = await self.publisher.acquire(chat_id)
+                try:
+                    await self._deliver(rendered, media_count, chat_id, message_id, channel_id)
+                except TelegramRetryAfter as exc:
+                    bucket.block(exc.retry_after)
+                    continue
+                except TelegramBadRequest as exc:
+                    if is_not_modified(exc):
+                        metrics.POST_EDITS.inc("unchanged")
+                        return True
+                    logger.warning(
+                        "Failed to edit message %s in chat %s: %s", message_id, chat_id, exc
+                    )
+                    return False
+                except TelegramAPIError as exc:
+                    logger.warning(
+                        "Failed to edit message %s in chat %s: %s", message_id, chat_id, exc
+                    )
+                    return False
+                metrics.POST_EDITS.inc("sent")
+                return True
+        return False
+
+    async def _deliver(
+        self,
+        rendered: RenderedPost,
+        media_count: int,
+        chat_id: int,
+        message_id: int,
+        channel_id: int,
+    ) -> None:
+        if not media_count:
+            await self.bot.edit_message_text(
+                text=rendered.text,
+                chat_id=chat_id,
+                message_id=message_id,
+                parse_mode=rendered.parse_mode,
+                reply_markup=rendered.keyboard(channel_id),
+            )
+        elif media_count == 1:
+            await self.bot.edit_message_caption(
+                chat_id=chat_id,
+                message_id=message_id,
+                caption=rendered.caption,
+                parse_mode=rendered.parse_mode,
+                reply_markup=rendered.keyboard(channel_id),
+            )
+        else:
+            # Only the first message of a media group is recorded; it carries the caption
+            # and no keyboard.
+            await self.bot.edit_message_caption(
+                chat_id=chat_id,
+                message_id=message_id,
+                caption=rendered.caption,
+                parse_mode=rendered.parse_mode,
+            )
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import csv
+import io
+from dataclasses import dataclass
+from datetime import datetime
+from typing import AsyncIterator
+
+from sqlalchemy import CompoundSelect, Select, literal, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from alt_controller_bot.db import models
+
+CSV_HEADER = ("kind", "post_id", "channel_id", "key", "value", "updated_at")
+
+
+@dataclass(frozen=True, slots=True)
+class StatsExportFilter:
+    channel_id: int | None = None
+    since: datetime | None = None
+    until: datetime | None = None
+
+
+def _apply_filters(
+    stmt: Select,
+    model: type[models.StatsClick] | type[models.StatsReaction],
+    filters: StatsExportFilter,
+) -> Select:
+    if filters.channel_id is not None:
+        stmt = stmt.where(model.channel_id == filters.channel_id)
+    if filters.since is not None:
+        stmt = stmt.where(model.updated_at >= filters.since)
+    if filters.until is not None:
+        stmt = stmt.where(model.updated_at < filters.until)
+    return stmt
+
+
+def stats_export_query(filters: StatsExportFilter) -> CompoundSelect:
+    clicks = select(
+        literal("click").label("kind"),
+        models.StatsClick.post_id,
+        models.StatsClick.channel_id,
+        models.StatsClick.button_key.label("key"),
+        models.StatsClick.clicks.label("value"),
+        models.StatsClick.updated_at,
+    )
+    reactions = select(
+        literal("reaction").label("kind"),
+        models.StatsReaction.post_id,
+        models.StatsReaction.channel_id,
+        models.StatsReaction.emoji.label("key"),
+        models.StatsReaction.count.label("value"),
+        models.StatsReaction.updated_at,
+    )
+    # No ORDER BY: sorting millions of rows server-side would defeat streaming.
+    return union_all(
+        _apply_filters(clicks, models.StatsClick, filters),
+        _apply_filters(reactions, models.StatsReaction, filters),
+    )
+
+
+async def stream_stats_rows(
+    session: AsyncSession,
+    filters: StatsExportFilter,
+    *,
+    batch_size: int = 5000,
+) -> AsyncIterator[tuple]:
+    """Yield export rows through a server-side cursor, ``batch_size`` rows per fetch."""
+    stmt = stats_export_query(filters).execution_options(yield_per=batch_size)
+    result = await session.stream(stmt)
+    async for partition in result.partitions():
+        for row in partition:
+            yield tuple(row)
+
+
+async def stream_stats_csv(
+    session_factory: async_sessionmaker[AsyncSession],
+    filters: StatsExportFilter,
+    *,
+    batch_size: int = 5000,
+) -> AsyncIterator[bytes]:
+    """Encode the stats export as CSV chunks of roughly ``batch_size`` rows each."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_HEADER)
+    pending = 0
+    async with session_factory() as session:
+        async for kind, post_id, channel_id, key, value, updated_at in stream_stats_rows(
+            session, filters, batch_size=batch_size
+        ):
+            writer.writerow(
+                (kind, post_id, channel_id, key, value, updated_at.isoformat() if updated_at else "")
+            )
+            pending += 1
+            if pending >= batch_size:
+                yield buffer.getvalue().encode("utf-8")
+                buffer.seek(0)
+                buffer.truncate()
+                pending = 0
+    yield buffer.getvalue().encode("utf-8")
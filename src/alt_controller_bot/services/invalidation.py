@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import uuid
+from collections import defaultdict
+from contextlib import suppress
+from typing import Callable, Collection, Iterable
+
+from redis.asyncio import Redis
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "cache:invalidate"
+# How long ``start`` waits for the subscription before letting the caller go on.
+SUBSCRIBE_TIMEOUT = 5.0
+
+# Called with the changed ids, or with ``None`` when anything may have changed. Local
+# commits hand over the collection stored in ``session.info`` as is: a set of ids, or a
+# mapping keyed by id.
+InvalidationHandler = Callable[[Collection[int] | None], None]
+
+
+class InvalidationBus:
+    """Fans the ids collected in ``session.info`` out to caches in every process.
+
+    After a commit the ids stored under each of ``keys`` are popped from the session,
+    handed to the handlers subscribed to that key and announced on a Redis pub/sub
+    channel; other processes hand them to their own handlers. After a pub/sub reconnect
+    every handler is called with ``None``, since announcements may have been missed.
+    Without ``redis`` the bus only dispatches locally.
+    """
+
+    def __init__(
+        self,
+        redis: Redis | None,
+        keys: Iterable[str],
+        *,
+        channel: str = INVALIDATION_CHANNEL,
+    ):
+        self.redis = redis
+        self.keys = tuple(keys)
+        self.channel = channel
+        self._origin = uuid.uuid4().hex
+        self._handlers: defaultdict[str, list[InvalidationHandler]] = defaultdict(list)
+        self._task: asyncio.Task[None] | None = None
+        self._subscribed = asyncio.Event()
+        self._publishes: set[asyncio.Task[None]] = set()
+
+    def subscribe(self, key: str, handler: InvalidationHandler) -> None:
+        if key not in self.keys:
+            raise ValueError(f"{key!r} is not announced by this bus")
+        self._handlers[key].append(handler)
+
+    def unsubscribe(self, key: str, handler: InvalidationHandler) -> None:
+        with suppress(ValueError):
+            self._handlers[key].remove(handler)
+
+    def dispatch(self, key: str, ids: Collection[int] | None) -> None:
+        for handler in self._handlers.get(key, ()):
+            try:
+                handler(ids)
+            except Exception:
+                logger.exception("Invalidation handler for %s failed", key)
+
+    async def start(self) -> None:
+        """Start listening; returns once subscribed, so caches may be loaded right after."""
+        if self.redis is None or self._task is not None:
+            return
+        self._task = asyncio.create_task(self._listen(), name="invalidation-bus")
+        subscribed = asyncio.ensure_future(self._subscribed.wait())
+        await asyncio.wait({subscribed, self._task}, timeout=SUBSCRIBE_TIMEOUT)
+        subscribed.cancel()
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+            self._subscribed.clear()
+        if self._publishes:
+            await asyncio.wait(self._publishes, timeout=5)
+
+    def bind_session_events(self) -> None:
+        if event.contains(Session, "after_commit", self._after_commit):
+            return
+        event.listen(Session, "after_commit", self._after_commit)
+
+    def unbind_session_events(self) -> None:
+        if event.contains(Session, "after_commit", self._after_commit):
+            event.remove(Session, "after_commit", self._after_commit)
+
+    def _after_commit(self, session: Session) -> None:
+        # Popped, so a reused session does not report the same ids again.
+        changed = {key: ids for key in self.keys if (ids := session.info.pop(key, None))}
+        if not changed:
+            return
+        for key, ids in changed.items():
+            self.dispatch(key, ids)
+        if self.redis is None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        for key, ids in changed.items():
+            task = loop.create_task(self._announce(key, sorted(ids)))
+            self._publishes.add(task)
+            task.add_done_callback(self._publishes.discard)
+
+    async def _announce(self, key: str, ids: list[int]) -> None:
+        message = json.dumps({"origin": self._origin, "key": key, "ids": ids})
+        try:
+            await self.redis.publish(self.channel, message)
+        except Exception:
+            logger.exception("Failed to announce changed %s %s", key, ids)
+
+    async def _listen(self) -> None:
+        first = True
+        while True:
+            pubsub = self.redis.pubsub()
+            try:
+                await pubsub.subscribe(self.channel)
+                self._subscribed.set()
+                if not first:
+                    for key in self.keys:
+                        self.dispatch(key, None)
+                first = False
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    payload = json.loads(message["data"])
+                    if payload.get("origin") != self._origin and payload["key"] in self.keys:
+                        self.dispatch(payload["key"], set(payload["ids"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Invalidation listener failed, resubscribing")
+                await asyncio.sleep(1)
+            finally:
+                with suppress(Exception):
+                    await pubsub.aclose()
@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import logging
+import time
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Iterable
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from alt_controller_bot.core.callbacks import decode_varints, encode_varints
+from alt_controller_bot.db import models
+from alt_controller_bot.services.invalidation import InvalidationBus
+from alt_controller_bot.services.repositories import CHANGED_POSTS_KEY, PostRepository
+
+logger = logging.getLogger(__name__)
+
+# Unknown post ids are remembered this long so junk tokens do not reach the database.
+MISSING_TTL = 60.0
+
+
+def link_token(post_id: int, channel_id: int, index: int) -> str:
+    """URL-safe token for the ``index``-th button of a post in a channel."""
+    return urlsafe_b64encode(encode_varints((post_id, channel_id, index))).rstrip(b"=").decode()
+
+
+def parse_link_token(token: str) -> tuple[int, int, int]:
+    try:
+        values = decode_varints(urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+    except (ValueError, TypeError) as exc:
+        raise ValueError(f"Malformed link token {token!r}") from exc
+    if len(values) != 3:
+        raise ValueError(f"Malformed link token {token!r}")
+    return values[0], values[1], values[2]
+
+
+def button_key(button: dict, index: int) -> str:
+    return button.get("key") or f"b{index}"
+
+
+@dataclass(frozen=True, slots=True)
+class TrackedLink:
+    post_id: int
+    channel_id: int
+    button_key: str
+    target_url: str
+
+
+def post_links(post: models.Post) -> dict[str, TrackedLink]:
+    """Tokens of every URL button of ``post`` in every one of its channels."""
+    buttons = (post.buttons_json or {}).get("buttons") or []
+    return {
+        link_token(post.id, channel_id, index): TrackedLink(
+            post_id=post.id,
+            channel_id=channel_id,
+            button_key=button_key(button, index),
+            target_url=button["url"],
+        )
+        for index, button in enumerate(buttons)
+        if button.get("url")
+        for channel_id in post.channels
+    }
+
+
+class LinkResolver:
+    """In-memory ``token -> TrackedLink`` map for the redirect endpoint.
+
+    Preloaded from recently published posts; a token of any other post loads that post
+    once and adds all of its links. The map keeps at most ``maxsize`` links, evicting the
+    least recently added posts. ``invalidate`` drops changed posts so their next token
+    reloads them; ``bind`` wires it to an ``InvalidationBus`` so commits made by any
+    process reach it.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        *,
+        maxsize: int = 100_000,
+    ):
+        self.session_factory = session_factory
+        self.maxsize = maxsize
+        self._links: dict[str, TrackedLink] = {}
+        self._posts: OrderedDict[int, tuple[str, ...]] = OrderedDict()
+        self._missing: dict[int, float] = {}
+        self._generation = 0
+
+    def __len__(self) -> int:
+        return len(self._links)
+
+    def get(self, token: str) -> TrackedLink | None:
+        return self._links.get(token)
+
+    async def preload(self, limit: int) -> int:
+        async with self.session_factory() as session:
+            posts = await PostRepository(session).list_published_with_buttons(limit)
+        for post in reversed(posts):
+            self.add_post(post)
+        logger.info("Preloaded %s tracked links from %s posts", len(self._links), len(posts))
+        return len(self._links)
+
+    async def resolve(self, token: str) -> TrackedLink | None:
+        link = self._links.get(token)
+        if link is not None:
+            return link
+        try:
+            post_id, _, _ = parse_link_token(token)
+        except ValueError:
+            return None
+        now = time.monotonic()
+        if self._missing.get(post_id, 0.0) > now or post_id in self._posts:
+            return None
+
+        generation = self._generation
+        async with self.session_factory() as session:
+            post = await session.get(models.Post, post_id)
+        if generation != self._generation:
+            # Invalidated while loading: answer from the row, but don't cache what may
+            # already be stale.
+            return post_links(post).get(token) if post is not None else None
+        if post is None:
+            self._missing[post_id] = now + MISSING_TTL
+            if len(self._missing) > self.maxsize:
+                self._missing = {key: ts for key, ts in self._missing.items() if ts > now}
+            return None
+        self.add_post(post)
+        return self._links.get(token)
+
+    def invalidate(self, post_ids: Iterable[int] | None = None) -> None:
+        """Forget ``post_ids`` (every post if ``None``); they are reloaded on demand."""
+        self._generation += 1
+        if post_ids is None:
+            self._links.clear()
+            self._posts.clear()
+            self._missing.clear()
+            return
+        for post_id in post_ids:
+            self.remove_post(post_id)
+            self._missing.pop(post_id, None)
+
+    def bind(self, bus: InvalidationBus) -> None:
+        bus.subscribe(CHANGED_POSTS_KEY, self.invalidate)
+
+    def unbind(self, bus: InvalidationBus) -> None:
+        bus.unsubscribe(CHANGED_POSTS_KEY, self.invalidate)
+
+    def add_post(self, post: models.Post) -> None:
+        self.remove_post(post.id)
+        links = post_links(post)
+        self._links.update(links)
+        self._posts[post.id] = tuple(links)
+        while len(self._links) > self.maxsize and len(self._posts) > 1:
+            _, tokens = self._posts.popitem(last=False)
+            for token in tokens:
+                self._links.pop(token, None)
+
+    def remove_post(self, post_id: int) -> None:
+        for token in self._posts.pop(post_id, ()):
+            self._links.pop(token, None)
@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from contextlib import asynccontextmanager, suppress
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import AsyncIterator
+
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import Message
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from alt_controller_bot.core import metrics
+from alt_controller_bot.services.repositories import MediaRepository
+
+logger = logging.getLogger(__name__)
+
+MEDIA_KINDS = ("photo", "video", "document")
+# Substrings of Bot API errors returned for file_ids Telegram no longer accepts.
+INVALID_FILE_ID_ERRORS = (
+    "wrong file identifier",
+    "wrong remote file identifier",
+    "file_id_invalid",
+    "file reference",
+)
+HASH_CHUNK_SIZE = 1 << 20
+
+
+@dataclass(slots=True)
+class MediaItem:
+    """One entry of ``Post.media_json``: a local file to upload or a Telegram ``file_id``."""
+
+    kind: str
+    path: Path | None = None
+    file_id: str | None = None
+    digest: str | None = None
+    size: int = 0
+
+    @property
+    def cache_key(self) -> tuple[str, str]:
+        return self.digest or "", self.kind
+
+
+def parse_media(media_json: dict | None) -> list[MediaItem]:
+    """Read ``{"items": [{"type": "photo", "path": "..."}, {"type": ..., "file_id": ...}]}``."""
+    items: list[MediaItem] = []
+    for raw in (media_json or {}).get("items") or []:
+        kind = raw.get("type")
+        if kind not in MEDIA_KINDS or not (raw.get("path") or raw.get("file_id")):
+            logger.warning("Skipping unsupported media entry: %r", raw)
+            continue
+        path = Path(raw["path"]) if raw.get("path") else None
+        items.append(MediaItem(kind=kind, path=path, file_id=raw.get("file_id")))
+    return items
+
+
+def file_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as fh:
+        while chunk := fh.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_id_of(message: Message, kind: str) -> str | None:
+    if kind == "photo":
+        return message.photo[-1].file_id if message.photo else None
+    media = getattr(message, kind, None)
+    return media.file_id if media is not None else None
+
+
+def is_invalid_file_id(exc: TelegramBadRequest) -> bool:
+    text = exc.message.lower()
+    return any(marker in text for marker in INVALID_FILE_ID_ERRORS)
+
+
+@dataclass(slots=True)
+class _UploadSlot:
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    users: int = 0
+
+
+class MediaCache:
+    """Maps SHA-256 of media bytes to the ``file_id`` Telegram returned for the first upload.
+
+    Lookups go to an in-process LRU first and then to ``media_files``. The table is
+    trimmed to the ``max_entries`` most recently used rows on startup, every
+    ``prune_interval`` seconds and whenever a tenth of ``max_entries`` new rows was saved.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        *,
+        maxsize: int = 1024,
+        max_entries: int = 100_000,
+        prune_interval: float = 3600.0,
+    ):
+        self.session_factory = session_factory
+        self.maxsize = maxsize
+        self.max_entries = max_entries
+        self.prune_interval = prune_interval
+        self.prune_every = max(max_entries // 10, 1)
+        self._file_ids: OrderedDict[tuple[str, str], str] = OrderedDict()
+        # (path, mtime_ns, size) -> digest, so re-posting an unchanged file skips hashing.
+        self._digests: OrderedDict[tuple[str, int, int], str] = OrderedDict()
+        self._slots: dict[tuple[str, str], _UploadSlot] = {}
+        self._saved = 0
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task[None] | None = None
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="media-cache-prune")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    async def prune(self) -> int:
+        self._saved = 0
+        async with self.session_factory() as session:
+            pruned = await MediaRepository(session).prune(self.max_entries)
+            await session.commit()
+        if pruned:
+            logger.info("Evicted %s media cache entries", pruned)
+        return pruned
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.prune()
+            except Exception:
+                logger.exception("Media cache pruning failed")
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.prune_interval)
+            self._wakeup.clear()
+
+    async def prepare(self, item: MediaItem) -> None:
+        """Fill ``size`` and ``digest`` of a local file."""
+        if item.path is None:
+            return
+        stat = await asyncio.to_thread(item.path.stat)
+        item.size = stat.st_size
+        key = (str(item.path), stat.st_mtime_ns, stat.st_size)
+        digest = self._digests.get(key)
+        if digest is None:
+            digest = await asyncio.to_thread(file_digest, item.path)
+            self._remember(self._digests, key, digest)
+        else:
+            self._digests.move_to_end(key)
+        item.digest = digest
+
+    async def get(self, item: MediaItem) -> str | None:
+        key = item.cache_key
+        file_id = self._file_ids.get(key)
+        if file_id is not None:
+            self._file_ids.move_to_end(key)
+            metrics.MEDIA_CACHE_REQUESTS.inc("hit")
+            return file_id
+
+        async with self.session_factory() as session:
+            file_id = await MediaRepository(session).get_file_id(*key)
+            await session.commit()
+        if file_id is None:
+            metrics.MEDIA_CACHE_REQUESTS.inc("miss")
+            return None
+        metrics.MEDIA_CACHE_REQUESTS.inc("hit")
+        self._remember(self._file_ids, key, file_id)
+        return file_id
+
+    async def put(self, item: MediaItem, file_id: str) -> None:
+        self._remember(self._file_ids, item.cache_key, file_id)
+        async with self.session_factory() as session:
+            await MediaRepository(session).save(*item.cache_key, file_id, item.size)
+            await session.commit()
+        self._saved += 1
+        if self._saved >= self.prune_every:
+            self._wakeup.set()
+
+    async def invalidate(self, item: MediaItem, file_id: str) -> None:
+        metrics.MEDIA_CACHE_REQUESTS.inc("invalidated")
+        if self._file_ids.get(item.cache_key) == file_id:
+            del self._file_ids[item.cache_key]
+        async with self.session_factory() as session:
+            await MediaRepository(session).delete(*item.cache_key, file_id)
+            await session.commit()
+
+    @asynccontextmanager
+    async def upload_slot(self, item: MediaItem) -> AsyncIterator[None]:
+        """Serialise uploads of the same content so concurrent sends reuse the first one."""
+        key = item.cache_key
+        slot = self._slots.get(key)
+        if slot is None:
+            slot = self._slots[key] = _UploadSlot()
+        slot.users += 1
+        try:
+            async with slot.lock:
+                yield
+        finally:
+            slot.users -= 1
+            if not slot.users:
+                del self._slots[key]
+
+    def _remember(self, cache: OrderedDict, key: tuple, value: str) -> None:
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > self.maxsize:
+            cache.popitem(last=False)
@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Iterable
+
+from aiogram import Bot
+from aiogram.enums import ChatMemberStatus, ChatType
+from aiogram.exceptions import TelegramAPIError, TelegramRetryAfter
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from alt_controller_bot.services.audit import AuditSink
+from alt_controller_bot.services.rbac import Role
+from alt_controller_bot.services.repositories import ChannelRepository
+
+logger = logging.getLogger(__name__)
+
+ADMIN_STATUSES = frozenset({ChatMemberStatus.ADMINISTRATOR, ChatMemberStatus.CREATOR})
+# The channel's creator owns it in the bot; other channel admins become admins.
+MEMBER_ROLES = {
+    ChatMemberStatus.CREATOR: Role.OWNER,
+    ChatMemberStatus.ADMINISTRATOR: Role.ADMIN,
+}
+
+
+@dataclass(slots=True)
+class OnboardingResult:
+    ref: int | str
+    ok: bool = False
+    tg_chat_id: int | None = None
+    title: str | None = None
+    username: str | None = None
+    channel_id: int | None = None
+    role: Role | None = None
+    error: str | None = None
+
+
+def parse_channel_refs(text: str | None) -> list[int | str]:
+    """``@name``, ``name`` or numeric chat ids separated by spaces, commas or newlines."""
+    refs: list[int | str] = []
+    for token in (text or "").replace(",", " ").split():
+        try:
+            refs.append(int(token))
+        except ValueError:
+            refs.append(token if token.startswith("@") else f"@{token}")
+    return list(dict.fromkeys(refs))
+
+
+class ChannelOnboarding:
+    """Connects many channels at once.
+
+    Every channel is checked with ``getChat`` and two ``getChatMember`` calls (the bot must
+    be an admin allowed to post, the user must be an admin) under a shared concurrency
+    cap. The verified channels and the user's roles are then written with one batched
+    upsert each, in a single transaction, and every connected channel is audited.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        *,
+        concurrency: int = 10,
+        max_attempts: int = 3,
+        audit: AuditSink | None = None,
+    ):
+        self.session_factory = session_factory
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.audit = audit
+
+    async def onboard(
+        self,
+        bot: Bot,
+        user_id: int,
+        refs: Iterable[int | str],
+    ) -> list[OnboardingResult]:
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def check(ref: int | str) -> OnboardingResult:
+            async with semaphore:
+                return await self.check(bot, user_id, ref)
+
+        results = await asyncio.gather(*(check(ref) for ref in refs))
+        verified = [result for result in results if result.ok]
+        if not verified:
+            return results
+
+        async with self.session_factory() as session, session.begin():
+            repo = ChannelRepository(session)
+            channels = await repo.upsert_channels(
+                [
+                    {
+                        "tg_chat_id": result.tg_chat_id,
+                        "title": result.title,
+                        "username": result.username,
+                    }
+                    for result in verified
+                ]
+            )
+            ids = {channel.tg_chat_id: channel.id for channel in channels}
+            for result in verified:
+                result.channel_id = ids[result.tg_chat_id]
+            await repo.link_users(
+                (user_id, result.channel_id, result.role.value) for result in verified
+            )
+        if self.audit is not None:
+            # Refs such as "@name" and the numeric id can name the same channel.
+            roles = {result.channel_id: result.role for result in verified}
+            for channel_id, role in roles.items():
+                self.audit.log(
+                    user_id=user_id,
+                    action="channel.connect",
+                    target_type="channel",
+                    target_id=channel_id,
+                    extra_json={"role": role.value},
+                )
+        return results
+
+    async def check(self, bot: Bot, user_id: int, ref: int | str) -> OnboardingResult:
+        result = OnboardingResult(ref=ref)
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                await self._check(bot, user_id, result)
+                return result
+            except TelegramRetryAfter as exc:
+                if attempt == self.max_attempts:
+                    result.error = "Telegram просит подождать, попробуйте позже."
+                    return result
+                await asyncio.sleep(exc.retry_after)
+            except TelegramAPIError as exc:
+                logger.info("Channel %s check failed: %s", ref, exc)
+                result.error = "Канал не найден или бот не добавлен в него."
+                return result
+        return result
+
+    async def _check(self, bot: Bot, user_id: int, result: OnboardingResult) -> None:
+        chat = await bot.get_chat(result.ref)
+        if chat.type != ChatType.CHANNEL:
+            result.error = "Это не канал."
+            return
+        bot_member, user_member = await asyncio.gather(
+            bot.get_chat_member(chat.id, bot.id),
+            bot.get_chat_member(chat.id, user_id),
+        )
+        if bot_member.status not in ADMIN_STATUSES or not getattr(
+            bot_member, "can_post_messages", False
+        ):
+            result.error = "Бот не администратор с правом публикации."
+            return
+        result.role = MEMBER_ROLES.get(user_member.status)
+        if result.role is None:
+            result.error = "Вы не администратор канала."
+            return
+        result.ok = True
+        result.tg_chat_id = chat.id
+        result.title = chat.title or chat.username or str(chat.id)
+        result.username = chat.username
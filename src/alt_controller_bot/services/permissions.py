@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass, field
+from types import MappingProxyType
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from alt_controller_bot.db.database import LazySession
+from alt_controller_bot.services.invalidation import InvalidationBus
+from alt_controller_bot.services.rbac import ALL_ROLES_MASK, ROLE_MASKS, Role, mask_allows
+from alt_controller_bot.services.repositories import CHANGED_USER_ROLES_KEY, ChannelRepository
+
+
+@dataclass(frozen=True, slots=True)
+class UserPermissions:
+    user_id: int
+    channel_masks: Mapping[int, int] = field(default_factory=dict)
+    is_superuser: bool = False
+
+    def mask(self, channel_id: int) -> int:
+        if self.is_superuser:
+            return ALL_ROLES_MASK
+        return self.channel_masks.get(channel_id, 0)
+
+    def can(self, channel_id: int, required: Role) -> bool:
+        return mask_allows(self.mask(channel_id), required)
+
+    def channels(self, required: Role, every: Iterable[int] = ()) -> list[int]:
+        """Channels where ``required`` is allowed; superusers get ``every`` known channel."""
+        if self.is_superuser:
+            return list(every)
+        return [
+            channel_id
+            for channel_id, mask in self.channel_masks.items()
+            if mask_allows(mask, required)
+        ]
+
+
+def build_channel_masks(roles: Iterable[tuple[int, str]]) -> dict[int, int]:
+    masks: dict[int, int] = {}
+    for channel_id, role in roles:
+        masks[channel_id] = masks.get(channel_id, 0) | ROLE_MASKS[Role(role)]
+    return masks
+
+
+class PermissionService:
+    """Resolves a user's per-channel role masks through an LRU cache with a TTL.
+
+    Bound to an ``InvalidationBus``, entries are invalidated after any commit, in this
+    process or another, in which ``ChannelRepository.link_user`` touched that user; the
+    TTL only bounds staleness when an announcement is lost.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        *,
+        owner_ids: Iterable[int] = (),
+        maxsize: int = 10_000,
+        ttl: float = 60.0,
+    ):
+        self.session_factory = session_factory
+        self.owner_ids = frozenset(owner_ids)
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._cache: OrderedDict[int, tuple[float, UserPermissions]] = OrderedDict()
+        self._generation = 0
+
+    async def resolve(self, user_id: int, db: LazySession | None = None) -> UserPermissions:
+        cached = self._cache.get(user_id)
+        now = time.monotonic()
+        if cached is not None and cached[0] > now:
+            self._cache.move_to_end(user_id)
+            return cached[1]
+
+        generation = self._generation
+        if db is not None:
+            roles = await ChannelRepository(await db.get()).get_user_roles(user_id)
+        else:
+            async with self.session_factory() as session:
+                roles = await ChannelRepository(session).get_user_roles(user_id)
+        permissions = UserPermissions(
+            user_id=user_id,
+            channel_masks=MappingProxyType(build_channel_masks(roles)),
+            is_superuser=user_id in self.owner_ids,
+        )
+        if generation == self._generation:
+            # Otherwise roles changed while loading and these may predate the change.
+            self.prime(permissions)
+        return permissions
+
+    def prime(self, permissions: UserPermissions) -> None:
+        """Seed the cache, e.g. from a bulk load or a benchmark fixture."""
+        self._cache[permissions.user_id] = (time.monotonic() + self.ttl, permissions)
+        self._cache.move_to_end(permissions.user_id)
+        while len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+
+    def invalidate(self, user_id: int) -> None:
+        self._generation += 1
+        self._cache.pop(user_id, None)
+
+    def invalidate_users(self, user_ids: Iterable[int] | None = None) -> None:
+        """Forget ``user_ids`` (everyone if ``None``); they are reloaded on demand."""
+        if user_ids is None:
+            self.clear()
+            return
+        for user_id in user_ids:
+            self.invalidate(user_id)
+
+    def clear(self) -> None:
+        self._generation += 1
+        self._cache.clear()
+
+    def bind(self, bus: InvalidationBus) -> None:
+        bus.subscribe(CHANGED_USER_ROLES_KEY, self.invalidate_users)
+
+    def unbind(self, bus: InvalidationBus) -> None:
+        bus.unsubscribe(CHANGED_USER_ROLES_KEY, self.invalidate_users)
@@ -0,0 +1,352 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from contextlib import AsyncExitStack
+from dataclasses import dataclass
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramAPIError, TelegramBadRequest, TelegramRetryAfter
+from aiogram.types import (
+    FSInputFile,
+    InputFile,
+    InputMediaDocument,
+    InputMediaPhoto,
+    InputMediaVideo,
+    Message,
+)
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from alt_controller_bot.core import metrics
+from alt_controller_bot.db import models
+from alt_controller_bot.services.channels import ChannelRegistry
+from alt_controller_bot.services.media import (
+    MediaCache,
+    MediaItem,
+    file_id_of,
+    is_invalid_file_id,
+    parse_media,
+)
+from alt_controller_bot.services.reactions import MessageIndex
+from alt_controller_bot.services.render import PostRenderer, RenderedPost
+from alt_controller_bot.services.repositories import ChannelRepository
+
+logger = logging.getLogger(__name__)
+
+SEND_METHODS = {"photo": "send_photo", "video": "send_video", "document": "send_document"}
+INPUT_MEDIA = {"photo": InputMediaPhoto, "video": InputMediaVideo, "document": InputMediaDocument}
+
+
+class TokenBucket:
+    """Async token bucket; waiters are served in FIFO order."""
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def block(self, seconds: float) -> None:
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+    def idle(self, now: float, grace: float) -> bool:
+        """Unused for ``grace`` seconds and not blocked, so a fresh bucket would behave alike."""
+        return (
+            not self._lock.locked()
+            and now >= self._blocked_until
+            and now - self._updated >= grace
+        )
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._blocked_until:
+                    await asyncio.sleep(self._blocked_until - now)
+                    continue
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+@dataclass(slots=True)
+class PublishResult:
+    channel_id: int
+    chat_id: int | None
+    message_id: int | None = None
+    error: str | None = None
+    attempts: int = 0
+
+    @property
+    def ok(self) -> bool:
+        return self.message_id is not None
+
+
+class StaleMediaError(Exception):
+    """A cached file_id was rejected; it has been dropped and the send should be retried."""
+
+
+class PublishError(Exception):
+    """Some channels did not get the post; ``failed_channels`` are the ones to retry."""
+
+    def __init__(self, post_id: int, results: list[PublishResult]):
+        self.post_id = post_id
+        self.results = results
+        self.failed_channels = [result.channel_id for result in results if not result.ok]
+        super().__init__(
+            f"Post {post_id} was not delivered to {len(self.failed_channels)} "
+            f"of {len(results)} channels"
+        )
+
+
+class PostPublisher:
+    """Sends a post to all of its channels concurrently.
+
+    Every send takes a token from the per-chat bucket and then from the global one.
+    ``TelegramRetryAfter`` only blocks the affected chat's bucket, so the rest of the
+    fan-out keeps going while that chat waits out its flood limit. Buckets of chats that
+    have been idle for ``bucket_idle`` seconds are dropped.
+
+    A post is sent to ``post.pending_channels`` when set (the channels a previous attempt
+    failed on) and to all of ``post.channels`` otherwise. Failures are collected per
+    channel; if any channel failed, ``PublishError`` lists them once the others are done.
+
+    Media is uploaded once per content hash: the first send uploads the file and the
+    returned ``file_id`` is reused for the other channels and later posts.
+    """
+
+    def __init__(
+        self,
+        bot: Bot,
+        session_factory: async_sessionmaker[AsyncSession],
+        *,
+        global_rate: float = 30.0,
+        chat_rate: float = 1.0,
+        max_attempts: int = 3,
+        media: MediaCache | None = None,
+        renderer: PostRenderer | None = None,
+        messages: MessageIndex | None = None,
+        channels: ChannelRegistry | None = None,
+        bucket_idle: float = 300.0,
+    ):
+        self.bot = bot
+        self.session_factory = session_factory
+        self.media = media
+        self.renderer = renderer or PostRenderer()
+        self.messages = messages
+        self.channels = channels
+        self.chat_rate = chat_rate
+        self.max_attempts = max_attempts
+        self._global_bucket = TokenBucket(global_rate)
+        self.bucket_idle = bucket_idle
+        self._chat_buckets: dict[int, TokenBucket] = {}
+        self._next_sweep = time.monotonic() + bucket_idle
+
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            self._evict_idle_buckets()
+            bucket = self._chat_buckets[chat_id] = TokenBucket(self.chat_rate, capacity=1)
+        return bucket
+
+    def _evict_idle_buckets(self) -> None:
+        now = time.monotonic()
+        if now < self._next_sweep:
+            return
+        self._next_sweep = now + self.bucket_idle
+        idle = [
+            chat_id
+            for chat_id, bucket in self._chat_buckets.items()
+            if bucket.idle(now, self.bucket_idle)
+        ]
+        for chat_id in idle:
+            del self._chat_buckets[chat_id]
+
+    async def acquire(self, chat_id: int) -> TokenBucket:
+        """Wait for a send slot in ``chat_id``; returns the chat bucket to block on flood waits."""
+        bucket = self._chat_bucket(chat_id)
+        await bucket.acquire()
+        await self._global_bucket.acquire()
+        return bucket
+
+    async def publish(self, post: models.Post) -> list[PublishResult]:
+        channel_ids = post.channels if post.pending_channels is None else post.pending_channels
+        chat_ids = await self._chat_ids(channel_ids)
+        rendered = self.renderer.render(post)
+        media = parse_media(post.media_json)
+        if self.media is not None:
+            for item in media:
+                await self.media.prepare(item)
+
+        results = await asyncio.gather(
+            *(
+                self._send(rendered, media, channel_id, chat_ids.get(channel_id))
+                for channel_id in channel_ids
+            )
+        )
+        if self.messages is not None:
+            await self._record_messages(rendered, results)
+        if not all(result.ok for result in results):
+            raise PublishError(post.id, results)
+        return results
+
+    async def _chat_ids(self, channel_ids: list[int]) -> dict[int, int]:
+        if self.channels is not None:
+            snapshots = self.channels.get_many(channel_ids)
+            if len(snapshots) == len(set(channel_ids)):
+                return {
+                    channel_id: snapshot.tg_chat_id for channel_id, snapshot in snapshots.items()
+                }
+        async with self.session_factory() as session:
+            channels = await ChannelRepository(session).get_channels(channel_ids)
+        return {channel.id: channel.tg_chat_id for channel in channels}
+
+    async def _record_messages(self, rendered: RenderedPost, results: list[PublishResult]) -> None:
+        # For media groups only the first message is recorded; its reactions count for the post.
+        rows = [
+            ((result.chat_id, result.message_id), (rendered.post_id, result.channel_id))
+            for result in results
+            if result.ok
+        ]
+        try:
+            await self.messages.record(rows, content_hash=rendered.content_hash)
+        except Exception:
+            # The post is already out; failing here would make the scheduler send it again.
+            logger.exception("Failed to record published messages of post %s", rendered.post_id)
+
+    async def _send(
+        self,
+        rendered: RenderedPost,
+        media: list[MediaItem],
+        channel_id: int,
+        chat_id: int | None,
+    ) -> PublishResult:
+        result = PublishResult(channel_id=channel_id, chat_id=chat_id)
+        if chat_id is None:
+            result.error = "channel not found"
+            return result
+
+        while result.attempts < self.max_attempts:
+            bucket = await self.acquire(chat_id)
+            result.attempts += 1
+            try:
+                message = await self._deliver(rendered, media, channel_id, chat_id)
+            except TelegramRetryAfter as exc:
+                bucket.block(exc.retry_after)
+                result.error = str(exc)
+                continue
+            except StaleMediaError as exc:
+                result.error = str(exc)
+                continue
+            except TelegramAPIError as exc:
+                logger.warning(
+                    "Failed to send post %s to chat %s: %s", rendered.post_id, chat_id, exc
+                )
+                result.error = str(exc)
+                return result
+            except Exception as exc:
+                # One broken channel must not fail the fan-out to the others.
+                logger.exception("Failed to send post %s to chat %s", rendered.post_id, chat_id)
+                result.error = repr(exc)
+                return result
+            result.message_id = message.message_id
+            result.error = None
+            return result
+        return result
+
+    async def _deliver(
+        self,
+        rendered: RenderedPost,
+        media: list[MediaItem],
+        channel_id: int,
+        chat_id: int,
+    ) -> Message:
+        if not media:
+            return await self.bot.send_message(
+                chat_id,
+                rendered.text,
+                parse_mode=rendered.parse_mode,
+                reply_markup=rendered.keyboard(channel_id),
+            )
+
+        async with AsyncExitStack() as stack:
+            sources, cached = await self._media_sources(media, stack)
+            try:
+                if len(media) == 1:
+                    send = getattr(self.bot, SEND_METHODS[media[0].kind])
+                    messages = [
+                        await send(
+                            chat_id,
+                            sources[0],
+                            caption=rendered.caption,
+                            parse_mode=rendered.parse_mode,
+                            reply_markup=rendered.keyboard(channel_id),
+                        )
+                    ]
+                else:
+                    # Media groups take no inline keyboard; the caption goes on the first item.
+                    messages = await self.bot.send_media_group(
+                        chat_id,
+                        [
+                            INPUT_MEDIA[item.kind](
+                                media=source,
+                                caption=rendered.caption if index == 0 else None,
+                                parse_mode=rendered.parse_mode,
+                            )
+                            for index, (item, source) in enumerate(zip(media, sources))
+                        ],
+                    )
+            except TelegramBadRequest as exc:
+                if not cached or not is_invalid_file_id(exc):
+                    raise
+                for item, file_id in cached:
+                    await self.media.invalidate(item, file_id)
+                raise StaleMediaError(str(exc)) from exc
+
+            for item, source, message in zip(media, sources, messages):
+                if not isinstance(source, InputFile):
+                    continue
+                metrics.MEDIA_UPLOAD_BYTES.inc(item.kind, amount=item.size)
+                file_id = file_id_of(message, item.kind)
+                if self.media is not None and item.digest and file_id:
+                    await self.media.put(item, file_id)
+        return messages[0]
+
+    async def _media_sources(
+        self, media: list[MediaItem], stack: AsyncExitStack
+    ) -> tuple[list[str | InputFile], list[tuple[MediaItem, str]]]:
+        """Resolve every item to a file_id or a file to upload.
+
+        Cache misses hold the item's upload slot until the send finishes, so parallel sends
+        of the same content wait for the first upload and then pick up its file_id.
+        """
+        sources: list[str | InputFile | None] = [item.file_id for item in media]
+        cached: list[tuple[MediaItem, str]] = []
+        if self.media is not None:
+            misses: dict[tuple[str, str], list[int]] = {}
+            for index, item in enumerate(media):
+                if sources[index] is None and item.digest:
+                    sources[index] = await self.media.get(item)
+                    if sources[index] is None:
+                        misses.setdefault(item.cache_key, []).append(index)
+                    else:
+                        cached.append((item, sources[index]))
+            # Sorted so two posts sharing several files never wait on each other's slots.
+            for key in sorted(misses):
+                indexes = misses[key]
+                await stack.enter_async_context(self.media.upload_slot(media[indexes[0]]))
+                file_id = await self.media.get(media[indexes[0]])
+                if file_id is not None:
+                    cached.append((media[indexes[0]], file_id))
+                    for index in indexes:
+                        sources[index] = file_id
+        return [
+            source if source is not None else FSInputFile(item.path)
+            for item, source in zip(media, sources)
+        ], cached
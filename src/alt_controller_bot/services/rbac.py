@@ -18,8 +18,29 @@ class Role(str, Enum):
             cls.ANALYST: {cls.ANALYST},
         }
 
+    @property
+    def bit(self) -> int:
+        return ROLE_BITS[self]
+
+    @property
+    def mask(self) -> int:
+        """Bits of every role this role is allowed to act as."""
+        return ROLE_MASKS[self]
+
     def can(self, required: "Role") -> bool:
-        return required in self.hierarchy()[self]
+        return bool(ROLE_MASKS[self] & ROLE_BITS[required])
+
+
+ROLE_BITS: dict[Role, int] = {role: 1 << index for index, role in enumerate(Role)}
+ROLE_MASKS: dict[Role, int] = {
+    role: sum(ROLE_BITS[granted] for granted in granted_roles)
+    for role, granted_roles in Role.hierarchy().items()
+}
+ALL_ROLES_MASK = sum(ROLE_BITS.values())
+
+
+def mask_allows(mask: int, required: Role) -> bool:
+    return bool(mask & ROLE_BITS[required])
 
 
 class PermissionError(Exception):
@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from typing import Iterable, Mapping
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from alt_controller_bot.core import metrics
+from alt_controller_bot.services.repositories import (
+    MessageKey,
+    PostChannel,
+    PublishedMessageRepository,
+    RollupRepository,
+    StatsRepository,
+)
+from alt_controller_bot.services.writebehind import WriteBehindBuffer
+
+# Messages we did not publish are remembered as misses for this long.
+MISS_TTL = 300.0
+
+
+class MessageIndex:
+    """Maps ``(chat_id, message_id)`` to ``(post_id, channel_id)``.
+
+    An LRU sits in front of ``published_messages``; messages published by this process are
+    added to it directly, and lookups for unknown messages are remembered as misses.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        *,
+        maxsize: int = 100_000,
+    ):
+        self.session_factory = session_factory
+        self.maxsize = maxsize
+        self._hits: OrderedDict[MessageKey, PostChannel] = OrderedDict()
+        self._misses: OrderedDict[MessageKey, float] = OrderedDict()
+
+    def remember(self, key: MessageKey, target: PostChannel) -> None:
+        self._misses.pop(key, None)
+        self._hits[key] = target
+        self._hits.move_to_end(key)
+        while len(self._hits) > self.maxsize:
+            self._hits.popitem(last=False)
+
+    async def record(
+        self,
+        rows: Iterable[tuple[MessageKey, PostChannel]],
+        *,
+        content_hash: str | None = None,
+    ) -> None:
+        """Persist freshly sent messages and add them to the cache.
+
+        ``content_hash`` is the hash of the post version the messages were sent with.
+        """
+        rows = list(rows)
+        if not rows:
+            return
+        async with self.session_factory() as session, session.begin():
+            await PublishedMessageRepository(session).add_many(
+                [
+                    {
+                        "chat_id": chat_id,
+                        "message_id": message_id,
+                        "post_id": post_id,
+                        "channel_id": channel_id,
+                        "content_hash": content_hash,
+                    }
+                    for (chat_id, message_id), (post_id, channel_id) in rows
+                ]
+            )
+        for key, target in rows:
+            self.remember(key, target)
+
+    async def lookup_many(self, keys: Iterable[MessageKey]) -> dict[MessageKey, PostChannel]:
+        """Resolve ``keys``; uncached ones are fetched with a single query."""
+        now = time.monotonic()
+        found: dict[MessageKey, PostChannel] = {}
+        missing: list[MessageKey] = []
+        for key in keys:
+            target = self._hits.get(key)
+            if target is not None:
+                self._hits.move_to_end(key)
+                found[key] = target
+            elif self._misses.get(key, 0.0) <= now:
+                missing.append(key)
+        if not missing:
+            return found
+
+        async with self.session_factory() as session:
+            loaded = await PublishedMessageRepository(session).lookup_many(missing)
+        for key in missing:
+            target = loaded.get(key)
+            if target is not None:
+                self.remember(key, target)
+                found[key] = target
+            else:
+                self._misses[key] = now + MISS_TTL
+                self._misses.move_to_end(key)
+        while len(self._misses) > self.maxsize:
+            self._misses.popitem(last=False)
+        return found
+
+
+class ReactionCountIngestor(WriteBehindBuffer[MessageKey, dict[str, int]]):
+    """Write-behind buffer for ``message_reaction_count`` updates.
+
+    Telegram sends absolute per-message counts, so a burst of updates for one message
+    collapses to the latest snapshot. Every ``flush_interval`` seconds the pending
+    snapshots are mapped to posts and written to ``stats_reactions``; the database diffs
+    them against the stored counts under row locks and the difference feeds the hourly
+    rollup. A failed flush puts back the snapshots that no newer one has replaced.
+    """
+
+    task_name = "reaction-counts"
+    entries = "reaction snapshots"
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        index: MessageIndex,
+        *,
+        flush_interval: float = 5.0,
+        max_pending: int = 5000,
+        shutdown_timeout: float = 10.0,
+    ):
+        super().__init__(
+            session_factory,
+            flush_interval=flush_interval,
+            max_pending=max_pending,
+            shutdown_timeout=shutdown_timeout,
+        )
+        self.index = index
+
+    def add(self, chat_id: int, message_id: int, counts: Mapping[str, int]) -> None:
+        self._pending[(chat_id, message_id)] = dict(counts)
+        metrics.REACTION_SNAPSHOTS.inc("received")
+        self._added()
+
+    async def _write(self, batch: dict[MessageKey, dict[str, int]]) -> int:
+        targets = await self.index.lookup_many(batch)
+        snapshots: dict[PostChannel, dict[str, int]] = {}
+        for key, target in targets.items():
+            snapshots[target] = batch[key]
+        if snapshots:
+            async with self.session_factory() as session, session.begin():
+                deltas = await StatsRepository(session).replace_reaction_counts(snapshots)
+                await RollupRepository(session).add_hourly(reactions=deltas)
+        metrics.REACTION_SNAPSHOTS.inc("written", amount=len(snapshots))
+        metrics.REACTION_SNAPSHOTS.inc("unknown", amount=len(batch) - len(snapshots))
+        return len(snapshots)
+
+    def _restore(self, batch: dict[MessageKey, dict[str, int]]) -> None:
+        # Snapshots that arrived meanwhile are newer than the ones being put back.
+        for key, counts in batch.items():
+            self._pending.setdefault(key, counts)
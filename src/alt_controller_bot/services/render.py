@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from collections import OrderedDict
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import datetime
+
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+
+from alt_controller_bot.db import models
+from alt_controller_bot.services.invalidation import InvalidationBus
+from alt_controller_bot.services.links import link_token
+from alt_controller_bot.services.repositories import CHANGED_POSTS_KEY
+
+
+def post_content_hash(post: models.Post) -> str:
+    """Hash of everything that ends up in the sent message."""
+    payload = json.dumps(
+        [post.text, post.parse_mode, post.media_json, post.buttons_json],
+        ensure_ascii=False,
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+@dataclass(frozen=True, slots=True)
+class RenderedPost:
+    """Send payload of one post version.
+
+    Text, parse mode and the keyboard are built once and the same ``markup`` object is
+    passed to every channel. Reactions are Telegram's own and are not rendered as buttons.
+    Only tracked links carry the channel id: with ``link_prefix`` set, ``keyboard()``
+    builds the URL rows of a channel from the prepared ``tracked_buttons``.
+    """
+
+    post_id: int
+    version: datetime | None
+    text: str
+    parse_mode: str | None
+    content_hash: str
+    markup: InlineKeyboardMarkup | None = None
+    # (index in buttons_json, text) of URL buttons sent as /r/<token> redirects.
+    tracked_buttons: tuple[tuple[int, str], ...] = ()
+    link_prefix: str | None = None
+
+    @property
+    def caption(self) -> str | None:
+        return self.text or None
+
+    def keyboard(self, channel_id: int) -> InlineKeyboardMarkup | None:
+        if self.link_prefix is None or not self.tracked_buttons:
+            return self.markup
+        return InlineKeyboardMarkup(
+            inline_keyboard=[
+                [
+                    InlineKeyboardButton(
+                        text=text,
+                        url=self.link_prefix + link_token(self.post_id, channel_id, index),
+                    )
+                ]
+                for index, text in self.tracked_buttons
+            ]
+        )
+
+    def preview_keyboard(self, controls: InlineKeyboardMarkup) -> InlineKeyboardMarkup:
+        """Post keyboard (with the original URLs) followed by the draft wizard controls."""
+        rows = self.markup.inline_keyboard if self.markup is not None else []
+        return InlineKeyboardMarkup(inline_keyboard=[*rows, *controls.inline_keyboard])
+
+
+def compile_post(post: models.Post, link_prefix: str | None = None) -> RenderedPost:
+    buttons = (post.buttons_json or {}).get("buttons") or []
+    rows = [
+        [InlineKeyboardButton(text=button["text"], url=button["url"])]
+        for button in buttons
+        if button.get("url")
+    ]
+    return RenderedPost(
+        post_id=post.id,
+        version=post.updated_at,
+        text=post.text or "",
+        parse_mode=None if post.parse_mode == "None" else post.parse_mode,
+        content_hash=post_content_hash(post),
+        markup=InlineKeyboardMarkup(inline_keyboard=rows) if rows else None,
+        tracked_buttons=tuple(
+            (index, button["text"]) for index, button in enumerate(buttons) if button.get("url")
+        ),
+        link_prefix=link_prefix,
+    )
+
+
+class PostRenderer:
+    """LRU of compiled posts keyed by ``id``; an entry is reused while ``updated_at`` matches.
+
+    Entries are also dropped after any commit, in this process or another, in which
+    ``PostRepository.update_post`` touched the post, once ``bind`` wires the renderer to
+    an ``InvalidationBus``.
+    """
+
+    def __init__(self, maxsize: int = 1024, link_prefix: str | None = None):
+        self.maxsize = maxsize
+        self.link_prefix = link_prefix
+        self._cache: OrderedDict[int, RenderedPost] = OrderedDict()
+
+    def render(self, post: models.Post) -> RenderedPost:
+        rendered = self._cache.get(post.id)
+        if rendered is not None and rendered.version == post.updated_at:
+            self._cache.move_to_end(post.id)
+            return rendered
+        rendered = self._cache[post.id] = compile_post(post, self.link_prefix)
+        self._cache.move_to_end(post.id)
+        while len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+        return rendered
+
+    def invalidate(self, post_id: int) -> None:
+        self._cache.pop(post_id, None)
+
+    def invalidate_posts(self, post_ids: Iterable[int] | None = None) -> None:
+        """Forget ``post_ids`` (every post if ``None``)."""
+        if post_ids is None:
+            self._cache.clear()
+            return
+        for post_id in post_ids:
+            self.invalidate(post_id)
+
+    def bind(self, bus: InvalidationBus) -> None:
+        bus.subscribe(CHANGED_POSTS_KEY, self.invalidate_posts)
+
+    def unbind(self, bus: InvalidationBus) -> None:
+        bus.unsubscribe(CHANGED_POSTS_KEY, self.invalidate_posts)
@@ -1,14 +1,74 @@
 from __future__ import annotations
 
-from datetime import datetime
-from typing import Iterable, Sequence
+import re
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import AsyncIterator, Iterable, Mapping, Sequence
 
-from sqlalchemy import Select, select
+from sqlalchemy import (
+    BigInteger,
+    DateTime,
+    Integer,
+    Select,
+    String,
+    and_,
+    case,
+    cast,
+    delete,
+    func,
+    literal,
+    or_,
+    select,
+    text,
+    tuple_,
+    union_all,
+    update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, insert
 from sqlalchemy.exc import NoResultFound
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 
 from alt_controller_bot.db import models
 
+ClickKey = tuple[int, int, str]
+# (channel_id, post_id)
+RollupKey = tuple[int, int]
+# (chat_id, message_id) of a Telegram message
+MessageKey = tuple[int, int]
+# (post_id, channel_id)
+PostChannel = tuple[int, int]
+
+DUE_STATUSES = ("scheduled", "queued")
+# Session.info key listing users whose channel roles changed in the current transaction.
+CHANGED_USER_ROLES_KEY = "changed_user_roles"
+# Session.info key mapping ids of channels upserted in the current transaction to the rows.
+CHANGED_CHANNELS_KEY = "changed_channels"
+# Session.info key listing posts edited in the current transaction.
+CHANGED_POSTS_KEY = "changed_posts"
+AUDIT_PARTITION_RE = re.compile(r"audit_\d{6}")
+# (created_at, id) of the last row of a page.
+PostCursor = tuple[datetime, int]
+POST_PREVIEW_CHARS = 64
+
+
+@dataclass(frozen=True, slots=True)
+class PostSummary:
+    """Listing row: everything but the post body and JSONB columns."""
+
+    id: int
+    status: str
+    created_at: datetime
+    scheduled_at: datetime | None
+    channels: list[int]
+    preview: str | None
+
+
+@dataclass(frozen=True, slots=True)
+class PostPage:
+    items: list[PostSummary]
+    next_cursor: PostCursor | None
+
 
 class ChannelRepository:
     def __init__(self, session: AsyncSession):
@@ -24,6 +84,22 @@ class ChannelRepository:
         result = await self.session.scalars(stmt)
         return result.all()
 
+    async def get_user_roles(self, user_id: int) -> list[tuple[int, str]]:
+        stmt = select(models.UserChannel.channel_id, models.UserChannel.role).where(
+            models.UserChannel.user_id == user_id
+        )
+        result = await self.session.execute(stmt)
+        return [(channel_id, role) for channel_id, role in result]
+
+    async def get_channels(self, channel_ids: Iterable[int]) -> Sequence[models.Channel]:
+        stmt = select(models.Channel).where(models.Channel.id.in_(list(channel_ids)))
+        result = await self.session.scalars(stmt)
+        return result.all()
+
+    async def get_all_channels(self) -> Sequence[models.Channel]:
+        result = await self.session.scalars(select(models.Channel))
+        return result.all()
+
     async def upsert_channel(
         self,
         tg_chat_id: int,
@@ -31,25 +107,54 @@ class ChannelRepository:
         username: str | None,
         defaults: dict | None = None,
     ) -> models.Channel:
-        defaults = defaults or {}
-        stmt = select(models.Channel).where(models.Channel.tg_chat_id == tg_chat_id)
-        channel = await self.session.scalar(stmt)
-        if channel:
-            channel.title = title
-            channel.username = username
-            if defaults:
-                channel.settings_json = {**channel.settings_json, **defaults}
-            return channel
-
-        channel = models.Channel(
-            tg_chat_id=tg_chat_id,
-            title=title,
-            username=username,
-            settings_json=defaults or {},
-        )
-        self.session.add(channel)
-        await self.session.flush()
-        return channel
+        channels = await self.upsert_channels(
+            [
+                {
+                    "tg_chat_id": tg_chat_id,
+                    "title": title,
+                    "username": username,
+                    "settings_json": defaults or {},
+                }
+            ]
+        )
+        return channels[0]
+
+    async def upsert_channels(self, rows: Sequence[Mapping]) -> Sequence[models.Channel]:
+        """Insert or update ``tg_chat_id/title/username[/settings_json]`` rows in one statement.
+
+        ``settings_json`` is merged into the stored settings of existing channels.
+        """
+        by_chat = {row["tg_chat_id"]: row for row in rows}
+        if not by_chat:
+            return []
+        # Sorted so concurrent batches lock rows in the same order.
+        stmt = insert(models.Channel).values(
+            [
+                {
+                    "tg_chat_id": tg_chat_id,
+                    "title": row["title"],
+                    "username": row.get("username"),
+                    "settings_json": row.get("settings_json") or {},
+                }
+                for tg_chat_id, row in sorted(by_chat.items())
+            ]
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["tg_chat_id"],
+            set_={
+                "title": stmt.excluded.title,
+                "username": stmt.excluded.username,
+                "settings_json": models.Channel.settings_json.op("||")(
+                    stmt.excluded.settings_json
+                ),
+            },
+        ).returning(models.Channel)
+        result = await self.session.scalars(stmt, execution_options={"populate_existing": True})
+        channels = result.all()
+        self.session.info.setdefault(CHANGED_CHANNELS_KEY, {}).update(
+            (channel.id, channel) for channel in channels
+        )
+        return channels
 
     async def link_user(
         self,
@@ -57,19 +162,31 @@ class ChannelRepository:
         channel: models.Channel,
         role: str,
     ) -> models.UserChannel:
-        stmt = select(models.UserChannel).where(
-            models.UserChannel.user_id == user_id,
-            models.UserChannel.channel_id == channel.id,
-        )
-        existing = await self.session.scalar(stmt)
-        if existing:
-            existing.role = role
-            return existing
+        links = await self.link_users([(user_id, channel.id, role)])
+        return links[0]
 
-        link = models.UserChannel(user_id=user_id, channel_id=channel.id, role=role)
-        self.session.add(link)
-        await self.session.flush()
-        return link
+    async def link_users(
+        self, links: Iterable[tuple[int, int, str]]
+    ) -> Sequence[models.UserChannel]:
+        """Set the role of each ``(user_id, channel_id, role)`` in one statement."""
+        roles = {(user_id, channel_id): role for user_id, channel_id, role in links}
+        if not roles:
+            return []
+        stmt = insert(models.UserChannel).values(
+            [
+                {"user_id": user_id, "channel_id": channel_id, "role": role}
+                for (user_id, channel_id), role in sorted(roles.items())
+            ]
+        )
+        stmt = stmt.on_conflict_do_update(
+            constraint="user_channels_user_channel_key",
+            set_={"role": stmt.excluded.role},
+        ).returning(models.UserChannel)
+        result = await self.session.scalars(stmt, execution_options={"populate_existing": True})
+        self.session.info.setdefault(CHANGED_USER_ROLES_KEY, set()).update(
+            user_id for user_id, _ in roles
+        )
+        return result.all()
 
 
 class PostRepository:
@@ -102,8 +219,14 @@ class PostRepository:
         )
         self.session.add(post)
         await self.session.flush()
+        if scheduled_at is not None:
+            # Wakes the publication schedulers, which only reload their heaps periodically.
+            self.session.info.setdefault(CHANGED_POSTS_KEY, set()).add(post.id)
         return post
 
+    async def get_post(self, post_id: int) -> models.Post | None:
+        return await self.session.get(models.Post, post_id)
+
     async def update_post(self, post_id: int, **kwargs) -> models.Post:
         stmt = select(models.Post).where(models.Post.id == post_id)
         post = await self.session.scalar(stmt)
@@ -113,6 +236,7 @@ class PostRepository:
         for key, value in kwargs.items():
             setattr(post, key, value)
         post.updated_at = datetime.utcnow()
+        self.session.info.setdefault(CHANGED_POSTS_KEY, set()).add(post_id)
         await self.session.flush()
         return post
 
@@ -124,30 +248,205 @@ class PostRepository:
         result = await self.session.scalars(stmt)
         return result.all()
 
+    async def page_user_posts(
+        self,
+        user_id: int,
+        statuses: Iterable[str],
+        *,
+        after: PostCursor | None = None,
+        limit: int = 20,
+    ) -> PostPage:
+        """Newest first; served by ``posts_author_status_created_idx``."""
+        post = models.Post
+        stmt = self._summaries().where(
+            post.author_user_id == user_id, post.status.in_(list(statuses))
+        )
+        return await self._page(stmt, (post.created_at, post.id), after, limit)
+
+    async def page_channel_posts(
+        self,
+        channel_id: int,
+        statuses: Iterable[str] | None = None,
+        *,
+        after: PostCursor | None = None,
+        limit: int = 20,
+    ) -> PostPage:
+        """Newest first; each page is a walk of the ``post_channels`` primary key."""
+        entry = models.PostChannelEntry
+        stmt = (
+            self._summaries()
+            .join(entry, entry.post_id == models.Post.id)
+            .where(entry.channel_id == channel_id)
+        )
+        if statuses is not None:
+            stmt = stmt.where(entry.status.in_(list(statuses)))
+        return await self._page(stmt, (entry.created_at, entry.post_id), after, limit)
+
+    @staticmethod
+    def _summaries() -> Select:
+        return select(
+            models.Post.id,
+            models.Post.status,
+            models.Post.created_at,
+            models.Post.scheduled_at,
+            models.Post.channels,
+            func.left(models.Post.text, POST_PREVIEW_CHARS),
+        )
+
+    async def _page(
+        self, stmt: Select, key: tuple, after: PostCursor | None, limit: int
+    ) -> PostPage:
+        """One page of ``stmt`` ordered by ``key``, the ``(created_at, id)`` columns."""
+        created_at, post_id = key
+        if after is not None:
+            stmt = stmt.where(tuple_(created_at, post_id) < tuple_(*after))
+        stmt = stmt.order_by(created_at.desc(), post_id.desc()).limit(limit + 1)
+        rows = (await self.session.execute(stmt)).all()
+        items = [PostSummary(*row) for row in rows[:limit]]
+        next_cursor = (items[-1].created_at, items[-1].id) if len(rows) > limit else None
+        return PostPage(items=items, next_cursor=next_cursor)
+
+    async def list_published_with_buttons(self, limit: int) -> Sequence[models.Post]:
+        """Most recently published posts that have buttons, newest first."""
+        stmt = (
+            select(models.Post)
+            .where(models.Post.status == "published", models.Post.buttons_json.is_not(None))
+            .order_by(models.Post.id.desc())
+            .limit(limit)
+        )
+        return (await self.session.scalars(stmt)).all()
+
+    async def list_upcoming(self, until: datetime, limit: int) -> list[tuple[int, datetime]]:
+        """Due times up to ``until``: scheduled posts and expiring ``publishing`` leases."""
+        post = models.Post
+        scheduled = select(post.id, post.scheduled_at.label("due_at")).where(
+            post.status.in_(DUE_STATUSES), post.scheduled_at <= until
+        )
+        leased = select(post.id, post.claimed_until.label("due_at")).where(
+            post.status == "publishing", post.claimed_until <= until
+        )
+        union = union_all(scheduled, leased).subquery()
+        stmt = select(union.c.id, union.c.due_at).order_by(union.c.due_at).limit(limit)
+        result = await self.session.execute(stmt)
+        return [(post_id, due_at) for post_id, due_at in result]
+
+    async def claim_due(
+        self, now: datetime, limit: int, lease: timedelta
+    ) -> Sequence[models.Post]:
+        """Lock due posts, skipping rows held by other replicas, and mark them as publishing.
+
+        Posts still ``publishing`` after their lease ran out (the replica that claimed them
+        died) are claimed again. Every claim counts as a publish attempt.
+        """
+        post = models.Post
+        stmt = (
+            select(post)
+            .where(
+                or_(
+                    and_(post.status.in_(DUE_STATUSES), post.scheduled_at <= now),
+                    and_(
+                        post.status == "publishing",
+                        or_(post.claimed_until.is_(None), post.claimed_until <= now),
+                    ),
+                )
+            )
+            .order_by(post.scheduled_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        posts = (await self.session.scalars(stmt)).all()
+        for claimed in posts:
+            claimed.status = "publishing"
+            claimed.claimed_until = now + lease
+            claimed.publish_attempts += 1
+        await self.session.flush()
+        return posts
+
+    async def set_status(self, post_ids: Iterable[int], status: str) -> None:
+        values = {"status": status, "claimed_until": None, "updated_at": func.now()}
+        if status == "published":
+            values["pending_channels"] = None
+        stmt = update(models.Post).where(models.Post.id.in_(list(post_ids))).values(values)
+        await self.session.execute(stmt)
+
+    async def set_pending_channels(self, pending: Mapping[int, Sequence[int]]) -> None:
+        """Remember which channels each post still has to be sent to."""
+        if pending:
+            stmt = (
+                update(models.Post)
+                .where(models.Post.id.in_(list(pending)))
+                .values(
+                    pending_channels=case(
+                        {
+                            post_id: literal(list(channel_ids), ARRAY(Integer))
+                            for post_id, channel_ids in pending.items()
+                        },
+                        value=models.Post.id,
+                    )
+                )
+            )
+            await self.session.execute(stmt)
+
+    async def retry_at(self, due: Mapping[int, datetime]) -> None:
+        """Put claimed posts back in the queue, each due at its own time."""
+        if due:
+            stmt = (
+                update(models.Post)
+                .where(models.Post.id.in_(list(due)))
+                .values(
+                    status="queued",
+                    scheduled_at=case(
+                        {
+                            post_id: literal(due_at, DateTime(timezone=True))
+                            for post_id, due_at in due.items()
+                        },
+                        value=models.Post.id,
+                    ),
+                    claimed_until=None,
+                    updated_at=func.now(),
+                )
+            )
+            await self.session.execute(stmt)
+
 
 class StatsRepository:
     def __init__(self, session: AsyncSession):
         self.session = session
 
     async def increment_click(self, post_id: int, channel_id: int, button_key: str, value: int = 1) -> None:
-        stmt = select(models.StatsClick).where(
-            models.StatsClick.post_id == post_id,
-            models.StatsClick.channel_id == channel_id,
-            models.StatsClick.button_key == button_key,
+        await self.add_clicks({(post_id, channel_id, button_key): value})
+
+    async def add_clicks(self, counts: Mapping[ClickKey, int]) -> None:
+        """Apply summed click deltas in one executemany; keys are sorted to keep lock order stable.
+
+        The rows go as parameters, which SQLAlchemy pages into multi-row INSERTs that stay
+        under asyncpg's bind parameter limit however many keys a flush carries.
+        """
+        if not counts:
+            return
+        rows = [
+            {
+                "post_id": post_id,
+                "channel_id": channel_id,
+                "button_key": button_key,
+                "clicks": value,
+            }
+            for (post_id, channel_id, button_key), value in sorted(counts.items())
+        ]
+        stmt = insert(models.StatsClick)
+        stmt = stmt.on_conflict_do_update(
+            constraint="stats_clicks_post_channel_button_key",
+            set_={
+                "clicks": models.StatsClick.clicks + stmt.excluded.clicks,
+                "updated_at": func.now(),
+            },
         )
-        record = await self.session.scalar(stmt)
-        if record:
-            record.clicks += value
-            record.updated_at = datetime.utcnow()
-        else:
-            record = models.StatsClick(
-                post_id=post_id,
-                channel_id=channel_id,
-                button_key=button_key,
-                clicks=value,
-            )
-            self.session.add(record)
-        await self.session.flush()
+        await self.session.execute(stmt, rows)
+
+        rollup: dict[RollupKey, int] = {}
+        for (post_id, channel_id, _), value in counts.items():
+            rollup[(channel_id, post_id)] = rollup.get((channel_id, post_id), 0) + value
+        await RollupRepository(self.session).add_hourly(clicks=rollup)
 
     async def increment_reaction(self, post_id: int, channel_id: int, emoji: str, value: int = 1) -> None:
         stmt = select(models.StatsReaction).where(
@@ -168,6 +467,247 @@ class StatsRepository:
             )
             self.session.add(record)
         await self.session.flush()
+        await RollupRepository(self.session).add_hourly(reactions={(channel_id, post_id): value})
+
+    async def replace_reaction_counts(
+        self, snapshots: Mapping[PostChannel, Mapping[str, int]]
+    ) -> dict[RollupKey, int]:
+        """Store absolute per-emoji counts and return how far each total moved.
+
+        ``snapshots`` maps ``(post_id, channel_id)`` to its current counts; emojis missing
+        from a snapshot drop to zero. The old counts are read under ``FOR UPDATE`` by the
+        same UPDATE that replaces them, so concurrent writers (in other processes too) never
+        diff against a stale count and the returned ``(channel_id, post_id)`` deltas always
+        sum to the stored totals.
+        """
+        if not snapshots:
+            return {}
+        reaction = models.StatsReaction
+        keys: list[dict] = []
+        counts: list[int] = []
+        for (post_id, channel_id), current in sorted(snapshots.items()):
+            for emoji, count in sorted(current.items()):
+                keys.append({"post_id": post_id, "channel_id": channel_id, "emoji": emoji})
+                counts.append(count)
+        if keys:
+            # A zero row per reported emoji first, so the UPDATE below finds and locks it.
+            stmt = insert(reaction).values(count=0, updated_at=func.now())
+            await self.session.execute(stmt.on_conflict_do_nothing(), keys)
+
+        snapshot = (
+            func.unnest(
+                cast([key["post_id"] for key in keys], ARRAY(BigInteger)),
+                cast([key["channel_id"] for key in keys], ARRAY(BigInteger)),
+                cast([key["emoji"] for key in keys], ARRAY(String)),
+                cast(counts, ARRAY(Integer)),
+            )
+            .table_valued("post_id", "channel_id", "emoji", "count")
+            .render_derived("snapshot")
+        )
+        stored = aliased(reaction, name="stored")
+        previous = (
+            select(
+                stored.id,
+                stored.count.label("before"),
+                func.coalesce(snapshot.c.count, 0).label("after"),
+            )
+            .outerjoin(
+                snapshot,
+                and_(
+                    snapshot.c.post_id == stored.post_id,
+                    snapshot.c.channel_id == stored.channel_id,
+                    snapshot.c.emoji == stored.emoji,
+                ),
+            )
+            .where(tuple_(stored.post_id, stored.channel_id).in_(list(snapshots)))
+            .order_by(stored.id)
+            .with_for_update(of=stored)
+            .subquery("previous")
+        )
+        stmt = (
+            update(reaction)
+            .where(reaction.id == previous.c.id, previous.c.before != previous.c.after)
+            .values(count=previous.c.after, updated_at=func.now())
+            .returning(reaction.channel_id, reaction.post_id, previous.c.after - previous.c.before)
+        )
+        deltas: dict[RollupKey, int] = {}
+        for channel_id, post_id, delta in await self.session.execute(stmt):
+            deltas[(channel_id, post_id)] = deltas.get((channel_id, post_id), 0) + delta
+        return {key: delta for key, delta in deltas.items() if delta}
+
+
+def hour_bucket(moment: datetime) -> datetime:
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+class RollupRepository:
+    """Hourly and daily per-channel, per-post counters fed by the stats write path."""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def add_hourly(
+        self,
+        *,
+        clicks: Mapping[RollupKey, int] | None = None,
+        reactions: Mapping[RollupKey, int] | None = None,
+        at: datetime | None = None,
+    ) -> None:
+        clicks = clicks or {}
+        reactions = reactions or {}
+        keys = sorted(set(clicks) | set(reactions))
+        if not keys:
+            return
+        bucket_start = hour_bucket(at or datetime.now(timezone.utc))
+        rows = [
+            {
+                "channel_id": channel_id,
+                "bucket_start": bucket_start,
+                "post_id": post_id,
+                "clicks": clicks.get((channel_id, post_id), 0),
+                "reactions": reactions.get((channel_id, post_id), 0),
+            }
+            for channel_id, post_id in keys
+        ]
+        stmt = insert(models.StatsHourly)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["channel_id", "bucket_start", "post_id"],
+            set_={
+                "clicks": models.StatsHourly.clicks + stmt.excluded.clicks,
+                "reactions": models.StatsHourly.reactions + stmt.excluded.reactions,
+            },
+        )
+        await self.session.execute(stmt, rows)
+
+    async def compact(self, cutoff: datetime) -> int:
+        """Move hourly rows older than ``cutoff`` into daily rows in a single statement."""
+        moved = (
+            delete(models.StatsHourly)
+            .where(models.StatsHourly.bucket_start < cutoff)
+            .returning(
+                models.StatsHourly.channel_id,
+                models.StatsHourly.bucket_start,
+                models.StatsHourly.post_id,
+                models.StatsHourly.clicks,
+                models.StatsHourly.reactions,
+            )
+            .cte("moved")
+        )
+        day = func.date_trunc("day", moved.c.bucket_start, "UTC")
+        grouped = select(
+            moved.c.channel_id,
+            day,
+            moved.c.post_id,
+            func.sum(moved.c.clicks),
+            func.sum(moved.c.reactions),
+        ).group_by(moved.c.channel_id, day, moved.c.post_id)
+        stmt = insert(models.StatsDaily).from_select(
+            ["channel_id", "bucket_start", "post_id", "clicks", "reactions"], grouped
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["channel_id", "bucket_start", "post_id"],
+            set_={
+                "clicks": models.StatsDaily.clicks + stmt.excluded.clicks,
+                "reactions": models.StatsDaily.reactions + stmt.excluded.reactions,
+            },
+        )
+        result = await self.session.execute(stmt)
+        return result.rowcount
+
+    async def channel_series(
+        self,
+        channel_id: int,
+        since: datetime,
+        until: datetime,
+        granularity: str = "hour",
+    ) -> list[tuple[datetime, int, int]]:
+        """Return ``(bucket_start, clicks, reactions)`` per hour or per day for a channel."""
+        hourly = models.StatsHourly
+        if granularity == "hour":
+            stmt = (
+                select(hourly.bucket_start, func.sum(hourly.clicks), func.sum(hourly.reactions))
+                .where(
+                    hourly.channel_id == channel_id,
+                    hourly.bucket_start >= since,
+                    hourly.bucket_start < until,
+                )
+                .group_by(hourly.bucket_start)
+                .order_by(hourly.bucket_start)
+            )
+        elif granularity == "day":
+            daily = models.StatsDaily
+            recent_day = func.date_trunc("day", hourly.bucket_start, "UTC")
+            rows = union_all(
+                select(
+                    daily.bucket_start.label("bucket_start"),
+                    daily.clicks.label("clicks"),
+                    daily.reactions.label("reactions"),
+                ).where(
+                    daily.channel_id == channel_id,
+                    daily.bucket_start >= since,
+                    daily.bucket_start < until,
+                ),
+                select(
+                    recent_day.label("bucket_start"),
+                    hourly.clicks.label("clicks"),
+                    hourly.reactions.label("reactions"),
+                ).where(
+                    hourly.channel_id == channel_id,
+                    hourly.bucket_start >= since,
+                    hourly.bucket_start < until,
+                ),
+            ).subquery()
+            stmt = (
+                select(rows.c.bucket_start, func.sum(rows.c.clicks), func.sum(rows.c.reactions))
+                .group_by(rows.c.bucket_start)
+                .order_by(rows.c.bucket_start)
+            )
+        else:
+            raise ValueError(f"Unknown granularity: {granularity}")
+
+        result = await self.session.execute(stmt)
+        return [(bucket, int(clicks or 0), int(reactions or 0)) for bucket, clicks, reactions in result]
+
+    def post_totals_query(
+        self, since: datetime, until: datetime, channel_ids: Sequence[int] | None = None
+    ) -> Select:
+        hourly, daily = models.StatsHourly, models.StatsDaily
+        parts = []
+        for table in (hourly, daily):
+            part = select(table.channel_id, table.post_id, table.clicks, table.reactions).where(
+                table.bucket_start >= since, table.bucket_start < until
+            )
+            if channel_ids is not None:
+                part = part.where(table.channel_id.in_(channel_ids))
+            parts.append(part)
+        rows = union_all(*parts).subquery()
+        return select(
+            rows.c.channel_id,
+            rows.c.post_id,
+            func.sum(rows.c.clicks).cast(BigInteger),
+            func.sum(rows.c.reactions).cast(BigInteger),
+        ).group_by(rows.c.channel_id, rows.c.post_id)
+
+    async def post_totals(
+        self, since: datetime, until: datetime, channel_ids: Sequence[int] | None = None
+    ) -> list[tuple[int, int, int, int]]:
+        """``(channel_id, post_id, clicks, reactions)`` accumulated in ``[since, until)``."""
+        result = await self.session.execute(self.post_totals_query(since, until, channel_ids))
+        return result.tuples().all()
+
+    async def stream_post_totals(
+        self,
+        since: datetime,
+        until: datetime,
+        channel_ids: Sequence[int] | None = None,
+        *,
+        batch_size: int = 50_000,
+    ) -> AsyncIterator[Sequence[tuple[int, int, int, int]]]:
+        """``post_totals`` in batches of at most ``batch_size`` rows."""
+        stmt = self.post_totals_query(since, until, channel_ids)
+        result = await self.session.stream(stmt.execution_options(yield_per=batch_size))
+        async for partition in result.partitions():
+            yield partition
 
 
 class AuditRepository:
@@ -193,3 +733,180 @@ class AuditRepository:
         self.session.add(entry)
         await self.session.flush()
         return entry
+
+    async def log_many(self, entries: Sequence[Mapping]) -> None:
+        """Insert prepared entries with a single executemany."""
+        if entries:
+            await self.session.execute(insert(models.AuditEntry), list(entries))
+
+    async def ensure_partition(self, month_start: date) -> None:
+        await self.session.execute(
+            text("SELECT audit_ensure_partition(:month_start)"), {"month_start": month_start}
+        )
+
+    async def list_partitions(self) -> list[str]:
+        result = await self.session.execute(
+            text(
+                "SELECT child.relname FROM pg_inherits "
+                "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+                "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+                "WHERE parent.relname = 'audit'"
+            )
+        )
+        return sorted(result.scalars())
+
+    async def drop_partitions_before(self, month_start: date) -> list[str]:
+        """Drop monthly partitions (``audit_YYYYMM``) that end before ``month_start``."""
+        cutoff = f"audit_{month_start:%Y%m}"
+        dropped = [
+            name
+            for name in await self.list_partitions()
+            if AUDIT_PARTITION_RE.fullmatch(name) and name < cutoff
+        ]
+        for name in dropped:
+            await self.session.execute(text(f'DROP TABLE IF EXISTS "{name}"'))
+        return dropped
+
+
+class MediaRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def get_file_id(self, sha256: str, kind: str) -> str | None:
+        """Return the cached ``file_id`` and bump ``last_used_at`` in the same statement."""
+        stmt = (
+            update(models.MediaFile)
+            .where(models.MediaFile.sha256 == sha256, models.MediaFile.kind == kind)
+            .values(last_used_at=func.now())
+            .returning(models.MediaFile.file_id)
+        )
+        return (await self.session.execute(stmt)).scalar_one_or_none()
+
+    async def save(self, sha256: str, kind: str, file_id: str, size_bytes: int) -> None:
+        stmt = insert(models.MediaFile).values(
+            sha256=sha256, kind=kind, file_id=file_id, size_bytes=size_bytes
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["sha256", "kind"],
+            set_={"file_id": stmt.excluded.file_id, "last_used_at": func.now()},
+        )
+        await self.session.execute(stmt)
+
+    async def delete(self, sha256: str, kind: str, file_id: str) -> None:
+        """Forget ``file_id``; a newer one saved by another worker is left in place."""
+        await self.session.execute(
+            delete(models.MediaFile).where(
+                models.MediaFile.sha256 == sha256,
+                models.MediaFile.kind == kind,
+                models.MediaFile.file_id == file_id,
+            )
+        )
+
+    async def prune(self, keep: int) -> int:
+        """Delete all but the ``keep`` most recently used entries."""
+        stale = (
+            select(models.MediaFile.sha256, models.MediaFile.kind)
+            .order_by(models.MediaFile.last_used_at.desc())
+            .offset(keep)
+        )
+        result = await self.session.execute(
+            delete(models.MediaFile).where(
+                tuple_(models.MediaFile.sha256, models.MediaFile.kind).in_(stale)
+            )
+        )
+        return result.rowcount or 0
+
+
+class PublishedMessageRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def add_many(self, rows: Sequence[Mapping]) -> None:
+        """Insert ``chat_id/message_id/post_id/channel_id`` rows, ignoring ones already known.
+
+        Rows may also carry the ``content_hash`` of the version that was sent.
+        """
+        if rows:
+            stmt = insert(models.PublishedMessage).on_conflict_do_nothing()
+            await self.session.execute(stmt, [{"content_hash": None, **row} for row in rows])
+
+    async def lookup_many(self, keys: Iterable[MessageKey]) -> dict[MessageKey, PostChannel]:
+        keys = list(keys)
+        if not keys:
+            return {}
+        stmt = select(
+            models.PublishedMessage.chat_id,
+            models.PublishedMessage.message_id,
+            models.PublishedMessage.post_id,
+            models.PublishedMessage.channel_id,
+        ).where(
+            tuple_(models.PublishedMessage.chat_id, models.PublishedMessage.message_id).in_(keys)
+        )
+        result = await self.session.execute(stmt)
+        return {
+            (chat_id, message_id): (post_id, channel_id)
+            for chat_id, message_id, post_id, channel_id in result
+        }
+
+    async def for_post(self, post_id: int) -> list[tuple[int, int, int, str | None]]:
+        """``(chat_id, message_id, channel_id, content_hash)`` of every message of the post."""
+        published = models.PublishedMessage
+        stmt = select(
+            published.chat_id, published.message_id, published.channel_id, published.content_hash
+        ).where(published.post_id == post_id)
+        result = await self.session.execute(stmt)
+        return result.tuples().all()
+
+    async def set_content_hash(self, keys: Iterable[MessageKey], content_hash: str) -> None:
+        keys = list(keys)
+        if keys:
+            published = models.PublishedMessage
+            await self.session.execute(
+                update(published)
+                .where(tuple_(published.chat_id, published.message_id).in_(keys))
+                .values(content_hash=content_hash)
+            )
+
+    def publications_query(
+        self,
+        since: datetime,
+        until: datetime,
+        channel_ids: Sequence[int] | None = None,
+    ) -> Select:
+        published = models.PublishedMessage
+        stmt = (
+            select(
+                published.channel_id,
+                published.post_id,
+                func.extract("epoch", func.min(published.published_at)).cast(BigInteger),
+            )
+            .where(published.published_at >= since, published.published_at < until)
+            .group_by(published.channel_id, published.post_id)
+        )
+        if channel_ids is not None:
+            stmt = stmt.where(published.channel_id.in_(channel_ids))
+        return stmt
+
+    async def publications(
+        self,
+        since: datetime,
+        until: datetime,
+        channel_ids: Sequence[int] | None = None,
+    ) -> list[tuple[int, int, int]]:
+        """``(channel_id, post_id, published_at as epoch seconds)`` of every publication."""
+        result = await self.session.execute(self.publications_query(since, until, channel_ids))
+        return result.tuples().all()
+
+    async def stream_publications(
+        self,
+        since: datetime,
+        until: datetime,
+        channel_ids: Sequence[int] | None = None,
+        *,
+        batch_size: int = 50_000,
+    ) -> AsyncIterator[Sequence[tuple[int, int, int]]]:
+        """``publications`` in batches of at most ``batch_size`` rows."""
+        stmt = self.publications_query(since, until, channel_ids)
+        result = await self.session.stream(stmt.execution_options(yield_per=batch_size))
+        async for partition in result.partitions():
+            yield partition
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from contextlib import suppress
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from alt_controller_bot.services.repositories import RollupRepository
+
+logger = logging.getLogger(__name__)
+
+
+class RollupCompactor:
+    """Periodically merges hourly stats rows older than ``retention`` into daily rows."""
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        *,
+        retention: timedelta = timedelta(days=30),
+        interval: float = 3600.0,
+    ):
+        self.session_factory = session_factory
+        self.retention = retention
+        self.interval = interval
+        self._task: asyncio.Task[None] | None = None
+
+    async def compact(self) -> int:
+        # Align the cutoff to midnight so a day is never split between the two tables.
+        cutoff = (datetime.now(timezone.utc) - self.retention).replace(
+            hour=0, minute=0, second=0, microsecond=0
+        )
+        async with self.session_factory() as session, session.begin():
+            return await RollupRepository(session).compact(cutoff)
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="rollup-compactor")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                compacted = await self.compact()
+                if compacted:
+                    logger.info("Compacted hourly stats into %d daily rows", compacted)
+            except Exception:
+                logger.exception("Stats rollup compaction failed")
+            await asyncio.sleep(self.interval)
@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import logging
+from contextlib import suppress
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Iterable
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from alt_controller_bot.db import models
+from alt_controller_bot.services.audit import AuditSink
+from alt_controller_bot.services.invalidation import InvalidationBus
+from alt_controller_bot.services.publisher import PublishError
+from alt_controller_bot.services.repositories import CHANGED_POSTS_KEY, PostRepository
+
+logger = logging.getLogger(__name__)
+
+PublishCallback = Callable[[models.Post], Awaitable[object]]
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class PublicationScheduler:
+    """Publishes ``scheduled``/``queued`` posts when their ``scheduled_at`` comes due.
+
+    Upcoming deadlines within ``refresh_interval * 2`` are kept in a min-heap so the loop
+    sleeps exactly until the next one. Bound to an ``InvalidationBus``, every committed
+    post change, in this process or another, reloads the heap right away, so a post
+    scheduled elsewhere is not left waiting for the next periodic refresh. Due posts are
+    claimed in batches with ``FOR UPDATE SKIP LOCKED`` and switched to ``publishing`` in
+    the same transaction, so several replicas can run side by side without sending a post
+    twice.
+
+    A claim is a lease of ``lease`` seconds; posts a crashed replica left ``publishing``
+    are claimed again when it runs out. A failed post is re-queued ``retry_delay * 2**n``
+    seconds later (capped at ``max_retry_delay``) and marked ``failed`` after
+    ``max_attempts`` claims. Both outcomes are recorded in ``audit`` when given.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        publish: PublishCallback,
+        *,
+        batch_size: int = 100,
+        refresh_interval: float = 30.0,
+        lookahead: int = 1000,
+        lease: float = 600.0,
+        max_attempts: int = 5,
+        retry_delay: float = 30.0,
+        max_retry_delay: float = 3600.0,
+        audit: AuditSink | None = None,
+    ):
+        self.session_factory = session_factory
+        self.publish = publish
+        self.batch_size = batch_size
+        self.refresh_interval = refresh_interval
+        self.lookahead = lookahead
+        self.lease = timedelta(seconds=lease)
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.audit = audit
+        self._heap: list[tuple[datetime, int]] = []
+        self._wakeup = asyncio.Event()
+        self._next_refresh = 0.0
+        self._task: asyncio.Task[None] | None = None
+
+    def backoff(self, attempts: int) -> timedelta:
+        delay = self.retry_delay * 2 ** max(attempts - 1, 0)
+        return timedelta(seconds=min(delay, self.max_retry_delay))
+
+    def schedule(self, post_id: int, due_at: datetime) -> None:
+        """Register a deadline created in this process without waiting for the next refresh."""
+        earliest = not self._heap or due_at < self._heap[0][0]
+        heapq.heappush(self._heap, (due_at, post_id))
+        if earliest:
+            self._wakeup.set()
+
+    def bind(self, bus: InvalidationBus) -> None:
+        bus.subscribe(CHANGED_POSTS_KEY, self.posts_changed)
+
+    def unbind(self, bus: InvalidationBus) -> None:
+        bus.unsubscribe(CHANGED_POSTS_KEY, self.posts_changed)
+
+    def posts_changed(self, post_ids: Iterable[int] | None) -> None:
+        # A burst of changes costs one refresh: the loop picks them all up when it wakes.
+        self._next_refresh = 0.0
+        self._wakeup.set()
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="publication-scheduler")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    async def refresh(self) -> None:
+        # Set first, so a change announced while loading asks for another refresh.
+        self._next_refresh = asyncio.get_running_loop().time() + self.refresh_interval
+        horizon = utcnow() + timedelta(seconds=self.refresh_interval * 2)
+        async with self.session_factory() as session:
+            upcoming = await PostRepository(session).list_upcoming(horizon, self.lookahead)
+        self._heap = [(due_at, post_id) for post_id, due_at in upcoming]
+        heapq.heapify(self._heap)
+
+    async def dispatch_due(self) -> int:
+        now = utcnow()
+        while self._heap and self._heap[0][0] <= now:
+            heapq.heappop(self._heap)
+
+        published = 0
+        while True:
+            async with self.session_factory() as session, session.begin():
+                posts = await PostRepository(session).claim_due(now, self.batch_size, self.lease)
+            if not posts:
+                return published
+            claimed = len(posts)
+            # Only posts left 'publishing' by a crashed replica can exceed the limit here.
+            exhausted = [post.id for post in posts if post.publish_attempts > self.max_attempts]
+            posts = [post for post in posts if post.publish_attempts <= self.max_attempts]
+            results = await asyncio.gather(
+                *(self.publish(post) for post in posts), return_exceptions=True
+            )
+            sent: list[int] = []
+            retries: dict[int, datetime] = {}
+            pending: dict[int, list[int]] = {}
+            for post, result in zip(posts, results):
+                if not isinstance(result, BaseException):
+                    sent.append(post.id)
+                    continue
+                if isinstance(result, PublishError):
+                    # The next attempt only goes to the channels this one did not reach.
+                    pending[post.id] = result.failed_channels
+                logger.error(
+                    "Failed to publish post %s (attempt %s)",
+                    post.id,
+                    post.publish_attempts,
+                    exc_info=result,
+                )
+                if post.publish_attempts >= self.max_attempts:
+                    exhausted.append(post.id)
+                else:
+                    # Due after ``now``, so the claim loop below cannot pick it up again.
+                    retries[post.id] = utcnow() + self.backoff(post.publish_attempts)
+            async with self.session_factory() as session, session.begin():
+                repo = PostRepository(session)
+                if sent:
+                    await repo.set_status(sent, "published")
+                if exhausted:
+                    await repo.set_status(exhausted, "failed")
+                await repo.set_pending_channels(pending)
+                await repo.retry_at(retries)
+            for post_id, due_at in retries.items():
+                self.schedule(post_id, due_at)
+            if self.audit is not None:
+                for action, post_ids in (("post.publish", sent), ("post.fail", exhausted)):
+                    for post_id in post_ids:
+                        self.audit.log(
+                            user_id=None, action=action, target_type="post", target_id=post_id
+                        )
+            published += len(sent)
+            if claimed < self.batch_size:
+                return published
+
+    def _sleep_for(self) -> float:
+        loop_now = asyncio.get_running_loop().time()
+        timeout = max(self._next_refresh - loop_now, 0.0)
+        if self._heap:
+            until_due = (self._heap[0][0] - utcnow()).total_seconds()
+            timeout = min(timeout, max(until_due, 0.0))
+        return timeout
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                if asyncio.get_running_loop().time() >= self._next_refresh:
+                    await self.refresh()
+                if self._heap and self._heap[0][0] <= utcnow():
+                    await self.dispatch_due()
+            except Exception:
+                logger.exception("Publication scheduler iteration failed")
+                self._next_refresh = asyncio.get_running_loop().time() + self.refresh_interval
+
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self._sleep_for())
+            self._wakeup.clear()
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from contextlib import suppress
+from typing import Generic, Hashable, TypeVar
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+logger = logging.getLogger(__name__)
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class WriteBehindBuffer(Generic[K, V]):
+    """Base of the in-memory buffers that batch counters into the database.
+
+    Subclasses merge incoming values into ``_pending`` and call ``_added``; the batch is
+    written by ``_write`` every ``flush_interval`` seconds, or earlier once
+    ``max_pending`` keys are waiting. A flush that fails or is cancelled hands its batch
+    to ``_restore``, and ``stop()`` ends the timer before one last flush.
+    """
+
+    task_name = "write-behind"
+    # Plural noun for log messages.
+    entries = "entries"
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        *,
+        flush_interval: float = 5.0,
+        max_pending: int = 1000,
+        shutdown_timeout: float = 10.0,
+    ):
+        self.session_factory = session_factory
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.shutdown_timeout = shutdown_timeout
+        self._pending: dict[K, V] = {}
+        self._wakeup = asyncio.Event()
+        self._closing = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: asyncio.Task[None] | None = None
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def _added(self) -> None:
+        if len(self._pending) >= self.max_pending:
+            self._wakeup.set()
+
+    async def _write(self, batch: dict[K, V]) -> int:
+        """Persist ``batch``; returns the number of entries written."""
+        raise NotImplementedError
+
+    def _restore(self, batch: dict[K, V]) -> None:
+        """Merge an unwritten ``batch`` back into ``_pending``."""
+        raise NotImplementedError
+
+    async def flush(self) -> int:
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+            batch, self._pending = self._pending, {}
+            try:
+                return await self._write(batch)
+            except BaseException:
+                # A cancelled flush included, so stop() still gets to write the batch.
+                self._restore(batch)
+                raise
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._closing.clear()
+            self._task = asyncio.create_task(self._run(), name=self.task_name)
+
+    async def stop(self) -> None:
+        """Stop the timer, letting a flush in progress finish, then flush what is left."""
+        if self._task is not None:
+            self._closing.set()
+            self._wakeup.set()
+            try:
+                await asyncio.wait_for(asyncio.shield(self._task), timeout=self.shutdown_timeout)
+            except asyncio.TimeoutError:
+                self._task.cancel()
+                with suppress(asyncio.CancelledError):
+                    await self._task
+            self._task = None
+        try:
+            await asyncio.wait_for(self.flush(), timeout=self.shutdown_timeout)
+        except Exception:
+            logger.exception("Lost %d %s on shutdown", self.pending, self.entries)
+
+    async def _run(self) -> None:
+        while not self._closing.is_set():
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            self._wakeup.clear()
+            if self._closing.is_set():
+                return  # stop() does the final flush
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Failed to flush %d %s", self.pending, self.entries)
@@ -0,0 +1,41 @@
+import pytest
+
+
+class FakeSession:
+    """``AsyncSession`` stand-in for services whose repositories are replaced by fakes."""
+
+    def __init__(self):
+        self.info: dict = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return None
+
+    def begin(self):
+        return self
+
+    async def commit(self):
+        return None
+
+
+@pytest.fixture
+def session_factory():
+    return FakeSession
+
+
+@pytest.fixture
+def fake_repository(monkeypatch):
+    """Install ``fake`` as ``module.<name>``, resetting its class-level state for the test.
+
+    ``fake_repository(clicks_module, "StatsRepository", FakeStatsRepository, written=[])``
+    """
+
+    def install(module, name, fake, **state):
+        for attribute, value in state.items():
+            monkeypatch.setattr(fake, attribute, value)
+        monkeypatch.setattr(module, name, fake)
+        return fake
+
+    return install
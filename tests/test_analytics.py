@@ -0,0 +1,47 @@
+from datetime import datetime, timezone
+
+import numpy as np
+
+from alt_controller_bot.bot.handlers.common import MAX_MESSAGE_LENGTH
+from alt_controller_bot.bot.handlers.stats import format_report
+from alt_controller_bot.services.analytics import (
+    EngagementFrame,
+    build_report,
+    engagement_trend,
+)
+
+MAY = int(datetime(2026, 5, 10, tzinfo=timezone.utc).timestamp())
+JUNE = int(datetime(2026, 6, 10, tzinfo=timezone.utc).timestamp())
+
+
+def make_frame():
+    publications = [(1, 10, MAY), (1, 11, JUNE), (2, 20, MAY), (2, 21, JUNE), (3, 30, JUNE)]
+    totals = [(1, 10, 4, 6), (1, 11, 10, 10), (2, 20, 5, 5), (2, 21, 1, 4), (9, 99, 7, 7)]
+    return EngagementFrame.from_rows(publications, totals)
+
+
+def test_totals_are_joined_by_channel_and_post():
+    frame = make_frame()
+    assert frame.clicks.tolist() == [4, 10, 5, 1, 0]
+    assert frame.reactions.tolist() == [6, 10, 5, 4, 0]
+
+
+def test_engagement_trend_compares_the_last_two_months():
+    report = build_report(make_frame())
+    assert report.monthly.months == ["2026-05", "2026-06"]
+    assert engagement_trend(report.monthly) == {1: 1.0, 2: -0.5}
+
+
+def test_report_is_split_into_messages():
+    frame = EngagementFrame.from_rows(
+        [(channel, channel, MAY + channel) for channel in range(1, 501)]
+        + [(channel, 1000 + channel, JUNE) for channel in range(1, 501)],
+        [(channel, channel, 3, 2) for channel in range(1, 501)],
+    )
+    chunks = format_report(build_report(frame), 60)
+    text = "".join(chunks)
+    assert len(chunks) > 1
+    assert all(len(chunk) <= MAX_MESSAGE_LENGTH for chunk in chunks)
+    assert "2026-06: 500 · 0.00 · 0.00" in text
+    assert text.count("\n") == 500 + 5
+    assert np.all(build_report(frame).monthly.posts == 1)
@@ -0,0 +1,107 @@
+import asyncio
+import json
+
+import pytest
+
+from alt_controller_bot.services import audit as audit_module
+from alt_controller_bot.services.audit import AuditSink
+
+
+class FakeAuditRepository:
+    written: list[dict] = []
+    hang = False
+
+    def __init__(self, session):
+        self.session = session
+
+    async def log_many(self, entries):
+        if self.hang:
+            await asyncio.Event().wait()
+        self.written.extend(entries)
+
+
+@pytest.fixture(autouse=True)
+def repository(fake_repository):
+    return fake_repository(
+        audit_module, "AuditRepository", FakeAuditRepository, written=[], hang=False
+    )
+
+
+@pytest.fixture
+def make_sink(session_factory):
+    def make(tmp_path=None, **kwargs):
+        spill_path = tmp_path / "audit.jsonl" if tmp_path is not None else None
+        return AuditSink(session_factory, spill_path=spill_path, **kwargs)
+
+    return make
+
+
+def log(sink, count):
+    for index in range(count):
+        sink.log(user_id=1, action="test", target_type="post", target_id=index)
+
+
+def spill_files(tmp_path):
+    return sorted(tmp_path.glob("audit.*.jsonl"))
+
+
+async def test_stop_writes_what_is_still_queued(make_sink, repository):
+    sink = make_sink(flush_interval=60)
+    await sink.start()
+    log(sink, 3)
+    await asyncio.sleep(0)  # the sink now waits out flush_interval for more entries
+
+    await asyncio.wait_for(sink.stop(), timeout=1)
+    assert [entry["target_id"] for entry in repository.written] == [0, 1, 2]
+
+
+async def test_entries_logged_after_stop_are_spilled(make_sink, repository, tmp_path):
+    sink = make_sink(tmp_path)
+    await sink.start()
+    await sink.stop()
+    log(sink, 1)
+
+    [path] = spill_files(tmp_path)
+    assert repository.written == []
+    assert len(path.read_text().splitlines()) == 1
+
+
+async def test_stuck_write_is_spilled_on_stop(make_sink, repository, tmp_path):
+    repository.hang = True
+    sink = make_sink(tmp_path, batch_size=2, flush_interval=0, shutdown_timeout=0.1)
+    await sink.start()
+    log(sink, 3)
+    await asyncio.sleep(0.05)
+
+    await sink.stop()
+    [path] = spill_files(tmp_path)
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert sorted(line["target_id"] for line in lines) == [0, 1, 2]
+
+
+async def test_spill_files_of_running_processes_are_not_replayed(make_sink, repository, tmp_path):
+    running = make_sink(tmp_path, maxsize=1)
+    log(running, 3)  # two of them overflow the queue
+    assert len(spill_files(tmp_path)) == 1
+
+    other = make_sink(tmp_path)
+    await other.start()
+    await other.stop()
+    assert repository.written == []
+
+    running._spill_file.close()  # the process is gone, and its lock with it
+    restarted = make_sink(tmp_path)
+    await restarted.start()
+    await restarted.stop()
+    assert [entry["target_id"] for entry in repository.written] == [1, 2]
+    assert spill_files(tmp_path) == []
+
+
+async def test_replay_skips_a_truncated_line(make_sink, repository, tmp_path):
+    (tmp_path / "audit.1-dead.jsonl").write_text(
+        json.dumps({"action": "ok", "ts": "2026-01-01T00:00:00+00:00"}) + '\n{"action": "cut'
+    )
+    sink = make_sink(tmp_path)
+    await sink.start()
+    await sink.stop()
+    assert [entry["action"] for entry in repository.written] == ["ok"]
@@ -0,0 +1,122 @@
+import pytest
+from aiogram import Bot, Dispatcher
+from aiogram.types import CallbackQuery, Update, User
+
+from alt_controller_bot.bot.callbacks import CallbackRouter
+from alt_controller_bot.core.callbacks import (
+    MAX_CALLBACK_DATA,
+    CallbackType,
+    decode_varints,
+    encode_varints,
+)
+
+VOTE = CallbackType("vote", "post_id", "channel_id", "button")
+
+
+def make_query(data):
+    user = User(id=1, is_bot=False, first_name="u")
+    return CallbackQuery(id="1", from_user=user, chat_instance="c", data=data)
+
+
+@pytest.mark.parametrize(
+    "values",
+    [(), (0,), (1, -1), (-(2**63), 2**63 - 1), (-1_001_234_567_890, 2**40, 127, 128, -64, -65)],
+)
+def test_varints_round_trip(values):
+    assert decode_varints(encode_varints(values)) == list(values)
+
+
+def test_small_values_take_one_byte():
+    assert len(encode_varints((63, -64))) == 2
+    assert len(encode_varints((64,))) == 2
+
+
+def test_truncated_varint_is_rejected():
+    data = encode_varints((2**40,))
+    with pytest.raises(ValueError):
+        decode_varints(data[:-1])
+
+
+@pytest.mark.parametrize("values", [(1, 2, 3), (2**31, -1_001_234_567_890, 0)])
+def test_pack_round_trip(values):
+    data = VOTE.pack(*values)
+    assert data.startswith("vote:")
+    assert VOTE.unpack(data) == values
+    assert VOTE.unpack(data).channel_id == values[1]
+
+
+def test_pack_takes_keywords_and_fieldless_types_are_bare_keys():
+    assert VOTE.unpack(VOTE.pack(post_id=5, channel_id=-7, button=0)) == (5, -7, 0)
+    ping = CallbackType("ping")
+    assert ping.pack() == "ping"
+    assert ping.unpack("ping") == ()
+
+
+def test_pack_enforces_the_callback_data_limit():
+    wide = CallbackType("wide", *(f"f{index}" for index in range(6)))
+    # Ten varint bytes per 2**62, five base85 characters per four bytes.
+    data = wide.pack(*[2**62] * 4, 0, 0)
+    assert len(data.encode()) <= MAX_CALLBACK_DATA
+    assert wide.unpack(data) == (2**62,) * 4 + (0, 0)
+    with pytest.raises(ValueError, match="exceeds 64 bytes"):
+        wide.pack(*[2**62] * 5, 0)
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        "vote",  # no payload
+        "vote:",  # empty payload
+        "other:" + VOTE.pack(1, 2, 3).partition(":")[2],  # another key
+        VOTE.pack(1, 2, 3)[:-2],  # truncated
+        "vote:~~~~~",  # not base85
+        "vote:" + CallbackType("pair", "a", "b").pack(1, 2).partition(":")[2],  # too few
+    ],
+)
+def test_malformed_payloads_are_rejected(data):
+    with pytest.raises(ValueError):
+        VOTE.unpack(data)
+
+
+def test_invalid_keys_are_rejected():
+    for key in ("", "Vote", "with:colon", "x" * 17):
+        with pytest.raises(ValueError):
+            CallbackType(key)
+
+
+def test_router_matches_by_key_and_rejects_bad_payloads():
+    router = CallbackRouter()
+
+    @router.callback(VOTE)
+    async def on_vote(query, callback_data):
+        return callback_data
+
+    match = router._match(make_query(VOTE.pack(1, -2, 3)))
+    assert match["callback_data"] == (1, -2, 3)
+    assert router._match(make_query("unknown:abc")) is False
+    assert router._match(make_query(None)) is False
+    assert router._match(make_query(VOTE.pack(1, 2, 3)[:-2])) is False
+    assert router._match(make_query("vote:~~~~~")) is False
+
+
+def test_router_refuses_a_key_registered_twice():
+    router = CallbackRouter()
+    router.callback(VOTE)(lambda query: None)
+    with pytest.raises(ValueError, match="already registered"):
+        router.callback(CallbackType("vote", "other"))(lambda query: None)
+
+
+async def test_router_hands_the_payload_to_the_handler():
+    router = CallbackRouter()
+    received = []
+
+    @router.callback(VOTE)
+    async def on_vote(query: CallbackQuery, callback_data) -> None:
+        received.append(callback_data)
+
+    dp = Dispatcher()
+    dp.include_router(router)
+    update = Update(update_id=1, callback_query=make_query(VOTE.pack(7, -100, 2)))
+    await dp.feed_update(Bot("42:TEST"), update)
+    assert received == [(7, -100, 2)]
+    assert received[0].post_id == 7
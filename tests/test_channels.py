@@ -0,0 +1,114 @@
+import asyncio
+from types import SimpleNamespace
+
+import fakeredis
+import pytest
+
+from alt_controller_bot.db import models
+from alt_controller_bot.services import channels as channels_module
+from alt_controller_bot.services.channels import ChannelRegistry
+from alt_controller_bot.services.invalidation import InvalidationBus
+from alt_controller_bot.services.repositories import CHANGED_CHANNELS_KEY
+
+
+def make_channel(channel_id, title):
+    return models.Channel(id=channel_id, tg_chat_id=-channel_id, title=title)
+
+
+class FakeChannelRepository:
+    rows: dict[int, models.Channel] = {}
+    during_load = None
+
+    def __init__(self, session):
+        self.session = session
+
+    async def get_all_channels(self):
+        rows = list(self.rows.values())
+        if self.during_load is not None:
+            self.during_load()
+        return rows
+
+    async def get_channels(self, channel_ids):
+        return [self.rows[channel_id] for channel_id in channel_ids if channel_id in self.rows]
+
+
+@pytest.fixture(autouse=True)
+def repository(fake_repository):
+    return fake_repository(
+        channels_module,
+        "ChannelRepository",
+        FakeChannelRepository,
+        rows={1: make_channel(1, "one"), 2: make_channel(2, "two")},
+        during_load=None,
+    )
+
+
+@pytest.fixture
+def make_registry(session_factory):
+    return lambda: ChannelRegistry(session_factory)
+
+
+async def settle(registry):
+    while registry._reloads:
+        await asyncio.wait(list(registry._reloads))
+
+
+async def test_local_commit_is_applied_right_away(make_registry):
+    bus = InvalidationBus(None, (CHANGED_CHANNELS_KEY,))
+    registry = make_registry()
+    registry.bind(bus)
+    await registry.start()
+
+    session = SimpleNamespace(info={CHANGED_CHANNELS_KEY: {1: make_channel(1, "renamed")}})
+    bus._after_commit(session)
+    assert registry.get(1).title == "renamed"
+    assert registry.by_chat_id(-1).title == "renamed"
+    assert CHANGED_CHANNELS_KEY not in session.info
+    assert registry._reloads == set()
+
+
+async def test_change_committed_while_loading_is_not_lost(make_registry, repository):
+    bus = InvalidationBus(None, (CHANGED_CHANNELS_KEY,))
+    registry = make_registry()
+    registry.bind(bus)
+
+    def commit_elsewhere():
+        repository.rows[1] = make_channel(1, "renamed")
+        bus.dispatch(CHANGED_CHANNELS_KEY, {1})
+
+    repository.during_load = staticmethod(commit_elsewhere)
+    await registry.start()
+    repository.during_load = None
+    await settle(registry)
+    assert registry.get(1).title == "renamed"
+
+
+async def test_bus_reloads_channels_changed_in_other_processes(make_registry, repository):
+    server = fakeredis.FakeServer()
+    here = InvalidationBus(fakeredis.FakeAsyncRedis(server=server), (CHANGED_CHANNELS_KEY,))
+    there = InvalidationBus(fakeredis.FakeAsyncRedis(server=server), (CHANGED_CHANNELS_KEY,))
+    registry = make_registry()
+    registry.bind(there)
+    await there.start()
+    await registry.start()
+    try:
+        repository.rows[2] = make_channel(2, "renamed")
+        del repository.rows[1]
+        here._after_commit(SimpleNamespace(info={CHANGED_CHANNELS_KEY: {1: None, 2: None}}))
+        for _ in range(100):
+            if registry.get(1) is None:
+                break
+            await asyncio.sleep(0.01)
+        await settle(registry)
+        assert registry.get(1) is None and registry.by_chat_id(-1) is None
+        assert registry.get(2).title == "renamed"
+
+        # After a reconnect the registry cannot know what it missed and reloads everything.
+        repository.rows[3] = make_channel(3, "three")
+        there.dispatch(CHANGED_CHANNELS_KEY, None)
+        await settle(registry)
+        assert len(registry) == 2 and registry.get(3).title == "three"
+    finally:
+        await registry.stop()
+        await there.stop()
+        await here.stop()
@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from alt_controller_bot.services import clicks as clicks_module
+from alt_controller_bot.services.clicks import ClickAggregator
+from alt_controller_bot.services.repositories import StatsRepository
+
+
+class FakeStatsRepository:
+    written: list[dict] = []
+    delay = 0.0
+
+    def __init__(self, session):
+        self.session = session
+
+    async def add_clicks(self, counts):
+        await asyncio.sleep(self.delay)
+        self.written.append(dict(counts))
+
+
+@pytest.fixture(autouse=True)
+def repository(fake_repository):
+    return fake_repository(
+        clicks_module, "StatsRepository", FakeStatsRepository, written=[], delay=0.0
+    )
+
+
+async def test_cancelled_flush_keeps_its_deltas(repository, session_factory):
+    repository.delay = 60
+    aggregator = ClickAggregator(session_factory)
+    aggregator.add(1, 1, "b0", 3)
+    flush = asyncio.create_task(aggregator.flush())
+    await asyncio.sleep(0.01)
+    flush.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await flush
+    assert aggregator.pending == 1
+
+    repository.delay = 0
+    await aggregator.flush()
+    assert repository.written == [{(1, 1, "b0"): 3}]
+
+
+async def test_bulk_upserts_bind_rows_as_executemany_parameters():
+    class RecordingSession:
+        def __init__(self):
+            self.calls = []
+
+        async def execute(self, stmt, params=None):
+            self.calls.append((stmt, params))
+
+    session = RecordingSession()
+    counts = {(n, 1, "b0"): 1 for n in range(20_000)}
+    await StatsRepository(session).add_clicks(counts)
+
+    assert [len(params) for _, params in session.calls] == [20_000, 20_000]
+    for stmt, _ in session.calls:
+        # The statement itself holds no rows, whatever their number: the driver pages them.
+        assert len(stmt.compile(dialect=postgresql.dialect()).params) < 10
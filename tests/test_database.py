@@ -0,0 +1,135 @@
+import asyncio
+import time
+
+import pytest
+from sqlalchemy.util import await_only, greenlet_spawn
+
+from alt_controller_bot.bot.middlewares import DbSessionMiddleware
+from alt_controller_bot.db.database import LazySession
+from alt_controller_bot.db.pool import InstrumentedQueuePool
+
+
+class FakeConnection:
+    """DBAPI connection stand-in; the pool only resets and closes it."""
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def slow_connect():
+    time.sleep(0.05)
+    return FakeConnection()
+
+
+async def check_out(pool, hold=0.0):
+    def run():
+        connection = pool.connect()
+        await_only(asyncio.sleep(hold))
+        connection.close()
+
+    await greenlet_spawn(run)
+
+
+async def test_opening_a_connection_is_not_counted_as_waiting():
+    pool = InstrumentedQueuePool(slow_connect, pool_size=1, max_overflow=0)
+    await check_out(pool)
+    await check_out(pool)
+    stats = pool.checkout_stats
+    assert stats.checkouts == 2
+    assert stats.wait_seconds_max < 0.02
+
+
+async def test_waiting_for_a_busy_pool_is_counted():
+    pool = InstrumentedQueuePool(FakeConnection, pool_size=1, max_overflow=0, timeout=5)
+    await asyncio.gather(check_out(pool, hold=0.05), check_out(pool))
+    stats = pool.checkout_stats
+    assert stats.checkouts == 2
+    assert 0.04 <= stats.wait_seconds_max <= stats.wait_seconds_total < 0.5
+    assert pool.recreate().checkout_stats is stats
+
+
+class RecordingSession:
+    opened: list["RecordingSession"] = []
+
+    def __init__(self):
+        self.calls = []
+        self.opened.append(self)
+
+    async def commit(self):
+        self.calls.append("commit")
+
+    async def rollback(self):
+        self.calls.append("rollback")
+
+    async def close(self):
+        self.calls.append("close")
+
+
+@pytest.fixture(autouse=True)
+def opened(monkeypatch):
+    monkeypatch.setattr(RecordingSession, "opened", [])
+    return RecordingSession.opened
+
+
+async def test_lazy_session_is_opened_once_on_first_use(opened):
+    db = LazySession(RecordingSession)
+    assert not db.started and opened == []
+    session = await db.get()
+    assert db.started and await db.get() is session
+    assert opened == [session]
+
+
+@pytest.mark.parametrize("commit, ending", [(True, "commit"), (False, "rollback")])
+async def test_lazy_session_close_ends_the_transaction(opened, commit, ending):
+    db = LazySession(RecordingSession)
+    session = await db.get()
+    await db.close(commit=commit)
+    assert session.calls == [ending, "close"]
+    assert not db.started
+
+    await db.close(commit=commit)
+    assert session.calls == [ending, "close"]
+
+
+async def test_lazy_session_that_was_never_used_opens_nothing(opened):
+    await LazySession(RecordingSession).close(commit=True)
+    assert opened == []
+
+
+async def use_db(event, data):
+    await data["db"].get()
+    return "done"
+
+
+async def fail_with_db(event, data):
+    await data["db"].get()
+    raise RuntimeError("handler failed")
+
+
+async def ignore_db(event, data):
+    return "done"
+
+
+async def test_middleware_commits_after_a_successful_handler(opened):
+    middleware = DbSessionMiddleware(RecordingSession)
+    assert await middleware(use_db, None, {}) == "done"
+    [session] = opened
+    assert session.calls == ["commit", "close"]
+
+
+async def test_middleware_rolls_back_and_reraises_when_the_handler_fails(opened):
+    middleware = DbSessionMiddleware(RecordingSession)
+    with pytest.raises(RuntimeError, match="handler failed"):
+        await middleware(fail_with_db, None, {})
+    [session] = opened
+    assert session.calls == ["rollback", "close"]
+
+
+async def test_middleware_opens_no_session_for_handlers_that_do_not_use_it(opened):
+    data = {}
+    assert await DbSessionMiddleware(RecordingSession)(ignore_db, None, data) == "done"
+    assert isinstance(data["db"], LazySession)
+    assert opened == []
@@ -0,0 +1,176 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import EditMessageText
+
+from alt_controller_bot.db import models
+from alt_controller_bot.services import edits as edits_module
+from alt_controller_bot.services.edits import EditPropagator
+from alt_controller_bot.services.invalidation import InvalidationBus
+from alt_controller_bot.services.publisher import PostPublisher
+from alt_controller_bot.services.render import post_content_hash
+from alt_controller_bot.services.repositories import CHANGED_POSTS_KEY
+
+CHATS = (-1, -2, -3)
+
+
+class FakePostRepository:
+    posts: dict[int, models.Post] = {}
+
+    def __init__(self, session):
+        self.session = session
+
+    async def get_post(self, post_id):
+        return self.posts.get(post_id)
+
+
+class FakePublishedMessageRepository:
+    hashes: dict[tuple[int, int], str] = {}
+
+    def __init__(self, session):
+        self.session = session
+
+    async def for_post(self, post_id):
+        return [
+            (chat_id, message_id, -chat_id, content_hash)
+            for (chat_id, message_id), content_hash in self.hashes.items()
+        ]
+
+    async def set_content_hash(self, keys, content_hash):
+        for key in keys:
+            self.hashes[key] = content_hash
+
+
+@pytest.fixture(autouse=True)
+def repository(fake_repository):
+    fake_repository(edits_module, "PostRepository", FakePostRepository, posts={})
+    return fake_repository(
+        edits_module,
+        "PublishedMessageRepository",
+        FakePublishedMessageRepository,
+        hashes={(chat_id, 10): "old" for chat_id in CHATS},
+    )
+
+
+class FakeBot:
+    """Records edits; ``flood`` chats answer the first edit with a flood wait."""
+
+    def __init__(self, flood=()):
+        self.edits: list[tuple[int, str, float]] = []
+        self.flood = set(flood)
+
+    async def edit_message_text(self, *, text, chat_id, message_id, **kwargs):
+        if chat_id in self.flood:
+            self.flood.discard(chat_id)
+            method = EditMessageText(text=text, chat_id=chat_id, message_id=message_id)
+            raise TelegramRetryAfter(method, "Too Many Requests", retry_after=0)
+        self.edits.append((chat_id, text, time.monotonic()))
+
+
+def set_post(text):
+    post = models.Post(
+        id=7,
+        channels=[1, 2, 3],
+        text=text,
+        parse_mode="HTML",
+        media_json=None,
+        updated_at=datetime.now(timezone.utc),
+    )
+    FakePostRepository.posts[7] = post
+    return post_content_hash(post)
+
+
+@pytest.fixture
+def make_propagator(session_factory):
+    def make(bot, **kwargs):
+        publisher = PostPublisher(bot, session_factory, global_rate=1000, chat_rate=1000)
+        return EditPropagator(bot, session_factory, publisher, **kwargs)
+
+    return make
+
+
+async def drain(propagator):
+    while propagator._tasks:
+        await asyncio.wait(list(propagator._tasks.values()))
+
+
+async def test_burst_of_changes_is_coalesced_into_one_edit_per_message(make_propagator):
+    bot = FakeBot()
+    propagator = make_propagator(bot, debounce=0.05, max_delay=5)
+    for version in range(5):
+        set_post(f"v{version}")
+        propagator.schedule(7)
+        await asyncio.sleep(0.01)
+    await drain(propagator)
+
+    assert sorted(chat_id for chat_id, _, _ in bot.edits) == sorted(CHATS)
+    assert {text for _, text, _ in bot.edits} == {"v4"}
+
+
+async def test_steady_changes_are_flushed_after_max_delay(make_propagator):
+    bot = FakeBot()
+    propagator = make_propagator(bot, debounce=0.1, max_delay=0.2)
+    started = time.monotonic()
+    for version in range(12):
+        set_post(f"v{version}")
+        propagator.schedule(7)
+        await asyncio.sleep(0.05)
+    await drain(propagator)
+
+    # Each change alone would keep pushing the edit back past the end of the burst.
+    first_edit = min(at for _, _, at in bot.edits)
+    assert first_edit - started < 0.4
+    assert [text for chat_id, text, _ in bot.edits if chat_id == -1][-1] == "v11"
+
+
+async def test_messages_showing_the_current_version_are_skipped(make_propagator, repository):
+    bot = FakeBot()
+    repository.hashes[(-1, 10)] = set_post("hi")
+    propagator = make_propagator(bot)
+
+    assert await propagator.propagate(7) == 2
+    assert sorted(chat_id for chat_id, _, _ in bot.edits) == [-3, -2]
+    assert await propagator.propagate(7) == 0
+    assert len(bot.edits) == 2
+
+
+async def test_flood_wait_is_retried(make_propagator, repository):
+    bot = FakeBot(flood={-2})
+    content_hash = set_post("hi")
+    propagator = make_propagator(bot)
+
+    assert await propagator.propagate(7) == 3
+    assert sorted(chat_id for chat_id, _, _ in bot.edits) == sorted(CHATS)
+    assert set(repository.hashes.values()) == {content_hash}
+
+
+async def test_stop_propagates_pending_edits_right_away(make_propagator):
+    bot = FakeBot()
+    set_post("hi")
+    propagator = make_propagator(bot, debounce=60, max_delay=60)
+    await propagator.start()
+    propagator.schedule(7)
+
+    await asyncio.wait_for(propagator.stop(), timeout=1)
+    assert len(bot.edits) == len(CHATS)
+    assert propagator.pending == 0
+
+
+async def test_commits_announced_on_the_bus_schedule_edits(make_propagator):
+    bot = FakeBot()
+    set_post("hi")
+    bus = InvalidationBus(None, (CHANGED_POSTS_KEY,))
+    propagator = make_propagator(bot, debounce=0.01)
+    propagator.bind(bus)
+
+    session = SimpleNamespace(info={CHANGED_POSTS_KEY: {7}})
+    bus._after_commit(session)
+    assert propagator.pending == 1
+    assert CHANGED_POSTS_KEY not in session.info
+    bus.dispatch(CHANGED_POSTS_KEY, None)  # after a reconnect: nothing to edit
+    await drain(propagator)
+    assert len(bot.edits) == len(CHATS)
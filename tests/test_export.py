@@ -0,0 +1,131 @@
+import gzip
+import tracemalloc
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from alt_controller_bot.bot.handlers import stats as stats_module
+from alt_controller_bot.services.export import CSV_HEADER, StatsExportFilter, stream_stats_csv
+
+UPDATED_AT = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+class FakeStreamResult:
+    def __init__(self, session, batch_size):
+        self.session = session
+        self.rows = session.rows
+        self.batch_size = batch_size
+
+    async def partitions(self):
+        # Rows are produced per fetch, like a server-side cursor would.
+        for start in range(0, self.rows, self.batch_size):
+            self.session.fetched = min(start + self.batch_size, self.rows)
+            yield [
+                ("click", index, 7, f"b{index % 4}", index, UPDATED_AT)
+                for index in range(start, min(start + self.batch_size, self.rows))
+            ]
+
+
+class FakeSession:
+    def __init__(self, rows):
+        self.rows = rows
+        self.fetched = 0
+        self.closed = False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.closed = True
+
+    async def stream(self, stmt):
+        return FakeStreamResult(self, stmt.get_execution_options()["yield_per"])
+
+
+class FakeMessage:
+    def __init__(self):
+        self.answers = []
+        self.documents = []
+
+    async def answer(self, text):
+        self.answers.append(text)
+
+    async def answer_document(self, document, caption=None):
+        self.documents.append(gzip.decompress(document.path.read_bytes()))
+
+
+class AnalystEverywhere:
+    def can(self, channel_id, role):
+        return True
+
+
+async def peak_memory(rows):
+    chunks = stream_stats_csv(lambda: FakeSession(rows), StatsExportFilter(), batch_size=1000)
+    tracemalloc.start()
+    try:
+        async for _ in chunks:
+            pass
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+async def test_export_memory_does_not_grow_with_row_count():
+    small, large = await peak_memory(10_000), await peak_memory(100_000)
+    print(f"peak {small / 1024:.0f} KiB for 10k rows, {large / 1024:.0f} KiB for 100k rows")
+    assert large < small * 1.5
+
+
+@pytest.fixture
+def export_settings(monkeypatch):
+    settings = SimpleNamespace(
+        export_batch_size=1000,
+        export_max_upload_bytes=50 * 1024 * 1024,
+        link_base_url="https://bot.example.com/",
+        api_token="secret",
+    )
+    monkeypatch.setattr(stats_module, "get_settings", lambda: settings)
+    return settings
+
+
+def run_export(monkeypatch, rows, args="7 2026-01-01"):
+    sessions = []
+
+    def session_factory():
+        sessions.append(FakeSession(rows))
+        return sessions[-1]
+
+    monkeypatch.setattr(stats_module, "get_session_factory", lambda: session_factory)
+    message = FakeMessage()
+    command = SimpleNamespace(args=args)
+    return message, sessions, stats_module.cmd_export(message, command, AnalystEverywhere())
+
+
+async def test_export_is_sent_gzip_compressed(monkeypatch, export_settings):
+    message, _, export = run_export(monkeypatch, rows=3000)
+    await export
+
+    [document] = message.documents
+    lines = document.decode().splitlines()
+    assert lines[0] == ",".join(CSV_HEADER)
+    assert len(lines) == 3001
+
+
+async def test_export_too_large_for_telegram_links_the_api(monkeypatch, export_settings):
+    export_settings.export_max_upload_bytes = 4096
+    message, sessions, export = run_export(monkeypatch, rows=200_000)
+    await export
+
+    assert message.documents == []
+    # The cursor is closed as soon as the compressed file passes the limit.
+    assert sessions[0].closed and sessions[0].fetched < 200_000
+    [text] = message.answers
+    assert text.endswith(
+        "https://bot.example.com/stats/export.csv?channel_id=7&since=2026-01-01T00%3A00%3A00"
+    )
+
+    export_settings.link_base_url = None
+    message, _, export = run_export(monkeypatch, rows=200_000)
+    await export
+    assert "Сократите период" in message.answers[0]
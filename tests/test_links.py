@@ -0,0 +1,95 @@
+import asyncio
+from types import SimpleNamespace
+
+import fakeredis
+import pytest
+
+from alt_controller_bot.services.invalidation import InvalidationBus
+from alt_controller_bot.services.links import LinkResolver, link_token
+from alt_controller_bot.services.repositories import CHANGED_POSTS_KEY
+
+
+def make_post(post_id, url, channels=(1, 2)):
+    return SimpleNamespace(
+        id=post_id, channels=list(channels), buttons_json={"buttons": [{"text": "Go", "url": url}]}
+    )
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.posts = {}
+        self.loads = 0
+        self.before_load = None
+
+    def __call__(self):
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return None
+
+    async def get(self, model, post_id):
+        self.loads += 1
+        if self.before_load is not None:
+            self.before_load()
+        return self.posts.get(post_id)
+
+
+@pytest.fixture
+def database():
+    return FakeDatabase()
+
+
+async def test_invalidated_post_is_reloaded(database):
+    database.posts[7] = make_post(7, "https://old.example")
+    links = LinkResolver(database)
+    token = link_token(7, 1, 0)
+
+    assert (await links.resolve(token)).target_url == "https://old.example"
+    database.posts[7] = make_post(7, "https://new.example", channels=(1, 2, 3))
+    assert (await links.resolve(link_token(7, 3, 0))) is None
+
+    links.invalidate({7})
+    assert (await links.resolve(link_token(7, 3, 0))).target_url == "https://new.example"
+    assert links.get(token).target_url == "https://new.example"
+    assert database.loads == 2
+
+
+async def test_post_invalidated_while_loading_is_not_cached(database):
+    database.posts[7] = make_post(7, "https://old.example")
+    links = LinkResolver(database)
+    database.before_load = lambda: links.invalidate({7})
+
+    assert (await links.resolve(link_token(7, 1, 0))).target_url == "https://old.example"
+    assert len(links) == 0
+
+
+async def test_bus_drops_cached_links_in_other_processes(database):
+    server = fakeredis.FakeServer()
+    here = InvalidationBus(fakeredis.FakeAsyncRedis(server=server), (CHANGED_POSTS_KEY,))
+    there = InvalidationBus(fakeredis.FakeAsyncRedis(server=server), (CHANGED_POSTS_KEY,))
+    local, remote = LinkResolver(database), LinkResolver(database)
+    local.bind(here)
+    remote.bind(there)
+    database.posts[7] = make_post(7, "https://old.example")
+    token = link_token(7, 1, 0)
+    await local.resolve(token)
+    await remote.resolve(token)
+
+    await here.start()
+    await there.start()
+    try:
+        while await there.redis.pubsub_numsub(there.channel) != [(b"cache:invalidate", 2)]:
+            await asyncio.sleep(0.01)
+        here._after_commit(SimpleNamespace(info={CHANGED_POSTS_KEY: {7}}))
+        assert local.get(token) is None
+        for _ in range(100):
+            if remote.get(token) is None:
+                break
+            await asyncio.sleep(0.01)
+        assert remote.get(token) is None
+    finally:
+        await here.stop()
+        await there.stop()
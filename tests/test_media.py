@@ -0,0 +1,158 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import Chat, Document, InputFile, Message, PhotoSize
+
+from alt_controller_bot.bench.session import StubSession
+from alt_controller_bot.db import models
+from alt_controller_bot.services import media as media_module
+from alt_controller_bot.services.channels import ChannelRegistry
+from alt_controller_bot.services.media import MediaCache
+from alt_controller_bot.services.publisher import PostPublisher
+
+CHANNELS = range(1, 6)
+
+
+class FakeBotApi(StubSession):
+    """Bot API that reads uploads to the end, counting their bytes, and issues file_ids."""
+
+    def __init__(self):
+        super().__init__()
+        self.uploaded_bytes = 0
+        self.uploads = 0
+        self.revoked: set[str] = set()
+
+    async def make_request(self, bot, method, timeout=None):
+        kind = "photo" if hasattr(method, "photo") else "document"
+        source = getattr(method, kind)
+        if isinstance(source, InputFile):
+            self.uploads += 1
+            file_id = f"file-{self.uploads}"
+            size = sum([len(chunk) async for chunk in source.read(bot)])
+            self.uploaded_bytes += size
+        elif source in self.revoked:
+            raise TelegramBadRequest(method, "Bad Request: wrong file identifier specified")
+        else:
+            file_id = source
+        self._message_id += 1
+        message = {
+            "message_id": self._message_id,
+            "date": datetime.now(timezone.utc),
+            "chat": Chat(id=method.chat_id, type="channel"),
+        }
+        if kind == "photo":
+            message["photo"] = [
+                PhotoSize(file_id=file_id, file_unique_id=file_id, width=1, height=1)
+            ]
+        else:
+            message["document"] = Document(file_id=file_id, file_unique_id=file_id)
+        return Message(**message)
+
+
+class FakeMediaRepository:
+    rows: dict[tuple[str, str], str] = {}
+    pruned: list[int] = []
+
+    def __init__(self, session):
+        self.session = session
+
+    async def get_file_id(self, sha256, kind):
+        return self.rows.get((sha256, kind))
+
+    async def save(self, sha256, kind, file_id, size_bytes):
+        self.rows[(sha256, kind)] = file_id
+
+    async def delete(self, sha256, kind, file_id):
+        if self.rows.get((sha256, kind)) == file_id:
+            del self.rows[(sha256, kind)]
+
+    async def prune(self, keep):
+        self.pruned.append(keep)
+        return 0
+
+
+@pytest.fixture(autouse=True)
+def repository(fake_repository):
+    return fake_repository(
+        media_module, "MediaRepository", FakeMediaRepository, rows={}, pruned=[]
+    )
+
+
+@pytest.fixture
+def api():
+    return FakeBotApi()
+
+
+@pytest.fixture
+def photo(tmp_path):
+    path = tmp_path / "photo.jpg"
+    path.write_bytes(b"\xff\xd8" + bytes(range(256)) * 400)
+    return path
+
+
+def make_publisher(api, media=None):
+    registry = ChannelRegistry(None)
+    registry.apply(
+        models.Channel(id=channel_id, tg_chat_id=-channel_id, title=f"c{channel_id}")
+        for channel_id in CHANNELS
+    )
+    bot = Bot(token="42:TEST", session=api)
+    return PostPublisher(
+        bot, None, global_rate=1000, chat_rate=1000, channels=registry, media=media
+    )
+
+
+def make_post(path, kind="photo"):
+    return models.Post(
+        id=1,
+        channels=list(CHANNELS),
+        text="hi",
+        parse_mode="HTML",
+        media_json={"items": [{"type": kind, "path": str(path)}]},
+    )
+
+
+async def test_fan_out_uploads_the_bytes_once(api, photo, session_factory):
+    size = photo.stat().st_size
+    await make_publisher(api).publish(make_post(photo))
+    assert api.uploaded_bytes == size * len(CHANNELS)
+
+    api.uploaded_bytes = 0
+    publisher = make_publisher(api, MediaCache(session_factory))
+    await publisher.publish(make_post(photo))
+    assert api.uploaded_bytes == size
+
+    await publisher.publish(make_post(photo))  # re-posting the same asset
+    assert api.uploaded_bytes == size
+
+
+async def test_revoked_file_id_is_uploaded_again(api, photo, repository, session_factory):
+    size = photo.stat().st_size
+    cache = MediaCache(session_factory)
+    publisher = make_publisher(api, cache)
+    await publisher.publish(make_post(photo, kind="document"))
+    [file_id] = repository.rows.values()
+
+    api.revoked.add(file_id)
+    api.uploaded_bytes = 0
+    await publisher.publish(make_post(photo, kind="document"))
+    assert api.uploaded_bytes == size
+    assert list(repository.rows.values()) != [file_id]
+
+
+async def test_table_is_pruned_as_it_grows(repository, session_factory):
+    cache = MediaCache(session_factory, max_entries=20, prune_interval=3600)
+    await cache.start()
+    try:
+        await asyncio.sleep(0)
+        assert repository.pruned == [20]  # on startup
+        for index in range(cache.prune_every):
+            item = media_module.MediaItem(kind="photo", digest=f"{index:064x}")
+            await cache.put(item, f"file-{index}")
+        await asyncio.sleep(0.01)
+        assert repository.pruned == [20, 20]
+    finally:
+        await cache.stop()
@@ -0,0 +1,131 @@
+import os
+import time
+from datetime import datetime, timezone
+
+from aiogram import Bot, Dispatcher, Router
+from aiogram.types import Chat, Message, Update, User
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from alt_controller_bot.bot.middlewares import UpdateMetricsMiddleware
+from alt_controller_bot.bot.routers import instrument_router
+from alt_controller_bot.core import metrics
+from alt_controller_bot.db.instrumentation import install_pool_metrics
+from alt_controller_bot.db.pool import InstrumentedQueuePool
+
+
+def make_registry(clicks, latency, pool_size, wait_max):
+    registry = metrics.Registry()
+    registry.register(metrics.Counter("clicks_total", "Clicks.", ("kind",))).inc(
+        "url", amount=clicks
+    )
+    registry.register(metrics.Histogram("update_seconds", "Updates.")).observe(latency)
+    registry.register(metrics.GaugeCallback("pool_size", "Pool size.", lambda: pool_size))
+    registry.register(
+        metrics.GaugeCallback("wait_max", "Longest wait.", lambda: wait_max, aggregate=max)
+    )
+    return registry
+
+
+def samples(text):
+    return dict(line.rsplit(" ", 1) for line in text.splitlines() if not line.startswith("#"))
+
+
+async def test_pool_totals_are_exported_as_counters(monkeypatch):
+    monkeypatch.setattr(metrics.registry, "_metrics", {})
+    engine = create_async_engine(
+        "postgresql+asyncpg://bot@localhost/bot", poolclass=InstrumentedQueuePool
+    )
+    install_pool_metrics(engine)
+    engine.pool.checkout_stats.record(0.25)
+    try:
+        text = metrics.registry.render()
+    finally:
+        await engine.dispose()
+
+    assert "# TYPE db_pool_checkouts_total counter" in text
+    assert "# TYPE db_pool_checkout_wait_seconds_total counter" in text
+    assert "# TYPE db_pool_checkout_wait_seconds_max gauge" in text
+    assert "# TYPE db_pool_size gauge" in text
+    assert samples(text)["db_pool_checkouts_total"] == "1"
+
+
+async def test_scrape_sums_the_snapshots_of_all_workers(tmp_path):
+    stores = []
+    for pid, registry in enumerate([make_registry(3, 0.02, 10, 0.5), make_registry(4, 2, 5, 1.5)]):
+        store = metrics.SnapshotStore(registry, tmp_path, interval=5)
+        store.path = tmp_path / f"{pid}.json"
+        await store.start()
+        stores.append(store)
+
+    merged = samples(stores[0].render())
+    assert merged['clicks_total{kind="url"}'] == "7.0"
+    assert merged["update_seconds_count"] == "2.0"
+    assert merged["update_seconds_sum"] == "2.02"
+    assert merged['update_seconds_bucket{le="0.025"}'] == "1.0"
+    assert merged["pool_size"] == "15"
+    assert merged["wait_max"] == "1.5"
+
+    # The second worker exited: its totals stay, its gauges go once the snapshot is stale.
+    await stores[1].stop()
+    os.utime(stores[1].path, (time.time() - 60, time.time() - 60))
+    merged = samples(stores[0].render())
+    assert merged['clicks_total{kind="url"}'] == "7.0"
+    assert merged["pool_size"] == "10"
+    assert merged["wait_max"] == "0.5"
+    await stores[0].stop()
+
+
+def make_update(update_id):
+    user = User(id=update_id % 100 + 1, is_bot=False, first_name="u")
+    return Update(
+        update_id=update_id,
+        message=Message(
+            message_id=update_id,
+            date=datetime.now(timezone.utc),
+            chat=Chat(id=user.id, type="private"),
+            from_user=user,
+            text="hi",
+        ),
+    )
+
+
+def make_dispatcher(instrumented):
+    router = Router(name="bench")
+
+    @router.message()
+    async def echo(message: Message) -> None:
+        return None
+
+    dp = Dispatcher()
+    if instrumented:
+        dp.update.outer_middleware(UpdateMetricsMiddleware())
+        instrument_router(router)
+    dp.include_router(router)
+    return dp
+
+
+async def feed(dp, bot, updates):
+    started = time.perf_counter()
+    for update in updates:
+        await dp.feed_update(bot, update)
+    return time.perf_counter() - started
+
+
+async def test_metrics_add_little_per_update_overhead():
+    bot = Bot("42:TEST")
+    count = 1_000
+    updates = [make_update(update_id) for update_id in range(count)]
+    plain, instrumented = make_dispatcher(False), make_dispatcher(True)
+    await feed(plain, bot, updates[:200])
+    await feed(instrumented, bot, updates[:200])
+
+    # Interleaved rounds, best of each, so a noisy neighbour hurts both sides alike.
+    plain_times, instrumented_times = [], []
+    for _ in range(5):
+        plain_times.append(await feed(plain, bot, updates))
+        instrumented_times.append(await feed(instrumented, bot, updates))
+    baseline = min(plain_times) / count
+    overhead = min(instrumented_times) / count - baseline
+
+    print(f"baseline {baseline * 1e6:.1f} µs/update, metrics +{overhead * 1e6:.1f} µs/update")
+    assert overhead < max(0.25 * baseline, 20e-6)
@@ -0,0 +1,142 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from aiogram.enums import ChatMemberStatus, ChatType
+from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
+from aiogram.methods import GetChat
+
+from alt_controller_bot.services import onboarding as onboarding_module
+from alt_controller_bot.services.onboarding import ChannelOnboarding, parse_channel_refs
+from alt_controller_bot.services.rbac import Role
+
+BOT_ID = 1000
+USER_ID = 5
+
+
+class FakeChannelRepository:
+    upserted: list[list[dict]] = []
+    linked: list[list[tuple]] = []
+
+    def __init__(self, session):
+        self.session = session
+
+    async def upsert_channels(self, rows):
+        self.upserted.append(list(rows))
+        by_chat = {row["tg_chat_id"]: row for row in rows}
+        return [
+            SimpleNamespace(id=-tg_chat_id // 10, tg_chat_id=tg_chat_id) for tg_chat_id in by_chat
+        ]
+
+    async def link_users(self, links):
+        self.linked.append(list(links))
+
+
+@pytest.fixture(autouse=True)
+def repository(fake_repository):
+    return fake_repository(
+        onboarding_module, "ChannelRepository", FakeChannelRepository, upserted=[], linked=[]
+    )
+
+
+class FakeBot:
+    """Channels ``-10``, ``-20``, ... are named ``@c1``, ``@c2``, ...; the user owns ``-10``."""
+
+    id = BOT_ID
+
+    def __init__(self, floods=0, delay=0.0):
+        self.floods = floods
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.calls = 0
+
+    async def _call(self):
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+
+    async def get_chat(self, ref):
+        await self._call()
+        if self.floods:
+            self.floods -= 1
+            raise TelegramRetryAfter(GetChat(chat_id=ref), "Too Many Requests", retry_after=0)
+        if isinstance(ref, str):
+            if not ref.startswith("@c"):
+                raise TelegramBadRequest(GetChat(chat_id=ref), "chat not found")
+            ref = -10 * int(ref[2:])
+        return SimpleNamespace(
+            id=ref, type=ChatType.CHANNEL, title=f"Channel {-ref // 10}", username=f"c{-ref // 10}"
+        )
+
+    async def get_chat_member(self, chat_id, user_id):
+        await self._call()
+        if user_id == BOT_ID:
+            return SimpleNamespace(status=ChatMemberStatus.ADMINISTRATOR, can_post_messages=True)
+        status = ChatMemberStatus.CREATOR if chat_id == -10 else ChatMemberStatus.ADMINISTRATOR
+        return SimpleNamespace(status=status)
+
+
+class FakeAudit:
+    def __init__(self):
+        self.entries = []
+
+    def log(self, **entry):
+        self.entries.append(entry)
+
+
+@pytest.fixture
+def make_onboarding(session_factory):
+    def make(**kwargs):
+        return ChannelOnboarding(session_factory, **kwargs)
+
+    return make
+
+
+def test_refs_are_parsed_and_deduplicated():
+    assert parse_channel_refs("@c1, c2\n-100 @c1 -100") == ["@c1", "@c2", -100]
+
+
+async def test_refs_naming_the_same_channel_connect_it_once(repository, make_onboarding):
+    audit = FakeAudit()
+    results = await make_onboarding(audit=audit).onboard(FakeBot(), USER_ID, ["@c1", -10, "@c2"])
+
+    assert [result.ok for result in results] == [True, True, True]
+    assert [result.channel_id for result in results] == [1, 1, 2]
+    assert [result.role for result in results] == [Role.OWNER, Role.OWNER, Role.ADMIN]
+    # One statement each; the repository collapses the rows of the same chat.
+    [rows] = repository.upserted
+    assert [row["tg_chat_id"] for row in rows] == [-10, -10, -20]
+    [links] = repository.linked
+    assert set(links) == {(USER_ID, 1, "owner"), (USER_ID, 2, "admin")}
+    assert [entry["target_id"] for entry in audit.entries] == [1, 2]
+
+
+async def test_flood_waits_are_retried(repository, make_onboarding):
+    onboarding = make_onboarding(max_attempts=3)
+    [result] = await onboarding.onboard(FakeBot(floods=2), USER_ID, ["@c1"])
+    assert result.ok and result.channel_id == 1
+
+    [result] = await onboarding.onboard(FakeBot(floods=3), USER_ID, ["@c1"])
+    assert not result.ok and "подождать" in result.error
+
+
+async def test_failed_checks_are_reported_and_not_written(repository, make_onboarding):
+    [result] = await make_onboarding().onboard(FakeBot(), USER_ID, ["@missing"])
+    assert not result.ok and result.error
+    assert repository.upserted == [] and repository.linked == []
+
+
+async def test_checks_run_under_the_concurrency_cap(make_onboarding):
+    bot = FakeBot(delay=0.01)
+    refs = [f"@c{index}" for index in range(1, 31)]
+    results = await make_onboarding(concurrency=4).onboard(bot, USER_ID, refs)
+
+    assert all(result.ok for result in results)
+    assert bot.calls == 90
+    # Each check runs getChat and then two getChatMember calls at once.
+    assert 4 < bot.max_in_flight <= 8
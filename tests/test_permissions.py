@@ -0,0 +1,104 @@
+import asyncio
+from types import SimpleNamespace
+
+import fakeredis
+import pytest
+
+from alt_controller_bot.services import permissions as permissions_module
+from alt_controller_bot.services.invalidation import InvalidationBus
+from alt_controller_bot.services.permissions import PermissionService
+from alt_controller_bot.services.rbac import Role
+from alt_controller_bot.services.repositories import CHANGED_USER_ROLES_KEY
+
+
+class FakeChannelRepository:
+    roles: dict[int, list[tuple[int, str]]] = {}
+    before_load = None
+
+    def __init__(self, session):
+        self.session = session
+
+    async def get_user_roles(self, user_id):
+        roles = list(self.roles.get(user_id, ()))
+        if self.before_load is not None:
+            self.before_load()
+        return roles
+
+
+@pytest.fixture(autouse=True)
+def repository(fake_repository):
+    return fake_repository(
+        permissions_module, "ChannelRepository", FakeChannelRepository, roles={}, before_load=None
+    )
+
+
+@pytest.fixture
+def make_service(session_factory):
+    return lambda: PermissionService(session_factory)
+
+
+def commit(bus, user_ids):
+    session = SimpleNamespace(info={CHANGED_USER_ROLES_KEY: set(user_ids)})
+    bus._after_commit(session)
+    return session
+
+
+async def test_roles_changed_while_loading_are_not_cached(repository, make_service):
+    service = make_service()
+    repository.roles[5] = [(1, Role.EDITOR.value)]
+    repository.before_load = staticmethod(lambda: service.invalidate(5))
+
+    assert (await service.resolve(5)).can(1, Role.EDITOR)
+    repository.before_load = None
+    repository.roles[5] = []
+    assert not (await service.resolve(5)).can(1, Role.EDITOR)
+
+
+async def test_local_commit_invalidates_once_and_pops_the_key(repository, make_service):
+    bus = InvalidationBus(None, (CHANGED_USER_ROLES_KEY,))
+    service = make_service()
+    service.bind(bus)
+    repository.roles[5] = [(1, Role.EDITOR.value)]
+    await service.resolve(5)
+
+    repository.roles[5] = []
+    session = commit(bus, {5})
+    assert CHANGED_USER_ROLES_KEY not in session.info
+    assert not (await service.resolve(5)).can(1, Role.EDITOR)
+
+
+async def test_bus_drops_cached_roles_in_other_processes(repository, make_service):
+    server = fakeredis.FakeServer()
+    here = InvalidationBus(fakeredis.FakeAsyncRedis(server=server), (CHANGED_USER_ROLES_KEY,))
+    there = InvalidationBus(fakeredis.FakeAsyncRedis(server=server), (CHANGED_USER_ROLES_KEY,))
+    remote = make_service()
+    remote.bind(there)
+    repository.roles[5] = [(1, Role.EDITOR.value)]
+    await remote.resolve(5)
+
+    await there.start()
+    try:
+        while await there.redis.pubsub_numsub(there.channel) != [(b"cache:invalidate", 1)]:
+            await asyncio.sleep(0.01)
+        repository.roles[5] = []
+        commit(here, {5})
+        for _ in range(100):
+            if not (await remote.resolve(5)).can(1, Role.EDITOR):
+                break
+            await asyncio.sleep(0.01)
+        assert not (await remote.resolve(5)).can(1, Role.EDITOR)
+    finally:
+        await here.stop()
+        await there.stop()
+
+
+async def test_superusers_may_use_every_channel(repository, session_factory):
+    repository.roles[5] = [(1, Role.OWNER.value), (2, Role.EDITOR.value)]
+    repository.roles[9] = [(2, Role.EDITOR.value)]
+    service = PermissionService(session_factory, owner_ids=[9])
+
+    user = await service.resolve(5)
+    assert user.channels(Role.ANALYST, [1, 2, 3]) == [1]
+    owner = await service.resolve(9)
+    assert owner.channels(Role.ANALYST, [1, 2, 3]) == [1, 2, 3]
+    assert owner.can(3, Role.OWNER)
@@ -0,0 +1,87 @@
+import time
+
+import pytest
+from aiogram import Bot
+from aiogram.exceptions import TelegramForbiddenError, TelegramRetryAfter
+
+from alt_controller_bot.bench.session import StubSession
+from alt_controller_bot.db import models
+from alt_controller_bot.services.channels import ChannelRegistry
+from alt_controller_bot.services.publisher import PostPublisher, PublishError
+
+
+class FlakySession(StubSession):
+    """Stub Bot API: chat -2 has kicked the bot, -3 is flood-limited once, -4 breaks."""
+
+    def __init__(self):
+        super().__init__()
+        self.sent: dict[int, float] = {}
+        self.flooded = False
+
+    async def make_request(self, bot, method, timeout=None):
+        chat_id = method.chat_id
+        if chat_id == -2:
+            raise TelegramForbiddenError(method, "Forbidden: bot was kicked")
+        if chat_id == -3 and not self.flooded:
+            self.flooded = True
+            raise TelegramRetryAfter(method, "Too Many Requests", retry_after=1)
+        if chat_id == -4:
+            raise RuntimeError("connection reset")
+        self.sent[chat_id] = time.monotonic()
+        return await super().make_request(bot, method, timeout)
+
+
+@pytest.fixture
+def session():
+    return FlakySession()
+
+
+def make_publisher(session, **kwargs) -> PostPublisher:
+    registry = ChannelRegistry(None)
+    registry.apply(
+        models.Channel(id=channel_id, tg_chat_id=-channel_id, title=f"c{channel_id}")
+        for channel_id in range(1, 6)
+    )
+    bot = Bot(token="42:TEST", session=session)
+    return PostPublisher(
+        bot, None, global_rate=1000, chat_rate=1000, channels=registry, **kwargs
+    )
+
+
+def make_post(channels, pending=None) -> models.Post:
+    return models.Post(
+        id=1, channels=channels, pending_channels=pending, text="hi", parse_mode="HTML"
+    )
+
+
+async def test_failures_are_reported_per_channel(session):
+    publisher = make_publisher(session)
+    started = time.monotonic()
+    with pytest.raises(PublishError) as caught:
+        await publisher.publish(make_post([1, 2, 3, 4, 5]))
+
+    results = {result.channel_id: result for result in caught.value.results}
+    assert caught.value.failed_channels == [2, 4]
+    assert results[1].ok and results[3].ok and results[5].ok
+    assert results[3].attempts == 2
+    # The flood wait in chat -3 only delays that chat.
+    assert session.sent[-1] - started < 0.5
+    assert session.sent[-3] - started >= 1
+
+
+async def test_retry_only_sends_to_pending_channels(session):
+    publisher = make_publisher(session)
+    results = await publisher.publish(make_post([1, 2, 3, 5], pending=[5]))
+    assert [result.channel_id for result in results] == [5]
+    assert list(session.sent) == [-5]
+
+
+async def test_idle_chat_buckets_are_evicted(session):
+    publisher = make_publisher(session, bucket_idle=60)
+    await publisher.publish(make_post([1, 5]))
+    assert set(publisher._chat_buckets) == {-1, -5}
+
+    publisher._chat_buckets[-1]._updated -= 120
+    publisher._next_sweep = 0
+    publisher._chat_bucket(-6)
+    assert set(publisher._chat_buckets) == {-5, -6}
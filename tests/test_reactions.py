@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from alt_controller_bot.services import reactions as reactions_module
+from alt_controller_bot.services.reactions import ReactionCountIngestor
+from alt_controller_bot.services.repositories import StatsRepository
+
+
+class FakeIndex:
+    async def lookup_many(self, keys):
+        # Message n of chat c belongs to post n in channel c.
+        return {(chat_id, message_id): (message_id, chat_id) for chat_id, message_id in keys}
+
+
+class FakeStatsRepository:
+    written: list[dict] = []
+    delay = 0.0
+
+    def __init__(self, session):
+        self.session = session
+
+    async def replace_reaction_counts(self, snapshots):
+        await asyncio.sleep(self.delay)
+        self.written.append(dict(snapshots))
+        return {}
+
+
+class FakeRollupRepository:
+    def __init__(self, session):
+        self.session = session
+
+    async def add_hourly(self, reactions):
+        return None
+
+
+@pytest.fixture(autouse=True)
+def repository(fake_repository):
+    fake_repository(reactions_module, "RollupRepository", FakeRollupRepository)
+    return fake_repository(
+        reactions_module, "StatsRepository", FakeStatsRepository, written=[], delay=0.0
+    )
+
+
+@pytest.fixture
+def make_ingestor(session_factory):
+    def make(**kwargs):
+        return ReactionCountIngestor(session_factory, FakeIndex(), **kwargs)
+
+    return make
+
+
+async def test_cancelled_flush_keeps_snapshots_but_not_over_newer_ones(repository, make_ingestor):
+    repository.delay = 60
+    ingestor = make_ingestor()
+    ingestor.add(1, 10, {"👍": 1})
+    ingestor.add(1, 11, {"👍": 1})
+    flush = asyncio.create_task(ingestor.flush())
+    await asyncio.sleep(0.01)
+    ingestor.add(1, 10, {"👍": 2})
+    flush.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await flush
+
+    repository.delay = 0
+    await ingestor.flush()
+    assert repository.written == [{(10, 1): {"👍": 2}, (11, 1): {"👍": 1}}]
+
+
+async def test_counts_are_diffed_under_row_locks():
+    class RecordingSession:
+        def __init__(self):
+            self.statements = []
+
+        async def execute(self, stmt, params=None):
+            self.statements.append(str(stmt.compile(dialect=postgresql.dialect())))
+            return []
+
+    session = RecordingSession()
+    await StatsRepository(session).replace_reaction_counts({(10, 1): {"👍": 2}, (11, 1): {}})
+
+    insert_zero_rows, diff = session.statements
+    assert "ON CONFLICT DO NOTHING" in insert_zero_rows
+    assert diff.startswith("UPDATE stats_reactions SET count=previous.after")
+    assert "FOR UPDATE OF stored" in diff
+    assert "RETURNING stats_reactions.channel_id, stats_reactions.post_id" in diff
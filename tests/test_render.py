@@ -0,0 +1,58 @@
+from datetime import datetime
+
+from alt_controller_bot.db import models
+from alt_controller_bot.services.links import parse_link_token
+from alt_controller_bot.services.render import PostRenderer, compile_post
+
+
+def make_post(**fields) -> models.Post:
+    defaults = dict(
+        id=7,
+        channels=[1, 2],
+        text="<b>hi</b>",
+        parse_mode="HTML",
+        buttons_json={
+            "buttons": [
+                {"text": "Site", "url": "https://example.com"},
+                {"text": "Docs", "url": "https://example.com/docs"},
+            ]
+        },
+        reactions_json=["👍", "🔥"],
+        updated_at=datetime(2026, 1, 1),
+    )
+    return models.Post(**{**defaults, **fields})
+
+
+def test_keyboard_is_built_once_and_has_no_callback_buttons():
+    rendered = compile_post(make_post())
+    assert rendered.keyboard(1) is rendered.keyboard(2) is rendered.markup
+    buttons = [button for row in rendered.markup.inline_keyboard for button in row]
+    assert [button.url for button in buttons] == [
+        "https://example.com",
+        "https://example.com/docs",
+    ]
+    assert all(button.callback_data is None for button in buttons)
+
+
+def test_tracked_links_carry_the_channel():
+    rendered = compile_post(make_post(), link_prefix="https://bot.example/r/")
+    for channel_id in (1, 2):
+        urls = [row[0].url for row in rendered.keyboard(channel_id).inline_keyboard]
+        tokens = [url.removeprefix("https://bot.example/r/") for url in urls]
+        assert [parse_link_token(token) for token in tokens] == [
+            (7, channel_id, 0),
+            (7, channel_id, 1),
+        ]
+
+
+def test_renderer_reuses_a_version_until_it_changes():
+    renderer = PostRenderer()
+    post = make_post()
+    first = renderer.render(post)
+    assert renderer.render(post) is first
+
+    post.updated_at = datetime(2026, 1, 2)
+    post.text = "changed"
+    second = renderer.render(post)
+    assert second is not first
+    assert second.content_hash != first.content_hash
@@ -0,0 +1,153 @@
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from alt_controller_bot.services.repositories import (
+    CHANGED_USER_ROLES_KEY,
+    ChannelRepository,
+    PostRepository,
+    RollupRepository,
+)
+
+JAN_1 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+class RecordingSession:
+    def __init__(self, rows=()):
+        self.statements = []
+        self.params = []
+        self.info = {}
+        self.rows = list(rows)
+        self.rowcount = len(self.rows)
+
+    async def execute(self, stmt, params=None):
+        self.statements.append(stmt)
+        self.params.append(params)
+        return self
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    async def scalars(self, stmt, execution_options=None):
+        return await self.execute(stmt)
+
+    def all(self):
+        return []
+
+
+def compiled(stmt):
+    return stmt.compile(dialect=postgresql.dialect())
+
+
+async def test_channel_pages_walk_the_post_channels_key():
+    session = RecordingSession()
+    after = (datetime(2026, 1, 1, tzinfo=timezone.utc), 42)
+    await PostRepository(session).page_channel_posts(7, ["published"], after=after)
+
+    [stmt] = session.statements
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+    assert "JOIN post_channels ON post_channels.post_id = posts.id" in sql
+    assert "(post_channels.created_at, post_channels.post_id) <" in sql
+    assert "ORDER BY post_channels.created_at DESC, post_channels.post_id DESC" in sql
+    assert "@>" not in sql
+
+
+async def test_channels_are_upserted_once_per_chat_in_lock_order():
+    session = RecordingSession()
+    await ChannelRepository(session).upsert_channels(
+        [
+            {"tg_chat_id": -20, "title": "Old"},
+            {"tg_chat_id": -10, "title": "Ten", "settings_json": {"footer": "x"}},
+            {"tg_chat_id": -20, "title": "New", "username": "twenty"},
+        ]
+    )
+
+    [stmt] = session.statements
+    sql = str(compiled(stmt))
+    assert "ON CONFLICT (tg_chat_id) DO UPDATE SET" in sql
+    assert "title = excluded.title" in sql and "username = excluded.username" in sql
+    assert "settings_json = (channels.settings_json || excluded.settings_json)" in sql
+    params = compiled(stmt).params
+    assert [params["tg_chat_id_m0"], params["tg_chat_id_m1"]] == [-20, -10]
+    assert [params["title_m0"], params["username_m0"]] == ["New", "twenty"]
+    assert "tg_chat_id_m2" not in params
+
+
+async def test_roles_are_upserted_on_the_user_channel_key():
+    session = RecordingSession()
+    await ChannelRepository(session).link_users(
+        [(5, 2, "admin"), (5, 1, "editor"), (5, 2, "owner")]
+    )
+
+    [stmt] = session.statements
+    sql = str(compiled(stmt))
+    assert "ON CONFLICT ON CONSTRAINT user_channels_user_channel_key DO UPDATE" in sql
+    assert "SET role = excluded.role" in sql
+    params = compiled(stmt).params
+    assert [(params[f"channel_id_m{n}"], params[f"role_m{n}"]) for n in range(2)] == [
+        (1, "editor"),
+        (2, "owner"),
+    ]
+    assert session.info[CHANGED_USER_ROLES_KEY] == {5}
+
+
+async def test_hourly_counters_are_added_to_the_bucket_of_the_hour():
+    session = RecordingSession()
+    repository = RollupRepository(session)
+    await repository.add_hourly(
+        clicks={(1, 11): 1, (1, 10): 2},
+        reactions={(1, 10): 3, (2, 20): 1},
+        at=JAN_1.replace(hour=13, minute=45, second=12),
+    )
+    await repository.add_hourly(clicks={}, reactions={})
+
+    [stmt] = session.statements
+    sql = str(compiled(stmt))
+    assert "INSERT INTO stats_hourly" in sql
+    assert "ON CONFLICT (channel_id, bucket_start, post_id) DO UPDATE SET" in sql
+    assert "clicks = (stats_hourly.clicks + excluded.clicks)" in sql
+    assert "reactions = (stats_hourly.reactions + excluded.reactions)" in sql
+    hour = JAN_1.replace(hour=13)
+    assert session.params == [
+        [
+            {"channel_id": 1, "bucket_start": hour, "post_id": 10, "clicks": 2, "reactions": 3},
+            {"channel_id": 1, "bucket_start": hour, "post_id": 11, "clicks": 1, "reactions": 0},
+            {"channel_id": 2, "bucket_start": hour, "post_id": 20, "clicks": 0, "reactions": 1},
+        ]
+    ]
+
+
+async def test_compaction_moves_hourly_rows_into_days_in_one_statement():
+    session = RecordingSession(rows=[None] * 3)
+    assert await RollupRepository(session).compact(JAN_1) == 3
+
+    [stmt] = session.statements
+    sql = " ".join(str(compiled(stmt)).split())
+    assert sql.startswith("WITH moved AS (DELETE FROM stats_hourly")
+    assert "WHERE stats_hourly.bucket_start < %(bucket_start_1)s" in sql
+    assert "INSERT INTO stats_daily" in sql
+    assert "GROUP BY moved.channel_id, date_trunc(" in sql
+    assert "clicks = (stats_daily.clicks + excluded.clicks)" in sql
+    params = compiled(stmt).params
+    assert params["bucket_start_1"] == JAN_1
+    assert sorted(value for value in params.values() if isinstance(value, str)) == ["UTC", "day"]
+
+
+async def test_day_series_merges_daily_and_hourly_rows():
+    session = RecordingSession(rows=[(JAN_1, 5, None), (JAN_1.replace(day=2), 7, 2)])
+    series = await RollupRepository(session).channel_series(
+        1, JAN_1, JAN_1.replace(day=3), granularity="day"
+    )
+    assert series == [(JAN_1, 5, 0), (JAN_1.replace(day=2), 7, 2)]
+
+    [stmt] = session.statements
+    sql = " ".join(str(compiled(stmt)).split())
+    assert "FROM stats_daily" in sql and "UNION ALL" in sql
+    assert "SELECT date_trunc(" in sql and "stats_hourly.bucket_start, " in sql
+    assert "GROUP BY anon_1.bucket_start ORDER BY anon_1.bucket_start" in sql
+
+
+async def test_unknown_series_granularity_is_rejected():
+    with pytest.raises(ValueError, match="granularity"):
+        await RollupRepository(RecordingSession()).channel_series(1, JAN_1, JAN_1, "week")
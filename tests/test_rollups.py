@@ -0,0 +1,44 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from alt_controller_bot.services import rollups as rollups_module
+from alt_controller_bot.services.rollups import RollupCompactor
+
+NOW = datetime(2026, 3, 31, 17, 42, 5, 123456, tzinfo=timezone.utc)
+
+
+class FakeRollupRepository:
+    cutoffs: list[datetime] = []
+
+    def __init__(self, session):
+        self.session = session
+
+    async def compact(self, cutoff):
+        self.cutoffs.append(cutoff)
+        return 4
+
+
+class FrozenDatetime(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return NOW.astimezone(tz)
+
+
+@pytest.fixture(autouse=True)
+def repository(fake_repository, monkeypatch):
+    monkeypatch.setattr(rollups_module, "datetime", FrozenDatetime)
+    return fake_repository(rollups_module, "RollupRepository", FakeRollupRepository, cutoffs=[])
+
+
+async def test_cutoff_is_aligned_to_midnight(repository, session_factory):
+    compactor = RollupCompactor(session_factory, retention=timedelta(days=30))
+    assert await compactor.compact() == 4
+    assert repository.cutoffs == [datetime(2026, 3, 1, tzinfo=timezone.utc)]
+
+
+async def test_cutoff_never_splits_the_retention_day(repository, session_factory):
+    # The rest of the day the retention boundary falls in stays hourly.
+    compactor = RollupCompactor(session_factory, retention=timedelta(hours=18))
+    await compactor.compact()
+    assert repository.cutoffs == [datetime(2026, 3, 30, tzinfo=timezone.utc)]
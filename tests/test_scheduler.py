@@ -0,0 +1,200 @@
+import asyncio
+from datetime import timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from alt_controller_bot.services import scheduler as scheduler_module
+from alt_controller_bot.services.invalidation import InvalidationBus
+from alt_controller_bot.services.publisher import PublishError, PublishResult
+from alt_controller_bot.services.repositories import CHANGED_POSTS_KEY
+from alt_controller_bot.services.scheduler import PublicationScheduler, utcnow
+
+
+class FakePostRepository:
+    """In-memory stand-in for the scheduler's part of ``PostRepository``."""
+
+    posts: dict[int, SimpleNamespace] = {}
+
+    def __init__(self, session):
+        self.session = session
+
+    async def list_upcoming(self, until, limit):
+        upcoming = [
+            (post.id, post.scheduled_at)
+            for post in self.posts.values()
+            if post.status in ("scheduled", "queued") and post.scheduled_at <= until
+        ]
+        return sorted(upcoming, key=lambda item: item[1])[:limit]
+
+    async def claim_due(self, now, limit, lease):
+        due = [
+            post
+            for post in self.posts.values()
+            if (post.status in ("scheduled", "queued") and post.scheduled_at <= now)
+            or (post.status == "publishing" and post.claimed_until <= now)
+        ]
+        due = sorted(due, key=lambda post: post.scheduled_at)[:limit]
+        for post in due:
+            post.status = "publishing"
+            post.claimed_until = now + lease
+            post.publish_attempts += 1
+        return due
+
+    async def set_status(self, post_ids, status):
+        for post_id in post_ids:
+            self.posts[post_id].status = status
+            self.posts[post_id].claimed_until = None
+
+    async def set_pending_channels(self, pending):
+        for post_id, channel_ids in pending.items():
+            self.posts[post_id].pending_channels = list(channel_ids)
+
+    async def retry_at(self, due):
+        for post_id, due_at in due.items():
+            post = self.posts[post_id]
+            post.status, post.scheduled_at, post.claimed_until = "queued", due_at, None
+
+
+@pytest.fixture
+def posts(fake_repository):
+    return fake_repository(scheduler_module, "PostRepository", FakePostRepository, posts={}).posts
+
+
+def add_post(posts, post_id, status="queued", **fields):
+    posts[post_id] = SimpleNamespace(
+        id=post_id,
+        status=status,
+        scheduled_at=utcnow() - timedelta(seconds=1),
+        claimed_until=None,
+        publish_attempts=0,
+        pending_channels=None,
+        **fields,
+    )
+
+
+@pytest.fixture
+def make_scheduler(session_factory):
+    def make(publish, **kwargs):
+        return PublicationScheduler(session_factory, publish, **kwargs)
+
+    return make
+
+
+async def test_failed_post_is_requeued_with_backoff_and_not_reclaimed(posts, make_scheduler):
+    for post_id in range(1, 3):
+        add_post(posts, post_id)
+    calls = []
+
+    async def publish(post):
+        calls.append(post.id)
+        if post.id == 1:
+            raise RuntimeError("telegram is down")
+
+    # A full batch makes dispatch_due claim again; the failed post must not be in it.
+    scheduler = make_scheduler(publish, batch_size=2, retry_delay=30)
+    assert await scheduler.dispatch_due() == 1
+
+    assert calls == [1, 2]
+    assert posts[2].status == "published"
+    assert posts[1].status == "queued"
+    assert posts[1].scheduled_at > utcnow() + timedelta(seconds=25)
+    assert (posts[1].scheduled_at, 1) in scheduler._heap
+
+
+async def test_post_fails_after_max_attempts(posts, make_scheduler):
+    add_post(posts, 1)
+
+    async def publish(post):
+        raise RuntimeError("boom")
+
+    scheduler = make_scheduler(publish, max_attempts=2, retry_delay=0.001)
+    await scheduler.dispatch_due()
+    assert posts[1].status == "queued"
+    posts[1].scheduled_at = utcnow() - timedelta(seconds=1)
+    await scheduler.dispatch_due()
+    assert posts[1].status == "failed"
+    assert posts[1].publish_attempts == 2
+
+
+async def test_outcomes_are_audited(posts, make_scheduler):
+    add_post(posts, 1)
+    add_post(posts, 2)
+    logged = []
+
+    async def publish(post):
+        if post.id == 2:
+            raise RuntimeError("boom")
+
+    audit = SimpleNamespace(log=lambda **entry: logged.append(entry))
+    await make_scheduler(publish, max_attempts=1, audit=audit).dispatch_due()
+    assert [(entry["action"], entry["target_id"]) for entry in logged] == [
+        ("post.publish", 1),
+        ("post.fail", 2),
+    ]
+
+
+async def test_expired_publishing_lease_is_reclaimed(posts, make_scheduler):
+    add_post(posts, 1, status="publishing")
+    posts[1].claimed_until = utcnow() - timedelta(seconds=1)
+    posts[1].publish_attempts = 1
+    add_post(posts, 2, status="publishing")
+    posts[2].claimed_until = utcnow() - timedelta(seconds=1)
+    posts[2].publish_attempts = 3
+    calls = []
+
+    async def publish(post):
+        calls.append(post.id)
+
+    await make_scheduler(publish, max_attempts=3).dispatch_due()
+    assert calls == [1]
+    assert posts[1].status == "published"
+    assert posts[2].status == "failed"
+
+
+async def test_partial_failure_keeps_failed_channels_pending(posts, make_scheduler):
+    add_post(posts, 1)
+
+    async def publish(post):
+        raise PublishError(
+            post.id,
+            [
+                PublishResult(channel_id=1, chat_id=-1, message_id=5),
+                PublishResult(channel_id=2, chat_id=-2, error="Forbidden"),
+            ],
+        )
+
+    await make_scheduler(publish).dispatch_due()
+    assert posts[1].status == "queued"
+    assert posts[1].pending_channels == [2]
+
+
+def test_backoff_is_exponential_and_capped(make_scheduler):
+    scheduler = make_scheduler(None, retry_delay=10, max_retry_delay=60)
+    assert [scheduler.backoff(n).total_seconds() for n in (1, 2, 3, 4)] == [10, 20, 40, 60]
+
+
+async def test_post_scheduled_in_another_process_wakes_the_scheduler(posts, make_scheduler):
+    published = []
+
+    async def publish(post):
+        published.append((post.id, utcnow() - post.scheduled_at))
+
+    bus = InvalidationBus(None, (CHANGED_POSTS_KEY,))
+    scheduler = make_scheduler(publish, refresh_interval=3600)
+    scheduler.bind(bus)
+    await scheduler.start()
+    try:
+        await asyncio.sleep(0.05)
+        add_post(posts, 1, status="scheduled")
+        posts[1].scheduled_at = utcnow() + timedelta(seconds=0.2)
+        bus.dispatch(CHANGED_POSTS_KEY, {1})  # as relayed from the process that committed it
+        for _ in range(100):
+            if published:
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        await scheduler.stop()
+
+    [(post_id, late)] = published
+    assert post_id == 1 and late < timedelta(seconds=0.5)
@@ -0,0 +1,67 @@
+from types import SimpleNamespace
+
+import pytest
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.methods import GetChat, GetChatMember
+
+from alt_controller_bot.bot.session import BotApiCacheMiddleware, invalidate_chat
+
+
+class FakeApi:
+    def __init__(self):
+        self.calls = []
+
+    async def __call__(self, bot, method):
+        self.calls.append(method)
+        if isinstance(method, GetChat):
+            if method.chat_id == "@missing":
+                raise TelegramBadRequest(method=method, message="chat not found")
+            return SimpleNamespace(id=-100, username="chan")
+        return SimpleNamespace(status="administrator")
+
+
+@pytest.fixture
+def cache():
+    return BotApiCacheMiddleware()
+
+
+@pytest.fixture
+def api():
+    return FakeApi()
+
+
+@pytest.fixture
+def bot(cache):
+    return SimpleNamespace(id=1, session=SimpleNamespace(middleware=[cache]))
+
+
+async def test_cached_failure_is_raised_as_a_fresh_copy(cache, api, bot):
+    errors = []
+    for _ in range(3):
+        with pytest.raises(TelegramBadRequest) as caught:
+            await cache(api, bot, GetChat(chat_id="@missing"))
+        errors.append(caught.value)
+
+    assert len(api.calls) == 1
+    assert len({id(error) for error in errors}) == 3
+    depths = []
+    for error in errors[1:]:
+        depth, tb = 0, error.__traceback__
+        while tb is not None:
+            depth, tb = depth + 1, tb.tb_next
+        depths.append(depth)
+    assert depths[0] == depths[1]
+
+
+@pytest.mark.parametrize("chat_id", ["@chan", -100])
+async def test_invalidating_a_chat_drops_it_under_id_and_username(cache, api, bot, chat_id):
+    await cache(api, bot, GetChat(chat_id="@chan"))
+    await cache(api, bot, GetChatMember(chat_id=-100, user_id=1))
+    await cache(api, bot, GetChatMember(chat_id=-200, user_id=1))
+    assert len(api.calls) == 3
+
+    invalidate_chat(bot, chat_id)
+    await cache(api, bot, GetChat(chat_id="@chan"))
+    await cache(api, bot, GetChatMember(chat_id=-100, user_id=1))
+    await cache(api, bot, GetChatMember(chat_id=-200, user_id=1))
+    assert len(api.calls) == 5
@@ -0,0 +1,124 @@
+import fakeredis
+import pytest
+from aiogram.fsm.storage.base import StorageKey
+
+from alt_controller_bot.bot.storage import STATE_FIELD, CompactRedisStorage, unpack
+
+KEY = StorageKey(bot_id=1, chat_id=10, user_id=10)
+
+
+@pytest.fixture
+def server() -> fakeredis.FakeServer:
+    return fakeredis.FakeServer()
+
+
+def make_storage(server: fakeredis.FakeServer, **kwargs) -> CompactRedisStorage:
+    return CompactRedisStorage(fakeredis.FakeAsyncRedis(server=server), **kwargs)
+
+
+async def raw_hash(storage: CompactRedisStorage) -> dict[str, bytes]:
+    raw = await storage.redis.hgetall(storage._name(KEY))
+    return {name.decode(): value for name, value in raw.items()}
+
+
+async def test_round_trip_and_ttl(server):
+    storage = make_storage(server, ttl=60)
+    await storage.set_state(KEY, "Draft:text")
+    await storage.update_data(KEY, {"text": "hello", "buttons": [{"text": "a"}]})
+
+    fresh = make_storage(server)
+    assert await fresh.get_state(KEY) == "Draft:text"
+    assert await fresh.get_data(KEY) == {"text": "hello", "buttons": [{"text": "a"}]}
+    assert 0 < await storage.redis.ttl(storage._name(KEY)) <= 60
+
+
+async def test_only_changed_fields_are_written(server):
+    storage = make_storage(server)
+    await storage.update_data(KEY, {"text": "hello", "media": ["a", "b"]})
+    await storage.redis.hset(storage._name(KEY), "media", b"untouched")
+
+    # Only "text" differs from the snapshot, so "media" must not be rewritten.
+    await storage.update_data(KEY, {"text": "changed", "media": ["a", "b"]})
+    stored = await raw_hash(storage)
+    assert unpack(stored["text"]) == "changed"
+    assert stored["media"] == b"untouched"
+
+
+async def test_set_data_removes_missing_fields(server):
+    storage = make_storage(server)
+    await storage.set_data(KEY, {"text": "a", "media": [1]})
+    await storage.set_data(KEY, {"text": "a"})
+    assert await make_storage(server).get_data(KEY) == {"text": "a"}
+
+
+async def test_stale_snapshot_does_not_skip_state_write(server):
+    first, second = make_storage(server), make_storage(server)
+    await first.set_state(KEY, "s1")
+    assert await first.get_state(KEY) == "s1"
+
+    await second.set_state(KEY, "s2")
+    await first.set_state(KEY, "s1")
+
+    assert (await raw_hash(first))[STATE_FIELD] == b"s1"
+    assert await make_storage(server).get_state(KEY) == "s1"
+
+
+async def test_stale_snapshot_does_not_lose_data_write(server):
+    first, second = make_storage(server), make_storage(server)
+    await first.update_data(KEY, {"text": "x"})
+    assert await first.get_data(KEY) == {"text": "x"}
+
+    await second.update_data(KEY, {"text": "y", "media": [1]})
+    data = await first.update_data(KEY, {"text": "x"})
+
+    assert data == {"text": "x", "media": [1]}
+    assert await make_storage(server).get_data(KEY) == {"text": "x", "media": [1]}
+
+
+async def test_in_place_changes_to_returned_data_are_written(server):
+    storage = make_storage(server)
+    await storage.update_data(KEY, {"buttons": [{"text": "a"}]})
+
+    data = await storage.get_data(KEY)
+    data["buttons"].append({"text": "b"})
+    assert await storage.get_data(KEY) == {"buttons": [{"text": "a"}]}
+
+    await storage.update_data(KEY, data)
+    assert await make_storage(server).get_data(KEY) == {
+        "buttons": [{"text": "a"}, {"text": "b"}]
+    }
+
+
+async def test_clearing_state_and_data(server):
+    storage = make_storage(server)
+    await storage.set_state(KEY, "Draft:text")
+    await storage.set_data(KEY, {"text": "a"})
+    await storage.set_state(KEY, None)
+    await storage.set_data(KEY, {})
+
+    fresh = make_storage(server)
+    assert await fresh.get_state(KEY) is None
+    assert await fresh.get_data(KEY) == {}
+
+
+async def test_write_from_another_process_is_seen_by_the_next_read(server):
+    first, second = make_storage(server), make_storage(server)
+    await first.set_state(KEY, "Draft:text")
+    assert await first.get_data(KEY) == {}
+
+    await second.update_data(KEY, {"text": "hello"})
+    await second.set_state(KEY, "Draft:buttons")
+    assert await first.get_state(KEY) == "Draft:buttons"
+    assert await first.get_data(KEY) == {"text": "hello"}
+
+
+async def test_close_leaves_the_shared_client_open(server, monkeypatch):
+    storage = make_storage(server)
+    closed = []
+
+    async def aclose():
+        closed.append(storage.redis)
+
+    monkeypatch.setattr(storage.redis, "aclose", aclose)
+    await storage.close()
+    assert closed == []
@@ -0,0 +1,146 @@
+import asyncio
+import json
+
+import fakeredis
+import pytest
+from aiogram import Bot
+from aiogram.types import Update
+
+from alt_controller_bot.bot.streams import (
+    STREAM_GROUP,
+    StreamWorker,
+    UpdateStream,
+    ingest_updates,
+)
+
+
+class RecordingDispatcher:
+    def __init__(self):
+        self.updates = []
+
+    async def feed_update(self, bot, update):
+        self.updates.append((update.message.chat.id, update.update_id))
+
+
+def make_update(update_id, chat_id):
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": 0,
+            "chat": {"id": chat_id, "type": "private"},
+            "text": "hi",
+        },
+    }
+
+
+@pytest.fixture
+async def stream():
+    redis = fakeredis.FakeAsyncRedis()
+    stream = UpdateStream(redis, prefix="test", shards=2)
+    await stream.ensure_groups()
+    yield stream
+    await redis.aclose()
+
+
+@pytest.fixture
+def bot():
+    return Bot("42:TEST")
+
+
+async def wait_for(predicate, timeout=5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+async def pending(stream, shard):
+    return (await stream.redis.xpending(stream.stream(shard), STREAM_GROUP))["pending"]
+
+
+def start(worker):
+    return asyncio.create_task(worker.run())
+
+
+async def test_worker_processes_in_chat_order_and_acks(stream, bot):
+    for update_id in range(12):
+        await stream.append(make_update(update_id, chat_id=update_id % 4))
+    dispatcher = RecordingDispatcher()
+    worker = StreamWorker(stream, bot, dispatcher, lease_ttl=0.6, block_ms=50)
+    task = start(worker)
+    await wait_for(lambda: len(dispatcher.updates) == 12)
+    assert worker.shards == [0, 1]
+
+    for chat_id in range(4):
+        seen = [update_id for chat, update_id in dispatcher.updates if chat == chat_id]
+        assert seen == sorted(seen)
+    assert await pending(stream, 0) == await pending(stream, 1) == 0
+
+    worker.stop()
+    await task
+    assert not await stream.redis.exists(stream.lease(0), stream.lease(1))
+
+
+async def test_new_owner_reclaims_unacknowledged_entries(stream, bot):
+    for update_id in range(3):
+        await stream.append(make_update(update_id, chat_id=2))
+    # A worker that read the entries and died before acknowledging them.
+    await stream.redis.xreadgroup(STREAM_GROUP, "crashed", {stream.stream(0): ">"})
+    assert await pending(stream, 0) == 3
+
+    dispatcher = RecordingDispatcher()
+    worker = StreamWorker(stream, bot, dispatcher, lease_ttl=0.6, block_ms=50)
+    task = start(worker)
+    await wait_for(lambda: len(dispatcher.updates) == 3)
+    assert [update_id for _, update_id in dispatcher.updates] == [0, 1, 2]
+    await wait_for(lambda: worker.processed == 3)
+    assert await pending(stream, 0) == 0
+
+    worker.stop()
+    await task
+
+
+async def test_shard_leased_elsewhere_is_left_alone(stream, bot):
+    await stream.redis.set(stream.lease(0), "other", px=60_000)
+    await stream.append(make_update(1, chat_id=2))
+    await stream.append(make_update(2, chat_id=3))
+    dispatcher = RecordingDispatcher()
+    worker = StreamWorker(stream, bot, dispatcher, lease_ttl=0.6, block_ms=50)
+    task = start(worker)
+    await wait_for(lambda: len(dispatcher.updates) == 1)
+    await asyncio.sleep(0.3)
+    assert worker.shards == [1]
+    assert dispatcher.updates == [(3, 2)]
+
+    worker.stop()
+    await task
+    assert await stream.redis.get(stream.lease(0)) == b"other"
+
+
+async def test_ingest_refetches_from_the_first_update_not_appended(stream, monkeypatch):
+    updates = [Update.model_validate(make_update(update_id, 1)) for update_id in (5, 6, 7)]
+    offsets = []
+
+    class Poller:
+        async def get_updates(self, offset, timeout, allowed_updates):
+            offsets.append(offset)
+            if len(offsets) == 3:
+                raise asyncio.CancelledError
+            return [update for update in updates if offset is None or update.update_id >= offset]
+
+    append = stream.append
+    failures = iter([True])
+
+    async def flaky_append(update):
+        if update["update_id"] == 6 and next(failures, False):
+            raise ConnectionError("redis is gone")
+        return await append(update)
+
+    monkeypatch.setattr(stream, "append", flaky_append)
+    with pytest.raises(asyncio.CancelledError):
+        await ingest_updates(Poller(), stream)
+
+    assert offsets == [None, 6, 8]
+    entries = await stream.redis.xrange(stream.stream(1))
+    assert [json.loads(fields[b"u"])["update_id"] for _, fields in entries] == [5, 6, 7]
@@ -0,0 +1,179 @@
+import asyncio
+import json
+import random
+
+import fakeredis
+import pytest
+from aiogram import Bot
+from fastapi import FastAPI
+
+from alt_controller_bot.api.webhook import (
+    StreamFeeder,
+    UpdateClaims,
+    UpdateFeeder,
+    build_router,
+)
+from alt_controller_bot.bot.streams import UpdateStream
+
+PATH = "/bot/webhook"
+SECRET = "s3cret"
+
+
+class RecordingDispatcher:
+    def __init__(self, fail_once=()):
+        self.processed = []
+        self.fail_once = set(fail_once)
+
+    async def feed_update(self, bot, update):
+        await asyncio.sleep(0)
+        if update.update_id in self.fail_once:
+            self.fail_once.discard(update.update_id)
+            raise RuntimeError("handler failed")
+        self.processed.append(update.update_id)
+
+
+def make_update(update_id, chat_id=1):
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": 0,
+            "chat": {"id": chat_id, "type": "private"},
+            "text": "hi",
+        },
+    }
+
+
+def make_app(feeder):
+    app = FastAPI()
+    app.include_router(build_router(PATH, SECRET))
+    app.state.update_feeder = feeder
+    return app
+
+
+async def post(app, payload, secret=SECRET):
+    body = json.dumps(payload).encode()
+    headers = [(b"content-type", b"application/json")]
+    if secret is not None:
+        headers.append((b"x-telegram-bot-api-secret-token", secret.encode()))
+    response = {}
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "https",
+        "path": PATH,
+        "raw_path": PATH.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": headers,
+        "client": ("149.154.160.1", 1),
+        "server": ("test", 443),
+    }
+    await app(scope, receive, send)
+    return response["status"]
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+@pytest.fixture
+def bot():
+    return Bot("42:TEST")
+
+
+def make_feeder(server, bot, dispatcher, **kwargs):
+    claims = UpdateClaims(fakeredis.FakeAsyncRedis(server=server), lease=kwargs.pop("lease", 60))
+    return UpdateFeeder(bot, dispatcher, claims, **kwargs)
+
+
+async def test_load_across_workers_processes_every_update_once(server, bot):
+    # Two uvicorn workers share Redis; Telegram redelivers a quarter of the updates,
+    # sometimes to the other worker and while the first delivery is still in flight.
+    dispatchers = [RecordingDispatcher(), RecordingDispatcher()]
+    feeders = [make_feeder(server, bot, dispatcher) for dispatcher in dispatchers]
+    workers = [make_app(feeder) for feeder in feeders]
+    deliveries = list(range(1, 2001)) + random.Random(7).sample(range(1, 2001), 500)
+    random.Random(8).shuffle(deliveries)
+    semaphore = asyncio.Semaphore(64)
+
+    async def deliver(index, update_id):
+        async with semaphore:
+            return await post(workers[index % 2], make_update(update_id, chat_id=update_id % 50))
+
+    statuses = await asyncio.gather(
+        *(deliver(index, update_id) for index, update_id in enumerate(deliveries))
+    )
+    for feeder in feeders:
+        await feeder.close()
+
+    assert set(statuses) == {200}
+    processed = dispatchers[0].processed + dispatchers[1].processed
+    assert sorted(processed) == list(range(1, 2001))
+    assert dispatchers[0].processed and dispatchers[1].processed
+
+
+async def test_wrong_secret_and_full_task_set_are_refused(server, bot):
+    app = make_app(make_feeder(server, bot, RecordingDispatcher(), max_tasks=0))
+    assert await post(app, make_update(1), secret=None) == 403
+    assert await post(app, make_update(1), secret="nope") == 403
+    assert await post(app, make_update(1)) == 503
+
+
+async def test_update_failing_in_a_handler_is_not_marked_done(server, bot):
+    dispatcher = RecordingDispatcher(fail_once={5})
+    feeder = make_feeder(server, bot, dispatcher)
+    app = make_app(feeder)
+
+    assert await post(app, make_update(5)) == 200
+    await feeder.close()
+    assert dispatcher.processed == []
+
+    assert await post(app, make_update(5)) == 200
+    await feeder.close()
+    assert dispatcher.processed == [5]
+    assert await post(app, make_update(5)) == 200
+    await feeder.close()
+    assert dispatcher.processed == [5]
+
+
+async def test_lease_of_a_dead_worker_runs_out(server, bot):
+    claims = UpdateClaims(fakeredis.FakeAsyncRedis(server=server), lease=0.05)
+    assert await claims.claim(9) is not None  # the worker dies before settling
+    assert await claims.claim(9) is None
+    await asyncio.sleep(0.1)
+    assert await claims.claim(9) is not None
+
+
+async def test_stream_append_failure_keeps_the_redelivery(server):
+    redis = fakeredis.FakeAsyncRedis(server=server)
+    stream = UpdateStream(redis, prefix="test", shards=2)
+    await stream.ensure_groups()
+    append = stream.append
+    failures = iter([True])
+
+    async def flaky_append(payload):
+        if next(failures, False):
+            raise ConnectionError("redis is gone")
+        return await append(payload)
+
+    stream.append = flaky_append
+    app = make_app(StreamFeeder(stream, UpdateClaims(redis)))
+    with pytest.raises(ConnectionError):
+        await post(app, make_update(3))
+
+    assert await post(app, make_update(3)) == 200
+    assert await post(app, make_update(3)) == 200
+    entries = await redis.xrange(stream.stream(1))
+    assert [json.loads(fields[b"u"])["update_id"] for _, fields in entries] == [3]
@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+
+from alt_controller_bot.services.writebehind import WriteBehindBuffer
+
+
+class RecordingBuffer(WriteBehindBuffer[str, int]):
+    """Sums values per key; each write takes ``delay`` seconds."""
+
+    def __init__(self, **kwargs):
+        super().__init__(None, **kwargs)
+        self.delay = 0.0
+        self.written: list[dict[str, int]] = []
+
+    def add(self, key, value=1):
+        self._pending[key] = self._pending.get(key, 0) + value
+        self._added()
+
+    async def _write(self, batch):
+        await asyncio.sleep(self.delay)
+        self.written.append(dict(batch))
+        return len(batch)
+
+    def _restore(self, batch):
+        for key, value in batch.items():
+            self._pending[key] = self._pending.get(key, 0) + value
+
+
+async def test_timer_flushes_every_interval():
+    buffer = RecordingBuffer(flush_interval=0.02)
+    await buffer.start()
+    buffer.add("a")
+    await asyncio.sleep(0.1)
+    buffer.add("a", 2)
+    await asyncio.sleep(0.1)
+    await buffer.stop()
+    assert buffer.written == [{"a": 1}, {"a": 2}]
+
+
+async def test_max_pending_wakes_the_timer():
+    buffer = RecordingBuffer(flush_interval=60, max_pending=2)
+    await buffer.start()
+    buffer.add("a")
+    await asyncio.sleep(0.01)
+    assert buffer.written == []
+    buffer.add("b")
+    await asyncio.sleep(0.01)
+    assert buffer.written == [{"a": 1, "b": 1}]
+    await buffer.stop()
+
+
+async def test_failed_flush_is_restored():
+    buffer = RecordingBuffer()
+    buffer.add("a", 3)
+    buffer.delay = 60
+    flush = asyncio.create_task(buffer.flush())
+    await asyncio.sleep(0.01)
+    buffer.add("a")
+    flush.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await flush
+    assert buffer.pending == 1
+
+    buffer.delay = 0
+    assert await buffer.flush() == 1
+    assert buffer.written == [{"a": 4}]
+
+
+async def test_stop_waits_for_the_flush_in_progress_and_flushes_the_rest():
+    buffer = RecordingBuffer(max_pending=1)
+    buffer.delay = 0.05
+    await buffer.start()
+    buffer.add("a")  # wakes the timer right away
+    await asyncio.sleep(0.01)
+    buffer.add("b")
+
+    await buffer.stop()
+    assert buffer.written == [{"a": 1}, {"b": 1}]
+    assert buffer.pending == 0
+
+
+async def test_stop_gives_up_on_a_stuck_flush_without_losing_it():
+    buffer = RecordingBuffer(max_pending=1, shutdown_timeout=0.05)
+    buffer.delay = 60
+    await buffer.start()
+    buffer.add("a")
+    await asyncio.sleep(0.01)
+
+    await buffer.stop()
+    assert buffer.written == []
+    assert buffer.pending == 1